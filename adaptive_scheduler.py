@@ -0,0 +1,156 @@
+import threading
+
+import numpy as np
+
+# Threat-driven detection scheduling.
+# The threat level comes from the latest CPA assessment of all tracks and sets
+# how often detection runs, which model tier it uses and how often CPA is
+# re-assessed. Escalation is immediate; de-escalation waits DOWNGRADE_HOLD
+# frames so one noisy assessment does not drop us back to a slow cadence.
+# The tracker bridges skipped frames with its constant-velocity prediction.
+# next_frame/next_detection run on the capture or inference thread while
+# update/should_assess run on the assessment thread, so all of them hold one lock.
+
+IDLE, MONITOR, ELEVATED, CRITICAL = range(4)
+LEVEL_NAMES = ('IDLE', 'MONITOR', 'ELEVATED', 'CRITICAL')
+
+# detect_every / assess_every in frames; 'light' = cheaper model or input size.
+# full_every: every Nth detection of a light level uses the full tier, so far
+# birds that only the full model resolves are still picked up within ~1 s.
+POLICIES = {
+    IDLE: {'detect_every': 6, 'tier': 'light', 'full_every': 5, 'assess_every': 6},
+    MONITOR: {'detect_every': 3, 'tier': 'light', 'full_every': 5, 'assess_every': 3},
+    ELEVATED: {'detect_every': 1, 'tier': 'full', 'full_every': 1, 'assess_every': 2},
+    CRITICAL: {'detect_every': 1, 'tier': 'full', 'full_every': 1, 'assess_every': 1},
+}
+
+ELEVATED_DISTANCE_FACTOR = 3.0 # Predicted miss within this many collision thresholds
+CRITICAL_TTI_S = 5.0
+DOWNGRADE_HOLD = 15 # Frames a lower level must persist before stepping down
+
+
+def classify_threat(is_collision, time_to_impact, min_distance, threshold):
+    """Threat level for a set of tracks from their (N,) CPA results."""
+    if len(is_collision) == 0:
+        return IDLE
+    if np.any(is_collision & (time_to_impact < CRITICAL_TTI_S)):
+        return CRITICAL
+    if np.any(is_collision) or np.any(min_distance < ELEVATED_DISTANCE_FACTOR * threshold):
+        return ELEVATED
+    return MONITOR
+
+
+class ThreatScheduler:
+    """Decides per frame whether to detect (and with which tier) and whether to assess."""
+
+    def __init__(self, policies=None, downgrade_hold=DOWNGRADE_HOLD, light_tier=True):
+        self.policies = policies or POLICIES
+        if not light_tier:
+            # The detector has no cheaper tier (e.g. a fixed-size ONNX graph): only the cadence adapts
+            self.policies = {level: dict(policy, tier='full', full_every=1) for level, policy in self.policies.items()}
+        self.downgrade_hold = downgrade_hold
+        self.level = IDLE
+        self._lower_since = None
+        self._since_detect = None
+        self._since_assess = None
+        self._detections = 0
+        self._confirming = False
+        self._lock = threading.Lock()
+        self.stats = {'frames': 0, 'full': 0, 'light': 0, 'skipped': 0,
+                      'level_frames': [0] * len(LEVEL_NAMES)}
+
+    @property
+    def policy(self):
+        """The current level's policy; while tracks await confirmation, full tier at least at MONITOR cadence."""
+        policy = self.policies[self.level]
+        if self._confirming:
+            every = min(policy['detect_every'], self.policies[MONITOR]['detect_every'])
+            policy = dict(policy, detect_every=every, tier='full', full_every=1)
+        return policy
+
+    def next_frame(self):
+        """Call once per frame on the detection side; returns (detect_now, tier)."""
+        with self._lock:
+            self.stats['frames'] += 1
+            self.stats['level_frames'][self.level] += 1
+            policy = self.policy
+            if self._since_detect is None or self._since_detect + 1 >= policy['detect_every']:
+                self._since_detect = 0
+                tier = 'full' if self._detections % policy['full_every'] == 0 else policy['tier']
+                self._detections += 1
+                self.stats[tier] += 1
+                return True, tier
+            self._since_detect += 1
+            self.stats['skipped'] += 1
+            return False, None
+
+    def next_detection(self):
+        """Capture-side variant of next_frame for sources that can skip frames undecoded.
+
+        Call once per frame that is read; every such frame is detected. Returns
+        (tier, skip): the tier for this frame and how many frames to skip before
+        the next one at the current level.
+        """
+        with self._lock:
+            policy = self.policy
+            skip = policy['detect_every'] - 1
+            tier = 'full' if self._detections % policy['full_every'] == 0 else policy['tier']
+            self._detections += 1
+            self._since_detect = skip
+            self.stats[tier] += 1
+            self.stats['frames'] += 1 + skip
+            self.stats['skipped'] += skip
+            self.stats['level_frames'][self.level] += 1 + skip
+            return tier, skip
+
+    def should_assess(self, frames=1):
+        """Call once per frame on the assessment side; frames = source frames since the last call."""
+        with self._lock:
+            if self._since_assess is None or self._since_assess + frames >= self.policy['assess_every']:
+                self._since_assess = 0
+                return True
+            self._since_assess += frames
+            return False
+
+    def confirming(self, pending):
+        """Call after each tracker update with whether unconfirmed tracks exist.
+
+        A bird first seen by a full-tier pass (beyond the light tier's reach) then
+        gets its confirming detections within a few frames instead of one per
+        full_every cycle, so the threat level can react to it sooner.
+        """
+        with self._lock:
+            if pending and not self._confirming:
+                self._since_detect = None # Detect on the very next frame
+            self._confirming = bool(pending)
+
+    def update(self, level, frame_idx):
+        """Applies a new threat level: escalate now, de-escalate after the hold period."""
+        with self._lock:
+            if level > self.level:
+                self.level = level
+                self._lower_since = None
+                self._since_detect = None # Detect on the very next frame
+                self._since_assess = None
+            elif level < self.level:
+                if self._lower_since is None:
+                    self._lower_since = frame_idx
+                elif frame_idx - self._lower_since >= self.downgrade_hold:
+                    self.level = level
+                    self._lower_since = None
+            else:
+                self._lower_since = None
+            return self.level
+
+    def compute_fraction(self, light_cost=0.25):
+        """Detection compute relative to running the full model on every frame."""
+        frames = max(self.stats['frames'], 1)
+        return (self.stats['full'] + light_cost * self.stats['light']) / frames
+
+    def print_report(self, light_cost=0.25):
+        s = self.stats
+        frames = max(s['frames'], 1)
+        levels = ", ".join(f"{name} {n / frames:.0%}" for name, n in zip(LEVEL_NAMES, s['level_frames']))
+        print(f"Adaptive rate: {s['full']} full / {s['light']} light detections, {s['skipped']} skipped "
+              f"of {s['frames']} frames (~{self.compute_fraction(light_cost):.0%} of every-frame compute)")
+        print(f"  Time at level: {levels}")
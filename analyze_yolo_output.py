@@ -1,80 +1,90 @@
 import cv2
-from ultralytics import YOLO
 import os
 
-model = YOLO('yolov8n.pt')
+from async_pipeline import BLOCK, PipelineRunner
+from detections import detections_from_results, draw_detections
+from frame_source import FrameSource
+from model_registry import get_yolo
+from telemetry import TELEMETRY_DIR, Telemetry, replay
+
+model_path = 'yolov8n.pt'
 video_path = 'vidio1.mp4' 
 conf_threshold = 0.25
 
 max_frames_to_process = 50
+telemetry_path = os.path.join(TELEMETRY_DIR, 'analyze_yolo_output.tlm')
 
 print(f"Opening video file: {video_path}")
 if not os.path.exists(video_path):
     print(f"Error: Video file not found at {video_path}")
 else:
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+    # Only the first max_frames_to_process frames are ever decoded
+    source = FrameSource(video_path, max_frames=max_frames_to_process, hold=12)
+    if not source.isOpened():
         print(f"Error: Could not open video file {video_path}")
     else:
+        model = get_yolo(model_path)
         print("Video opened successfully. Analyzing YOLO output...")
         print("Press 'q' on the display window to quit early.")
+        # Detections are logged while the video plays and printed from the log afterwards
+        telemetry = Telemetry(telemetry_path, meta={'video': video_path, 'model': model_path,
+                                                    'names': {str(k): v for k, v in model.names.items()}})
 
-        frame_count = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("End of video reached or error reading frame.")
-                break
-
-            if max_frames_to_process is not None and frame_count >= max_frames_to_process:
-                print(f"Reached maximum frames to process ({max_frames_to_process}). Stopping.")
-                break
-
-            frame_count += 1
-            print(f"\n--- Processing Frame {frame_count} ---")
+        # --- Stage functions (capture and inference run on background threads) ---
+        def capture():
+            item = source.read()
+            if item is None:
+                print(f"End of video or maximum frames to process ({max_frames_to_process}) reached. Stopping.")
+                return None
+            return item # (frame, container timestamp, source index)
 
+        def infer(item):
             # Run YOLOv8 inference
-            results = model.predict(source=frame, conf=conf_threshold, verbose=False)
-            result = results[0] 
-
-            # --- Analyze and Print Detections ---
-            if not result.boxes:
-                print("No objects detected in this frame.")
-            else:
-                print(f"Detected {len(result.boxes)} objects:")
-                # The result.boxes object contains all detection data
-                for i, box in enumerate(result.boxes):
-                    # Bounding Box Coordinates:
-                    # box.xyxy[0] gives tensor([x1, y1, x2, y2]) (top-left, bottom-right)
-                    xyxy_coords = box.xyxy[0].cpu().numpy().astype(int) # Convert to NumPy array of integers
-                    # box.xywh[0] gives tensor([cx, cy, w, h]) (center-x, center-y, width, height)
-                    xywh_coords = box.xywh[0].cpu().numpy().astype(int)
-
-                    # Confidence Score:
-                    conf = float(box.conf[0].cpu().numpy()) # Convert to standard Python float
+            results = model.predict(source=item[0], conf=conf_threshold, verbose=False)
+            # All boxes as one structured array (single device-to-host copy):
+            # fields x1, y1, x2, y2 (corners), cx, cy, w, h (center/size), conf, cls
+            return detections_from_results(results[0])
 
-                    # Class ID and Name:
-                    cls_id = int(box.cls[0].cpu().numpy()) # Convert to standard Python int
-                    class_name = model.names[cls_id]
-
-                    print(f"  Detection {i+1}:")
-                    print(f"    Class: {class_name} (ID: {cls_id})")
-                    print(f"    Confidence: {conf:.3f}") # Print confidence with 3 decimal places
-                    print(f"    BBox (xyxy): [{xyxy_coords[0]}, {xyxy_coords[1]}, {xyxy_coords[2]}, {xyxy_coords[3]}]")
-                    print(f"    BBox Center (cx, cy): ({xywh_coords[0]}, {xywh_coords[1]})")
-                    print(f"    BBox Size (w, h): ({xywh_coords[2]}, {xywh_coords[3]})")
-
-                    # --- Draw on frame for visual confirmation ---
-                    cv2.rectangle(frame, (xyxy_coords[0], xyxy_coords[1]), (xyxy_coords[2], xyxy_coords[3]), (0, 255, 0), 2)
-                    label = f"{class_name} {conf:.2f}"
-                    cv2.putText(frame, label, (xyxy_coords[0], xyxy_coords[1] - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        def analyze(_, item, dets):
+            frame, timestamp, frame_idx = item
+            # --- Log Detections (no console output in the loop) ---
+            telemetry.detections(frame_idx, timestamp, dets)
+            telemetry.frame(frame_idx, timestamp, len(dets), 0)
+            if len(dets):
+                # --- Draw on frame for visual confirmation ---
+                draw_detections(frame, dets, model.names)
 
             # Display the frame (optional, but helpful)
             cv2.imshow('YOLOv8 Output Analysis', frame)
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 print("'q' pressed, stopping analysis.")
-                break
+                return False
+            return True
+
+        runner = PipelineRunner(capture, infer, analyze, policy=BLOCK, telemetry=telemetry)
+        runner.run()
+        runner.print_report()
 
-        cap.release()
+        source.release()
         cv2.destroyAllWindows()
-        print("\nVideo closed and resources released.")
\ No newline at end of file
+        telemetry.close()
+        print("\nVideo closed and resources released.")
+
+        # --- Analyze and Print Detections (replayed from the telemetry log) ---
+        for frame_idx, events in replay(telemetry_path, streams=('frame', 'detection')):
+            print(f"\n--- Processing Frame {frame_idx + 1} ---")
+            dets = events.get('detection', ())
+            if len(dets) == 0:
+                print("No objects detected in this frame.")
+                continue
+            print(f"Detected {len(dets)} objects:")
+            for i, d in enumerate(dets):
+                x1, y1, x2, y2 = int(d['x1']), int(d['y1']), int(d['x2']), int(d['y2'])
+                cls_id = int(d['cls'])
+                print(f"  Detection {i+1}:")
+                print(f"    Class: {model.names[cls_id]} (ID: {cls_id})")
+                print(f"    Confidence: {d['conf']:.3f}") # Print confidence with 3 decimal places
+                print(f"    BBox (xyxy): [{x1}, {y1}, {x2}, {y2}]")
+                print(f"    BBox Center (cx, cy): ({(x1 + x2) // 2}, {(y1 + y2) // 2})")
+                print(f"    BBox Size (w, h): ({x2 - x1}, {y2 - y1})")
+        print(f"\nTelemetry log: {telemetry_path}")
\ No newline at end of file
@@ -0,0 +1,481 @@
+import asyncio
+import json
+import socket
+import time
+
+import numpy as np
+
+from async_pipeline import StageStats
+from cpa import solve_cpa
+from spatial_index import MAX_BIRD_SPEED_MPS, UniformGrid, capsule_cells, cell_keys, expand_ranges
+
+# Fleet collision assessment service.
+# One long-running process keeps every bird track and every aircraft state
+# (from any number of pipelines, radar feeds or ADS-B bridges) in array-backed
+# tables and re-assesses them every ASSESS_INTERVAL_S. Only pairs whose state
+# changed since the last assessment are recomputed:
+#   dirty aircraft x all birds   -> birds in the aircraft's swept corridor (grid query)
+#   dirty birds x clean aircraft -> aircraft whose cached corridor holds the bird's cell
+# Results are stored with absolute impact times, so a pair whose states did
+# not change needs no recompute: constant-velocity CPA does not depend on when
+# it was evaluated (only the horizon moves, see FleetAssessor).
+#
+# Protocol: newline-delimited JSON over TCP, one object per line.
+#   {"type": "birds", "ids": [...], "pos": [[x, y, z], ...], "vel": [[...], ...], "t": 12.5}
+#   {"type": "aircraft", "id": "DAL123", "pos": [x, y, z], "vel": [vx, vy, vz], "t": 12.5}
+#   {"type": "remove", "birds": [...], "aircraft": [...]}
+#   {"type": "subscribe", "aircraft": ["DAL123"]}   (omit "aircraft" for every aircraft)
+#   {"type": "snapshot"}                             -> {"type": "snapshot", "alerts": [...]}
+# Subscribers receive {"type": "alert", ...} for every recomputed pair that
+# collides within the horizon ("new": true when it just started) and
+# {"type": "clear", ...} when a pair stops colliding or one side is removed.
+# "t" is optional; states without it are stamped with the service clock, so
+# every sender must either omit it or share one clock.
+
+HOST = '127.0.0.1'
+PORT = 8765
+ASSESS_INTERVAL_S = 0.05
+CPA_HORIZON_S = 10.0
+COLLISION_THRESHOLD_M = 100.0
+STALE_AFTER_S = 2.0 # States not refreshed for this long are dropped (and their alerts cleared)
+SUBSCRIBER_QUEUE = 1024 # Events buffered per subscriber; the oldest are dropped for slow readers
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class StateTable:
+    """Constant-velocity states keyed by id in preallocated arrays, with per-row dirty flags."""
+
+    def __init__(self, capacity=64):
+        self.slots = {}
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.ids = np.empty(capacity, dtype=object)
+        self.pos = np.zeros((capacity, 3))
+        self.vel = np.zeros((capacity, 3))
+        self.time = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.dirty = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        """Doubles the storage when every slot is taken."""
+        old = (self.ids, self.pos, self.vel, self.time, self.alive, self.dirty)
+        n = len(self.alive)
+        self._allocate(2 * n)
+        for new, prev in zip((self.ids, self.pos, self.vel, self.time, self.alive, self.dirty), old):
+            new[:n] = prev
+
+    def capacity(self):
+        return len(self.alive)
+
+    def upsert(self, ids, pos, vel, t):
+        """Sets the state of every id (adding new ones) and marks the rows dirty; returns their rows."""
+        rows = np.empty(len(ids), dtype=np.intp)
+        for k, key in enumerate(ids):
+            row = self.slots.get(key)
+            if row is None:
+                free = np.flatnonzero(~self.alive)
+                if len(free) == 0:
+                    self._grow()
+                    free = np.flatnonzero(~self.alive)
+                row = self.slots[key] = free[0]
+                self.ids[row] = key
+                self.alive[row] = True
+            rows[k] = row
+        self.pos[rows] = pos
+        self.vel[rows] = vel
+        self.time[rows] = t
+        self.dirty[rows] = True
+        return rows
+
+    def remove(self, ids):
+        """Frees the rows of the given ids; returns them."""
+        rows = np.array([self.slots.pop(key) for key in ids if key in self.slots], dtype=np.intp)
+        self.alive[rows] = False
+        self.dirty[rows] = False
+        return rows
+
+    def stale(self, now, max_age):
+        """Ids not refreshed within max_age seconds of now."""
+        return list(self.ids[self.alive & (self.time < now - max_age)])
+
+    def at(self, rows, t):
+        """Positions extrapolated to time t and velocities of the given rows."""
+        dt = t - self.time[rows]
+        return self.pos[rows] + self.vel[rows] * dt[:, None], self.vel[rows]
+
+
+class FleetAssessor:
+    """Incremental CPA between every aircraft and every bird track.
+
+    CPA looks ahead horizon + stale_after seconds, so a hit that is beyond the
+    horizon now is already stored when the horizon reaches it, even if neither
+    state is refreshed in between; alerting marks the pairs currently alerted,
+    until the bird leaves the threshold sphere (exit_time).
+    Each aircraft's swept corridor cells are cached when its state changes, so
+    a refreshed bird only meets the aircraft whose corridors contain its cell.
+    """
+
+    def __init__(self, horizon=CPA_HORIZON_S, threshold=COLLISION_THRESHOLD_M, stale_after=STALE_AFTER_S):
+        self.horizon = horizon
+        self.threshold = threshold
+        self.stale_after = stale_after
+        self.lookahead = horizon + stale_after
+        # Cached corridors must still hold stale_after seconds later, when birds have moved on too
+        self.corridor_radius = threshold + MAX_BIRD_SPEED_MPS * self.lookahead
+        self.birds = StateTable(256)
+        self.aircraft = StateTable(16)
+        self.grid = UniformGrid()
+        self.corridors = {} # Aircraft row -> sorted cell keys of its corridor
+        self._index_keys = np.zeros(0, dtype=np.int64) # All corridor cells, sorted, with their aircraft rows
+        self._index_rows = np.zeros(0, dtype=np.intp)
+        self.now = 0.0 # Latest state time seen
+        self.pairs_computed = 0
+        self._allocate_results(self.aircraft.capacity(), self.birds.capacity())
+
+    def _allocate_results(self, num_aircraft, num_birds):
+        """(aircraft, bird) result matrices; min_distance is inf for pairs culled by the corridor."""
+        self.collision = np.zeros((num_aircraft, num_birds), dtype=bool)
+        self.alerting = np.zeros((num_aircraft, num_birds), dtype=bool)
+        self.impact_time = np.full((num_aircraft, num_birds), np.inf)
+        self.exit_time = np.full((num_aircraft, num_birds), -np.inf)
+        self.min_distance = np.full((num_aircraft, num_birds), np.inf)
+
+    def _results(self):
+        return self.collision, self.alerting, self.impact_time, self.exit_time, self.min_distance
+
+    def _fit_results(self):
+        old = self._results()
+        m, n = old[0].shape
+        if (m, n) == (self.aircraft.capacity(), self.birds.capacity()):
+            return
+        self._allocate_results(self.aircraft.capacity(), self.birds.capacity())
+        for new, prev in zip(self._results(), old):
+            new[:m, :n] = prev
+
+    # --- Ingest ---
+
+    def update_birds(self, ids, pos, vel, t=None):
+        t = time.time() if t is None else t
+        self.now = max(self.now, t)
+        self.birds.upsert(ids, np.asarray(pos, dtype=np.float64).reshape(-1, 3),
+                          np.asarray(vel, dtype=np.float64).reshape(-1, 3), t)
+
+    def update_aircraft(self, aircraft_id, pos, vel, t=None):
+        t = time.time() if t is None else t
+        self.now = max(self.now, t)
+        self.aircraft.upsert([aircraft_id], pos, vel, t)
+
+    def remove(self, birds=(), aircraft=()):
+        """Drops birds and aircraft; returns 'clear' events for their alerted pairs."""
+        self._fit_results()
+        events = []
+        rows = self.birds.remove(birds)
+        a, b = np.nonzero(self.alerting[:, rows])
+        events += self._events('clear', a, rows[b])
+        self._reset(np.s_[:, rows])
+        self.alerting[:, rows] = False
+        rows = self.aircraft.remove(aircraft)
+        a, b = np.nonzero(self.alerting[rows])
+        events += self._events('clear', rows[a], b)
+        self._reset(np.s_[rows])
+        self.alerting[rows] = False
+        if len(rows):
+            # Aircraft that never went through assess() have no corridor yet
+            for row in rows.tolist():
+                self.corridors.pop(row, None)
+            self._rebuild_index()
+        return events
+
+    def _reset(self, index):
+        self.collision[index] = False
+        self.impact_time[index] = np.inf
+        self.exit_time[index] = -np.inf
+        self.min_distance[index] = np.inf
+
+    # --- Assess ---
+
+    def _solve_pairs(self, a_rows, b_rows, a_state, b_state):
+        """CPA for aligned (aircraft, bird) row pairs, written into the result matrices."""
+        dp = b_state[0] - a_state[0]
+        dv = b_state[1] - a_state[1]
+        hit, tti, min_dist, _ = solve_cpa(np.zeros(3), np.zeros(3), dp, dv, self.lookahead, self.threshold)
+        # Time the bird leaves the sphere again: the larger root of |dp + dv t| = threshold
+        a = np.einsum('ij,ij->i', dv, dv)
+        b = np.einsum('ij,ij->i', dp, dv)
+        disc = b * b - a * (np.einsum('ij,ij->i', dp, dp) - self.threshold ** 2)
+        moving = a > 0.0
+        t_exit = np.where(moving & (disc >= 0.0), (-b + np.sqrt(np.maximum(disc, 0.0))) / np.where(moving, a, 1.0),
+                          np.where(hit[:, 0], np.inf, -np.inf)) # Not moving apart: inside for good (or never)
+        self.collision[a_rows, b_rows] = hit[:, 0]
+        self.impact_time[a_rows, b_rows] = self.now + tti[:, 0]
+        self.exit_time[a_rows, b_rows] = self.now + t_exit
+        self.min_distance[a_rows, b_rows] = min_dist[:, 0]
+        self.pairs_computed += len(a_rows)
+
+    def _index_corridors(self, rows, pos, vel):
+        """Caches the corridor cells of the given aircraft and rebuilds the cell -> aircraft index."""
+        for row, p, v in zip(rows.tolist(), pos, vel):
+            self.corridors[row] = capsule_cells(p, p + v * (self.lookahead + self.stale_after), self.corridor_radius,
+                                                self.grid.cell_size)
+        self._rebuild_index()
+
+    def _rebuild_index(self):
+        keys = list(self.corridors.values())
+        index_rows = np.repeat(np.fromiter(self.corridors, dtype=np.intp), [len(k) for k in keys])
+        keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+        order = np.argsort(keys, kind='stable')
+        self._index_keys, self._index_rows = keys[order], index_rows[order]
+
+    def _fast_birds(self, rows):
+        vel = self.birds.vel[rows]
+        return rows[np.einsum('ij,ij->i', vel, vel) > MAX_BIRD_SPEED_MPS ** 2]
+
+    def assess(self, full=False):
+        """Recomputes the changed pairs; returns alert and clear events.
+
+        full=True recomputes every pair (for comparison with the incremental path).
+        """
+        events = self.remove(self.birds.stale(self.now, self.stale_after),
+                             self.aircraft.stale(self.now, self.stale_after))
+        self._fit_results()
+        birds, aircraft = self.birds, self.aircraft
+        b_alive = np.flatnonzero(birds.alive)
+        a_alive = np.flatnonzero(aircraft.alive)
+        a_dirty = a_alive if full else a_alive[aircraft.dirty[a_alive]]
+        clean = aircraft.alive.copy()
+        clean[a_dirty] = False
+        b_dirty = b_alive[birds.dirty[b_alive]]
+        birds.dirty[:] = False
+        aircraft.dirty[:] = False
+
+        # Pairs to re-evaluate: alerted pairs of dirty aircraft (they may have been
+        # culled now), recomputed pairs, and stored hits the clock has moved into or out of
+        was_a, was_b = np.nonzero(self.alerting[a_dirty])
+        touched_a, touched_b = [a_dirty[was_a]], [was_b]
+        self._reset(np.s_[a_dirty])
+
+        # --- Dirty aircraft: every bird in the swept corridor ---
+        if len(a_dirty):
+            a_pos, a_vel = aircraft.at(a_dirty, self.now)
+            self._index_corridors(a_dirty, a_pos, a_vel)
+            if len(b_alive):
+                bird_pos, bird_vel = birds.at(b_alive, self.now)
+                self.grid.rebuild(bird_pos)
+                fast = self._fast_birds(b_alive)
+                for k, row in enumerate(a_dirty.tolist()):
+                    bi = np.union1d(b_alive[self.grid.points_in_cells(self.corridors[row])], fast)
+                    ai = np.full(len(bi), row)
+                    self._solve_pairs(ai, bi, (a_pos[k], a_vel[k]), birds.at(bi, self.now))
+                    touched_a.append(ai)
+                    touched_b.append(bi)
+
+        # --- Dirty birds against the corridors of the aircraft that did not change ---
+        if len(b_dirty) and clean.any():
+            bird_pos, _ = birds.at(b_dirty, self.now)
+            keys = cell_keys(np.floor(bird_pos / self.grid.cell_size))
+            lo = np.searchsorted(self._index_keys, keys, side='left')
+            hi = np.searchsorted(self._index_keys, keys, side='right')
+            ai = self._index_rows[expand_ranges(lo, hi - lo)]
+            bi = np.repeat(b_dirty, hi - lo)
+            fast = self._fast_birds(b_dirty)
+            a_clean = np.flatnonzero(clean)
+            ai = np.concatenate([ai, np.repeat(a_clean, len(fast))])
+            bi = np.concatenate([bi, np.tile(fast, len(a_clean))])
+            keep = clean[ai]
+            ai, bi = ai[keep], bi[keep]
+            self._solve_pairs(ai, bi, aircraft.at(ai, self.now), birds.at(bi, self.now))
+            touched_a.append(ai)
+            touched_b.append(bi)
+
+        # Alerted pairs are a subset of the (sparse) stored hits
+        hit_a, hit_b = np.nonzero(self.collision)
+        due = np.where(self.alerting[hit_a, hit_b], self.exit_time[hit_a, hit_b] <= self.now,
+                       self.impact_time[hit_a, hit_b] <= self.now + self.horizon)
+        touched_a.append(hit_a[due])
+        touched_b.append(hit_b[due])
+
+        # --- Events: pairs that stopped alerting, then every alerted touched pair ---
+        num_birds = self.birds.capacity()
+        flat = np.unique(np.concatenate(touched_a) * num_birds + np.concatenate(touched_b))
+        ai, bi = flat // num_birds, flat % num_birds
+        was = self.alerting[ai, bi]
+        alert = (self.collision[ai, bi] & (self.impact_time[ai, bi] <= self.now + self.horizon)
+                 & (self.exit_time[ai, bi] > self.now))
+        self.alerting[ai, bi] = alert
+        events += self._events('clear', ai[was & ~alert], bi[was & ~alert])
+        events += self._events('alert', ai[alert], bi[alert], ~was[alert])
+        return events
+
+    def _events(self, kind, a_rows, b_rows, new=None):
+        events = []
+        for k, (a, b) in enumerate(zip(a_rows.tolist(), b_rows.tolist())):
+            event = {'type': kind, 'aircraft': self.aircraft.ids[a], 'track_id': self.birds.ids[b]}
+            if kind == 'alert':
+                event.update(tti=max(self.impact_time[a, b] - self.now, 0.0), impact_time=self.impact_time[a, b],
+                             min_dist=self.min_distance[a, b], new=bool(new[k]))
+            events.append(event)
+        return events
+
+    def snapshot(self):
+        """An alert event for every currently alerted pair."""
+        a, b = np.nonzero(self.alerting)
+        return self._events('alert', a, b, np.zeros(len(a), dtype=bool))
+
+
+class Subscriber:
+    """One connected client's outgoing events, dropping the oldest when it falls behind."""
+
+    def __init__(self, writer, aircraft=None):
+        self.writer = writer
+        self.aircraft = aircraft # None = every aircraft
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        self.dropped = 0
+        self.handler = None # The connection's reading task
+
+    def push(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def run(self):
+        while True:
+            message = await self.queue.get()
+            self.writer.write(encode(message))
+            await self.writer.drain()
+
+
+class AssessmentService:
+    """asyncio front end: ingests states from clients and fans out events to subscribers."""
+
+    def __init__(self, assessor=None, interval=ASSESS_INTERVAL_S):
+        self.assessor = assessor or FleetAssessor()
+        self.interval = interval
+        self.subscribers = set()
+        self.clients = set()
+        self.stats = StageStats('assessment')
+        self.server = None
+
+    async def serve(self, host=HOST, port=PORT):
+        """Starts listening and assessing; returns the asyncio server."""
+        self.server = await asyncio.start_server(self._client, host, port, limit=MAX_MESSAGE_BYTES)
+        self._assess_task = asyncio.create_task(self._assess_loop())
+        return self.server
+
+    async def close(self):
+        """Stops assessing and disconnects every client."""
+        self._assess_task.cancel()
+        self.server.close()
+        handlers = [sub.handler for sub in self.clients]
+        for sub in list(self.clients):
+            sub.writer.close()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def _assess_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            start = time.perf_counter()
+            try:
+                events = self.assessor.assess()
+            except Exception as e:
+                # One bad tick must not stop the service alerting; the next tick retries
+                print(f"WARNING: assessment failed ({type(e).__name__}: {e}); continuing")
+                continue
+            self.stats.record(time.perf_counter() - start)
+            self.publish(events)
+
+    def publish(self, events):
+        for sub in self.subscribers:
+            for event in events:
+                if sub.aircraft is None or event['aircraft'] in sub.aircraft:
+                    sub.push(event)
+
+    def handle(self, message, sub):
+        """Applies one client message; returns a reply or None."""
+        kind = message.get('type')
+        if kind == 'birds':
+            self.assessor.update_birds(message['ids'], message['pos'], message['vel'], message.get('t'))
+        elif kind == 'aircraft':
+            self.assessor.update_aircraft(message['id'], message['pos'], message['vel'], message.get('t'))
+        elif kind == 'remove':
+            self.publish(self.assessor.remove(message.get('birds', ()), message.get('aircraft', ())))
+        elif kind == 'subscribe':
+            sub.aircraft = set(message['aircraft']) if message.get('aircraft') is not None else None
+            self.subscribers.add(sub)
+        elif kind == 'snapshot':
+            return {'type': 'snapshot', 'alerts': self.assessor.snapshot()}
+        else:
+            return {'type': 'error', 'message': f"Unknown message type: {kind}"}
+        return None
+
+    async def _client(self, reader, writer):
+        sub = Subscriber(writer)
+        sub.handler = asyncio.current_task()
+        self.clients.add(sub)
+        sender = asyncio.create_task(sub.run())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = self.handle(json.loads(line), sub)
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {'type': 'error', 'message': f"{type(e).__name__}: {e}"}
+                if reply is not None:
+                    sub.push(reply)
+        finally:
+            self.subscribers.discard(sub)
+            self.clients.discard(sub)
+            sender.cancel()
+            writer.close()
+
+
+def encode(message):
+    """One JSON line (NumPy scalars are converted on the way)."""
+    return (json.dumps(message, default=float) + '\n').encode()
+
+
+class TrackPublisher:
+    """Blocking client for synchronous producers such as final_pipeline: sends track batches, never reads.
+
+    source prefixes every bird id ("source/id") so several pipelines can share one service.
+    """
+
+    def __init__(self, host=HOST, port=PORT, source=None):
+        self.sock = socket.create_connection((host, port))
+        self.source = source
+
+    def birds(self, ids, pos, vel, t=None):
+        ids = np.asarray(ids).tolist()
+        if self.source is not None:
+            ids = [f"{self.source}/{i}" for i in ids]
+        message = {'type': 'birds', 'ids': ids, 'pos': np.asarray(pos).tolist(),
+                   'vel': np.asarray(vel).tolist()}
+        if t is not None:
+            message['t'] = t
+        self.sock.sendall(encode(message))
+
+    def aircraft(self, aircraft_id, pos, vel, t=None):
+        message = {'type': 'aircraft', 'id': aircraft_id, 'pos': np.asarray(pos).tolist(), 'vel': np.asarray(vel).tolist()}
+        if t is not None:
+            message['t'] = t
+        self.sock.sendall(encode(message))
+
+    def close(self):
+        self.sock.close()
+
+
+async def main():
+    service = AssessmentService()
+    server = await service.serve()
+    print(f"Assessment service listening on {HOST}:{PORT} (horizon {CPA_HORIZON_S:.0f} s, "
+          f"threshold {COLLISION_THRESHOLD_M:.0f} m)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
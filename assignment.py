@@ -0,0 +1,51 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError: # scipy is optional, fall back to greedy matching
+    linear_sum_assignment = None
+
+# Sparse one-to-one assignment shared by stereo matching and tracking.
+# Inputs are flat candidate lists (row_idx, col_idx, cost) that already passed
+# a gate, so only plausible pairs ever reach the solver.
+
+
+def _greedy_assign(row_idx, col_idx, cost):
+    """Picks the cheapest remaining pair until rows or columns run out."""
+    used_rows = set()
+    used_cols = set()
+    pairs = []
+    for k in np.argsort(cost, kind='stable'):
+        r, c = row_idx[k], col_idx[k]
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((r, c))
+    if not pairs:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    pairs = np.array(pairs, dtype=np.intp)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def _hungarian_assign(row_idx, col_idx, cost):
+    """Optimal assignment on the sparse candidate set."""
+    # Only rows/columns that have at least one candidate enter the dense matrix
+    rows, row_pos = np.unique(row_idx, return_inverse=True)
+    cols, col_pos = np.unique(col_idx, return_inverse=True)
+    forbidden = cost.max() * len(rows) + 1.0
+    matrix = np.full((len(rows), len(cols)), forbidden)
+    matrix[row_pos, col_pos] = cost
+    r, c = linear_sum_assignment(matrix)
+    ok = matrix[r, c] < forbidden
+    return rows[r[ok]], cols[c[ok]]
+
+
+def assign_pairs(row_idx, col_idx, cost, method='hungarian'):
+    """Returns matched (row_idx, col_idx) arrays from a sparse candidate list."""
+    if len(cost) == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    if method == 'hungarian' and linear_sum_assignment is not None:
+        return _hungarian_assign(row_idx, col_idx, cost)
+    return _greedy_assign(row_idx, col_idx, cost)
@@ -0,0 +1,216 @@
+import collections
+import threading
+import time
+
+import numpy as np
+
+# Staged capture -> inference -> assessment runner.
+# Capture and inference run on their own threads and hand items over through
+# bounded queues, so decode, inference and assessment overlap. Assessment runs
+# on the calling thread because cv2.imshow must stay on the main thread.
+
+DROP_OLDEST = 'drop_oldest'   # Live sources: keep the freshest frames
+BLOCK = 'block'               # Offline files: backpressure, never drop
+LATENCY_WINDOW = 1024         # Recent samples kept per stage for percentiles
+# Log-spaced latency bins (ms) over ALL samples; histograms from separate runs can be summed
+HISTOGRAM_EDGES_MS = np.concatenate([[0.0], np.geomspace(0.1, 10000.0, 41)])
+
+
+class BoundedQueue:
+    """Fixed-capacity ring buffer with drop-oldest or blocking put."""
+
+    def __init__(self, capacity, policy=DROP_OLDEST):
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item):
+        """Adds an item; returns False if the queue was closed."""
+        with self._cond:
+            if self.policy == BLOCK:
+                while len(self._items) >= self.capacity and not self._closed:
+                    self._cond.wait()
+            elif len(self._items) >= self.capacity:
+                self._items.popleft()
+                self.dropped += 1
+            if self._closed:
+                return False
+            self._items.append(item)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify_all()
+            return True
+
+    def get(self):
+        """Blocks for the next item; returns None once closed and drained."""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def depth(self):
+        return len(self._items)
+
+
+class StageStats:
+    """Latency and throughput counters for one stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self._recent = np.zeros(LATENCY_WINDOW)
+        self.histogram = np.zeros(len(HISTOGRAM_EDGES_MS), dtype=np.int64) # Last bin = above the top edge
+
+    def record(self, seconds):
+        self._recent[self.count % LATENCY_WINDOW] = seconds
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+        self.histogram[np.searchsorted(HISTOGRAM_EDGES_MS, seconds * 1000.0, side='right') - 1] += 1
+
+    def summary(self):
+        """Returns a dict of count, mean/p50/p95/max latency in milliseconds."""
+        recent = self._recent[:min(self.count, LATENCY_WINDOW)]
+        if len(recent) == 0:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_ms': self.total_s / self.count * 1000.0,
+            'p50_ms': float(np.percentile(recent, 50)) * 1000.0,
+            'p95_ms': float(np.percentile(recent, 95)) * 1000.0,
+            'max_ms': self.max_s * 1000.0,
+            'histogram': self.histogram.tolist(),
+        }
+
+
+class PipelineRunner:
+    """Runs capture, inference and assessment as overlapping stages.
+
+    capture() returns the next frame or None at end of stream.
+    infer(frame) returns the detection result for that frame.
+    assess(frame_idx, frame, result) handles one result; return False to stop.
+    An exception in capture() or infer() stops every stage and is re-raised by run().
+    telemetry (a telemetry.Telemetry) also receives every stage timing per frame.
+    """
+
+    def __init__(self, capture, infer, assess, queue_size=4, policy=DROP_OLDEST, telemetry=None):
+        self.capture = capture
+        self.infer = infer
+        self.assess = assess
+        self.frames = BoundedQueue(queue_size, policy)
+        self.results = BoundedQueue(queue_size, policy)
+        self.stats = {name: StageStats(name) for name in ('capture', 'inference', 'assessment', 'frame_to_alert')}
+        self.telemetry = telemetry
+        self._stop = threading.Event()
+        self._error = None # First exception raised on a worker thread
+
+    def _record(self, stage, frame_idx, seconds):
+        self.stats[stage].record(seconds)
+        if self.telemetry is not None:
+            self.telemetry.stage(frame_idx, stage, seconds)
+
+    def _fail(self, error):
+        """Keeps a worker's exception for run(); what is already queued still drains."""
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _capture_loop(self):
+        frame_idx = 0
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                frame = self.capture()
+                if frame is None:
+                    break
+                self._record('capture', frame_idx, time.perf_counter() - start)
+                if not self.frames.put((frame_idx, start, frame)):
+                    break
+                frame_idx += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self.frames.close()
+
+    def _inference_loop(self):
+        try:
+            while True:
+                item = self.frames.get()
+                if item is None:
+                    break
+                frame_idx, t_capture, frame = item
+                start = time.perf_counter()
+                result = self.infer(frame)
+                self._record('inference', frame_idx, time.perf_counter() - start)
+                if not self.results.put((frame_idx, t_capture, frame, result)):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self.results.close()
+
+    def run(self):
+        """Runs until the source ends or assess() returns False; re-raises a capture/inference failure."""
+        workers = [threading.Thread(target=self._capture_loop, name='capture', daemon=True),
+                   threading.Thread(target=self._inference_loop, name='inference', daemon=True)]
+        for w in workers:
+            w.start()
+
+        try:
+            while True:
+                item = self.results.get()
+                if item is None:
+                    break
+                frame_idx, t_capture, frame, result = item
+                start = time.perf_counter()
+                keep_going = self.assess(frame_idx, frame, result)
+                end = time.perf_counter()
+                self._record('assessment', frame_idx, end - start)
+                self._record('frame_to_alert', frame_idx, end - t_capture)
+                if keep_going is False:
+                    break
+        finally:
+            # Unblock and drain the worker threads
+            self._stop.set()
+            self.frames.close()
+            self.results.close()
+            for w in workers:
+                w.join()
+        if self._error is not None:
+            raise self._error
+
+    def report(self):
+        """Returns per-stage latency stats plus queue depth/drop counters."""
+        report = {name: s.summary() for name, s in self.stats.items()}
+        report['queues'] = {
+            'frames': {'max_depth': self.frames.max_depth, 'dropped': self.frames.dropped},
+            'results': {'max_depth': self.results.max_depth, 'dropped': self.results.dropped},
+        }
+        return report
+
+    def print_report(self):
+        report = self.report()
+        print("\n--- Pipeline Stage Stats ---")
+        for name in self.stats:
+            s = report[name]
+            if s['count']:
+                print(f"  {name:15s} n={s['count']:5d}  mean={s['mean_ms']:7.2f} ms  "
+                      f"p50={s['p50_ms']:7.2f} ms  p95={s['p95_ms']:7.2f} ms  max={s['max_ms']:7.2f} ms")
+        for name, q in report['queues'].items():
+            print(f"  queue {name:9s} max_depth={q['max_depth']}  dropped={q['dropped']}")
@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Batched detection across frames and camera streams.
+# Producers (e.g. left/right stereo capture threads) submit frames and get a
+# Future back. A worker thread gathers frames until the batch is full, the
+# oldest frame has waited max_latency_s or a producer flushes, runs ONE
+# detect_batch call of a detector_backends backend on the whole list and
+# scatters the per-frame detections back to each Future.
+
+BATCH_SIZE = 8
+MAX_LATENCY_S = 0.020
+_FLUSH = object() # Queue marker: run what is gathered without waiting for the deadline
+
+
+class BatchedDetector:
+    """Wraps a detector backend and batches frames submitted from any thread."""
+
+    def __init__(self, model, batch_size=BATCH_SIZE, max_latency_s=MAX_LATENCY_S, imgsz=None):
+        self.model = model
+        self.batch_size = batch_size
+        self.max_latency_s = max_latency_s
+        self.imgsz = imgsz
+        self._pending = queue.Queue()
+        self._closed = False
+        self.batches_run = 0
+        self.frames_run = 0
+        self._worker = threading.Thread(target=self._run, name='batched-inference', daemon=True)
+        self._worker.start()
+
+    def predict_batch(self, frames):
+        """Runs one forward pass on a list of frames; returns a list of detections arrays."""
+        results = self.model.detect_batch(list(frames), imgsz=self.imgsz)
+        self.batches_run += 1
+        self.frames_run += len(frames)
+        return results
+
+    def submit(self, source_id, frame_idx, frame):
+        """Queues a frame; the Future resolves to (source_id, frame_idx, detections)."""
+        if self._closed:
+            raise RuntimeError("BatchedDetector is closed")
+        future = Future()
+        self._pending.put((time.perf_counter(), source_id, frame_idx, frame, future))
+        return future
+
+    def flush(self):
+        """Runs the frames queued so far without waiting for the deadline (e.g. after both halves of a pair)."""
+        self._pending.put(_FLUSH)
+
+    def _gather(self):
+        """Blocks for the first frame, then collects more until full, flushed or the deadline passes."""
+        first = self._pending.get()
+        while first is _FLUSH:
+            first = self._pending.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[0] + self.max_latency_s
+        while len(batch) < self.batch_size:
+            try:
+                # Frames already waiting join the batch even past the deadline
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _FLUSH:
+                break
+            if item is None:
+                self._pending.put(None) # Re-post so the loop exits after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._gather()
+            if batch is None:
+                break
+            try:
+                results = self.predict_batch([item[3] for item in batch])
+            except Exception as e:
+                for item in batch:
+                    item[4].set_exception(e)
+                continue
+            # Scatter results back per source and frame index
+            for (_, source_id, frame_idx, _, future), result in zip(batch, results):
+                future.set_result((source_id, frame_idx, result))
+
+    def close(self):
+        """Stops the worker after pending frames are processed."""
+        if not self._closed:
+            self._closed = True
+            self._pending.put(None)
+            self._worker.join()
@@ -0,0 +1,43 @@
+# benchmark_backends.py
+# Measures model load, warm-up and steady-state latency of each detector backend on CPU.
+# Exports weights/best.pt to a dynamic-shape ONNX graph first if no .onnx file exists.
+
+import numpy as np
+import cv2
+import os
+
+from detector_backends import export_onnx, measure_backend, ort
+
+pt_path = 'weights/best.pt' if os.path.exists('weights/best.pt') else 'yolov8n.pt'
+onnx_path = os.path.splitext(pt_path)[0] + '.onnx'
+video_path = 'vidio1.mp4'
+num_frames = 50
+
+# --- Frames (video if available, otherwise random) ---
+frames = []
+if os.path.exists(video_path):
+    cap = cv2.VideoCapture(video_path)
+    while len(frames) < num_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+if not frames:
+    print(f"Video {video_path} not found, using random frames.")
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(num_frames)]
+
+backends = [('ultralytics', pt_path)]
+if ort is None:
+    print("onnxruntime not installed, skipping the ONNX backend.")
+else:
+    if not os.path.exists(onnx_path):
+        print(f"Exporting {pt_path} to ONNX...")
+        onnx_path = export_onnx(pt_path)
+    backends.append(('onnx', onnx_path))
+
+print(f"\n{'backend':12s} {'load (s)':>9s} {'warm-up (s)':>12s} {'mean (ms)':>10s} {'p50 (ms)':>9s} {'p95 (ms)':>9s}")
+for kind, path in backends:
+    r = measure_backend(kind, path, frames)
+    print(f"{kind:12s} {r['load_s']:9.2f} {r['warmup_s']:12.2f} {r['mean_ms']:10.1f} {r['p50_ms']:9.1f} {r['p95_ms']:9.1f}")
@@ -0,0 +1,56 @@
+# benchmark_batched_inference.py
+# Compares a per-frame detect loop with BatchedDetector on CPU (ultralytics backend).
+# Frames come from a video if it exists, otherwise random 1280x720 frames.
+
+import numpy as np
+import cv2
+import os
+import time
+
+from batched_inference import BatchedDetector
+from model_registry import get_backend
+
+MODEL_PATH = 'weights/best.pt' if os.path.exists('weights/best.pt') else 'yolov8n.pt'
+video_path = 'vidio1.mp4'
+num_frames = 64
+conf_threshold = 0.25
+batch_sizes = [1, 2, 4, 8, 16]
+max_latency_s = 0.050
+
+# --- Load frames once so decode time is not measured ---
+frames = []
+if os.path.exists(video_path):
+    cap = cv2.VideoCapture(video_path)
+    while len(frames) < num_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+if not frames:
+    print(f"Video {video_path} not found, using random frames.")
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(num_frames)]
+
+print(f"Model: {MODEL_PATH} | Frames: {len(frames)}")
+model = get_backend('ultralytics', MODEL_PATH, conf=conf_threshold)
+model.detect(frames[0]) # Warm-up
+
+# --- Baseline: one detect call per frame ---
+start = time.perf_counter()
+for frame in frames:
+    model.detect(frame)
+baseline_s = time.perf_counter() - start
+print(f"\nPer-frame loop: {len(frames) / baseline_s:6.2f} FPS ({baseline_s * 1000 / len(frames):.1f} ms/frame)")
+
+# --- Batched: two sources (left/right) submitting interleaved frames ---
+for batch_size in batch_sizes:
+    detector = BatchedDetector(model, batch_size=batch_size, max_latency_s=max_latency_s)
+    start = time.perf_counter()
+    futures = [detector.submit(i % 2, i // 2, frame) for i, frame in enumerate(frames)]
+    for f in futures:
+        f.result()
+    elapsed = time.perf_counter() - start
+    detector.close()
+    print(f"Batch size {batch_size:2d}: {len(frames) / elapsed:6.2f} FPS | "
+          f"batches={detector.batches_run:3d} | speedup x{baseline_s / elapsed:.2f}")
@@ -0,0 +1,236 @@
+# benchmark_hot_paths.py
+# Headless CPU micro-benchmarks for the numeric hot paths, from 1 to 1000 birds:
+#   triangulation      scalar triangulate_pos loop vs triangulate_batch
+#   collision          original stepping loop vs closed-form CPA (1-60 s horizons)
+#   transforms         spatialmath SE3 vs transform_points (one pose / one per point)
+#   box extraction     per-box Results access vs detections_from_results
+#   post-processing    one whole frame: centers -> triangulate -> world -> track -> CPA
+# Results are compared with BASELINE_PATH; a case slower than REGRESSION_FACTOR x
+# its baseline (SMALL_CASE_FACTOR x for sub-100 us cases) is flagged and the
+# script exits non-zero; a case that looks slow is timed again (RECHECKS)
+# before it counts. Set UPDATE_BASELINE = True (or delete the file) to record
+# new numbers after an intended change, on the same machine the comparisons
+# will run on.
+
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+from spatialmath import SE3
+
+from calibration import BASELINE_M, CX, CY, FOCAL_LENGTH_PX
+from cpa import predict_collision, solve_cpa
+from detections import CENTER, as_matrix, detections_from_array, detections_from_results
+from final_pipeline import triangulate_pos
+from tracker import TrackManager
+from transforms import transform_covariances, transform_points
+from triangulation import triangulate_batch, triangulation_covariance
+
+BASELINE_PATH = 'benchmark_hot_paths_baseline.json'
+UPDATE_BASELINE = False
+# Allowed slow-down vs baseline before a case is flagged. Best-of-repeats still
+# moves by up to ~1.35x between runs on a shared single-CPU VM.
+REGRESSION_FACTOR = 1.4
+NOISE_FLOOR_US = 10.0 # ...and by at least this much (timer noise on tiny cases)
+SMALL_CASE_US = 100.0 # Baselines below this are dominated by call overhead and cache state...
+SMALL_CASE_FACTOR = 1.75 # ...so they get this allowed slow-down instead
+REPEATS = 5 # Each timing loops for >= 0.2 s (timeit autorange); the best repeat is kept
+RECHECKS = 3 # A case that looks like a regression is timed again up to this many times...
+RECHECK_PAUSE_S = 1.0 # ...after this pause, so a burst of load from elsewhere can pass
+BIRD_COUNTS = [1, 10, 100, 1000]
+HORIZONS_S = [1.0, 10.0, 60.0]
+TIME_STEP = 1.0 / 30.0
+COLLISION_THRESHOLD_M = 100.0
+AIRCRAFT_POS = np.array([0.0, 0.0, 0.0])
+AIRCRAFT_VEL = np.array([70.0, 0.0, 0.0])
+POSTPROCESS_FRAMES = 30
+
+rng = np.random.default_rng(0)
+results = {}
+recorded = None
+if not UPDATE_BASELINE and os.path.exists(BASELINE_PATH):
+    with open(BASELINE_PATH) as f:
+        recorded = json.load(f)
+
+
+def is_regression(name, us):
+    """us against the recorded baseline of name."""
+    if recorded is None or name not in recorded['results']:
+        return False
+    base = recorded['results'][name]
+    allowed = SMALL_CASE_FACTOR if base < SMALL_CASE_US else REGRESSION_FACTOR
+    return us / base > allowed and us - base > NOISE_FLOOR_US
+
+
+def bench(name, fn):
+    """Records the best per-call time of fn in microseconds (after a warm-up call).
+
+    A slow-looking result is timed again before it counts: a burst of load
+    from elsewhere passes, a real regression does not.
+    """
+    fn() # First-call costs (lazy caches, allocator growth) stay out of the timings
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(REPEATS, number)) / number
+    for _ in range(RECHECKS):
+        if not is_regression(name, best * 1e6):
+            break
+        time.sleep(RECHECK_PAUSE_S)
+        best = min(best, min(timer.repeat(REPEATS, number)) / number)
+    results[name] = best * 1e6
+    print(f"  {name:42s} {best * 1e6:12.1f} us")
+    return best
+
+
+def step_collision(aircraft_pos, aircraft_vel, bird_pos, bird_vel, max_time, step, threshold):
+    """The original time-stepping check, kept here as the reference point."""
+    time_to_impact = np.inf
+    min_distance = np.inf
+    for t in np.arange(0, max_time, step):
+        distance = np.linalg.norm((aircraft_pos + aircraft_vel * t) - (bird_pos + bird_vel * t))
+        if distance < min_distance:
+            min_distance = distance
+        if distance < threshold:
+            return True, t, min_distance
+    return False, time_to_impact, min_distance
+
+
+def synthetic_boxes(n):
+    """(n, 6) [x1, y1, x2, y2, conf, cls] boxes inside a 1280x720 frame."""
+    xy = rng.uniform([0, 0], [1240, 690], (n, 2))
+    wh = rng.uniform(8, 40, (n, 2))
+    return np.column_stack([xy, xy + wh, rng.uniform(0.1, 1.0, n), np.zeros(n)]).astype(np.float32)
+
+
+def synthetic_birds(n):
+    """World positions 50-3000 m ahead and velocities roughly towards the aircraft."""
+    pos = np.column_stack([rng.uniform(50, 3000, n), rng.uniform(-300, 300, n), rng.uniform(-100, 100, n)])
+    vel = rng.normal([-40.0, 0.0, 0.0], 10.0, (n, 3))
+    return pos, vel
+
+
+print(f"Python {platform.python_version()} | NumPy {np.__version__} | {platform.machine()} "
+      f"| {os.cpu_count()} CPUs")
+
+# --- Triangulation ---
+print("\nTriangulation")
+disparity = FOCAL_LENGTH_PX * BASELINE_M / 100.0
+for n in BIRD_COUNTS:
+    uv_left = rng.uniform([0, 0], [1280, 720], (n, 2))
+    uv_right = uv_left - [disparity, 0.0]
+    pairs = list(zip(uv_left.tolist(), uv_right.tolist()))
+    bench(f"triangulate_pos loop n={n}",
+          lambda: [triangulate_pos(ul, vl, ur, vr, FOCAL_LENGTH_PX, BASELINE_M, CX, CY)
+                   for (ul, vl), (ur, vr) in pairs])
+    out = np.empty((n, 3))
+    bench(f"triangulate_batch n={n}",
+          lambda: triangulate_batch(uv_left, uv_right, FOCAL_LENGTH_PX, BASELINE_M, CX, CY, out=out))
+
+# --- Collision prediction ---
+print("\nCollision prediction (stepping at TIME_STEP vs closed form)")
+for horizon in HORIZONS_S:
+    for n in BIRD_COUNTS:
+        bird_pos, bird_vel = synthetic_birds(n)
+        if n <= 100 or horizon <= 1.0: # The stepping loop at 1000 birds takes seconds per call beyond 1 s
+            bench(f"stepping loop h={horizon:g}s n={n}",
+                  lambda: [step_collision(AIRCRAFT_POS, AIRCRAFT_VEL, p, v, horizon, TIME_STEP, COLLISION_THRESHOLD_M)
+                           for p, v in zip(bird_pos, bird_vel)])
+        if n <= 100:
+            bench(f"predict_collision loop h={horizon:g}s n={n}",
+                  lambda: [predict_collision(AIRCRAFT_POS, AIRCRAFT_VEL, p, v, horizon, TIME_STEP, COLLISION_THRESHOLD_M)
+                           for p, v in zip(bird_pos, bird_vel)])
+        bench(f"solve_cpa h={horizon:g}s n={n}",
+              lambda: solve_cpa(AIRCRAFT_POS, AIRCRAFT_VEL, bird_pos, bird_vel, horizon, COLLISION_THRESHOLD_M))
+
+# --- Point transforms ---
+print("\nCamera -> world transforms")
+T_WC_sm = SE3.Tz(1) * SE3.Ty(2) * SE3.Tx(5) * SE3.Rz(-np.pi / 2)
+T_WC = T_WC_sm.A
+for n in BIRD_COUNTS:
+    P_C = rng.uniform(-200, 200, (n, 3))
+    P_C_T = P_C.T.copy()
+    bench(f"SE3 * points n={n}", lambda: T_WC_sm * P_C_T)
+    bench(f"transform_points n={n}", lambda: transform_points(T_WC, P_C))
+    if n <= 100:
+        poses_sm = [SE3.Rand() for _ in range(n)]
+        bench(f"SE3 per-point poses n={n}", lambda: [p * pt for p, pt in zip(poses_sm, P_C)])
+        poses = np.stack([p.A for p in poses_sm])
+        bench(f"transform_points per-point poses n={n}", lambda: transform_points(poses, P_C))
+
+# --- Box extraction ---
+print("\nBox extraction")
+try:
+    import torch
+    from ultralytics.engine.results import Results
+except ImportError:
+    Results = None
+    print("  (ultralytics/torch not installed: timing detections_from_array on NumPy boxes only)")
+for n in BIRD_COUNTS:
+    data = synthetic_boxes(n)
+    bench(f"detections_from_array n={n}", lambda: detections_from_array(data))
+    if Results is not None:
+        result = Results(np.zeros((720, 1280, 3), dtype=np.uint8), path='', names={0: 'bird'},
+                         boxes=torch.from_numpy(data))
+        bench(f"per-box Results loop n={n}",
+              lambda: [(box.xywh[0].cpu().numpy(), float(box.conf[0]), int(box.cls[0])) for box in result.boxes])
+        bench(f"detections_from_results n={n}", lambda: detections_from_results(result))
+
+# --- End-to-end post-processing of one frame ---
+print(f"\nPer-frame post-processing (mean of {POSTPROCESS_FRAMES} consecutive frames, tracker state kept)")
+for n in BIRD_COUNTS:
+    # Birds at 50-200 m so every box triangulates; they drift a little between frames
+    P_C0 = np.column_stack([rng.uniform(-40, 40, n), rng.uniform(-20, 20, n), rng.uniform(50, 200, n)])
+    drift = rng.normal(0.0, 1.0, (n, 3))
+    frames = []
+    for f in range(POSTPROCESS_FRAMES):
+        P = P_C0 + drift * f
+        u = FOCAL_LENGTH_PX * P[:, 0] / P[:, 2] + CX
+        v = FOCAL_LENGTH_PX * P[:, 1] / P[:, 2] + CY
+        boxes = np.column_stack([u - 8, v - 5, u + 8, v + 5, np.full(n, 0.9), np.zeros(n)])
+        frames.append((detections_from_array(boxes), FOCAL_LENGTH_PX * BASELINE_M / P[:, 2]))
+
+    def postprocess():
+        tracker = TrackManager()
+        for dets, disp in frames:
+            tracker.predict(TIME_STEP)
+            uv_left = as_matrix(dets)[:, CENTER]
+            uv_right = uv_left.copy()
+            uv_right[:, 0] -= disp
+            P_C, valid = triangulate_batch(uv_left, uv_right, FOCAL_LENGTH_PX, BASELINE_M, CX, CY)
+            P_W = transform_points(T_WC, P_C[valid])
+            # Per-measurement noise, as final_pipeline passes it
+            R_C = triangulation_covariance(uv_left[valid], uv_right[valid], FOCAL_LENGTH_PX, BASELINE_M, CX, CY)
+            tracker.update(P_W, dets['cls'][valid].astype(int), transform_covariances(T_WC, R_C))
+            _, _, track_pos, track_vel = tracker.tracks()
+            if len(track_pos):
+                solve_cpa(AIRCRAFT_POS, AIRCRAFT_VEL, track_pos, track_vel, 10.0, COLLISION_THRESHOLD_M)
+
+    best = bench(f"postprocess {POSTPROCESS_FRAMES} frames n={n}", postprocess)
+    print(f"    -> {best / POSTPROCESS_FRAMES * 1000.0:.3f} ms/frame")
+
+# --- Baseline comparison ---
+if recorded is None:
+    with open(BASELINE_PATH, 'w') as f:
+        json.dump({'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                               'machine': platform.machine(), 'cpus': os.cpu_count()},
+                   'unit': 'us_per_call', 'results': results}, f, indent=2)
+    print(f"\nBaseline written to {BASELINE_PATH}")
+    sys.exit(0)
+
+baseline = recorded['results']
+print(f"\nComparison with {BASELINE_PATH} (flagged above {REGRESSION_FACTOR:.2f}x, "
+      f"{SMALL_CASE_FACTOR:.2f}x below {SMALL_CASE_US:.0f} us)")
+regressions = []
+for name, us in results.items():
+    if name not in baseline:
+        continue
+    flag = 'REGRESSION' if is_regression(name, us) else ''
+    if flag:
+        regressions.append(name)
+    print(f"  {name:42s} {baseline[name]:12.1f} -> {us:12.1f} us  {us / baseline[name]:5.2f}x {flag}")
+print(f"\n{len(regressions)} regressions out of {len(results)} cases")
+sys.exit(1 if regressions else 0)
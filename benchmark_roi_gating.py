@@ -0,0 +1,101 @@
+# benchmark_roi_gating.py
+# Full-frame detection on every frame vs ROI/sky-mask gating on CPU.
+# Reports effective FPS, how many frames were skipped or tiled, and the recall
+# cost: the share of full-frame detections that gating still finds (IoU >= 0.5).
+# Uses our videos if present, otherwise a synthetic sky clip with a passing bird.
+
+import numpy as np
+import cv2
+import os
+import time
+
+from detections import as_matrix, XYXY
+from model_registry import get_backend
+from roi_gating import RoiGate, detect_gated
+
+MODEL_PATH = 'weights/best.pt' if os.path.exists('weights/best.pt') else 'yolov8n.pt'
+video_paths = ['vidio1.mp4', 'vidio2.mp4']
+num_frames = 300
+conf_threshold = 0.25
+match_iou = 0.5
+
+
+def read_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def synthetic_sky(limit, shape=(720, 1280)):
+    """Blue sky gradient with sensor noise; a dark bird crosses during the middle third."""
+    rng = np.random.default_rng(0)
+    h, w = shape
+    sky = np.empty((h, w, 3), dtype=np.uint8)
+    sky[..., 0] = np.linspace(235, 200, h)[:, None]
+    sky[..., 1] = np.linspace(200, 160, h)[:, None]
+    sky[..., 2] = np.linspace(170, 120, h)[:, None]
+    frames = []
+    for i in range(limit):
+        frame = cv2.add(sky, rng.integers(0, 4, sky.shape, dtype=np.uint8))
+        if limit // 3 <= i < 2 * limit // 3:
+            x = int(100 + (i - limit // 3) * (w - 200) / (limit // 3))
+            cv2.ellipse(frame, (x, h // 3), (18, 6), 0, 0, 360, (40, 40, 40), -1)
+        frames.append(frame)
+    return frames
+
+
+def box_recall(reference, gated):
+    """Fraction of reference boxes matched by a gated box of the same class."""
+    found = total = 0
+    for ref, got in zip(reference, gated):
+        total += len(ref)
+        if not len(ref) or not len(got):
+            continue
+        a = as_matrix(ref)[:, XYXY]
+        b = as_matrix(got)[:, XYXY]
+        x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+        y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+        x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+        y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+        area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        iou = inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+        same_class = ref['cls'][:, None] == got['cls'][None, :]
+        found += int(((iou >= match_iou) & same_class).any(axis=1).sum())
+    return found / total if total else 1.0
+
+
+clips = [(p, read_frames(p, num_frames)) for p in video_paths if os.path.exists(p)]
+if not clips:
+    print("No videos found, using a synthetic sky clip.")
+    clips = [('synthetic sky', synthetic_sky(num_frames))]
+
+backend = get_backend('ultralytics', MODEL_PATH, conf=conf_threshold)
+backend.warmup(2)
+
+print(f"\n{'clip':16s} {'frames':>6s} {'full FPS':>9s} {'gated FPS':>10s} {'speed-up':>9s} "
+      f"{'skipped':>8s} {'tiled':>6s} {'full':>5s} {'tiles/fr':>9s} {'recall':>7s}")
+for name, frames in clips:
+    # --- Baseline: full-frame detection on every frame ---
+    start = time.perf_counter()
+    reference = [backend.detect(frame) for frame in frames]
+    full_s = time.perf_counter() - start
+
+    # --- Gated: mask, tiles and periodic full-frame refresh ---
+    gate = RoiGate()
+    start = time.perf_counter()
+    gated = [detect_gated(backend, gate, frame) for frame in frames]
+    gated_s = time.perf_counter() - start
+
+    n = len(frames)
+    s = gate.stats
+    print(f"{os.path.basename(name):16s} {n:6d} {n / full_s:9.1f} {n / gated_s:10.1f} {full_s / gated_s:8.1f}x "
+          f"{s['skipped'] / n:8.0%} {s['roi'] / n:6.0%} {s['full'] / n:5.0%} "
+          f"{s['tiles'] / max(s['roi'], 1):9.1f} {box_recall(reference, gated):7.1%}")
@@ -0,0 +1,134 @@
+import cv2
+import numpy as np
+
+# Stereo camera calibration and rectification.
+# A calibration file (cv2.FileStorage YAML/XML/JSON, see stereo_calibration.yaml)
+# holds each camera's intrinsics K1/K2 and distortion D1/D2, the right camera's
+# pose relative to the left (R, T: x_right = R x_left + T, T in meters) and the
+# image size. cv2.stereoRectify turns that into a virtual parallel rig, so
+# triangulation.py's Z = f * B / disparity holds with
+#   f = P1[0, 0], B = -P2[0, 3] / P2[0, 0], (cx, cy) = P1[:2, 2]
+# and the triangulated "camera frame" is the rectified left camera.
+# Only detected box centers need to be in rectified pixels: rectify_points
+# undistorts them in one cv2.undistortPoints call per camera. Full-image remap
+# tables (cv2.initUndistortRectifyMap) are built on first use, for viewers or
+# dense matching that need whole rectified frames.
+
+# Ideal rig used when no calibration file is given (1280x720 cameras)
+IMAGE_SIZE = (1280, 720)
+FOCAL_LENGTH_PX = 700.0
+BASELINE_M = 0.5
+CX = IMAGE_SIZE[0] / 2.0
+CY = IMAGE_SIZE[1] / 2.0
+RECTIFY_ALPHA = 0.0 # 0 = rectified images keep only valid pixels, 1 = keep every source pixel
+MAP_TYPE = cv2.CV_16SC2 # Fixed-point remap tables: the fastest cv2.remap path
+
+
+class StereoCalibration:
+    """Calibrated stereo rig and its rectification.
+
+    camera arguments are 0 (left) or 1 (right). Without distortion, rotation or
+    vertical offset the rig is already rectified and every mapping is exact
+    pinhole math (no OpenCV calls).
+    """
+
+    def __init__(self, K1, D1, K2, D2, R, T, image_size, alpha=RECTIFY_ALPHA):
+        self.K = (np.asarray(K1, dtype=np.float64), np.asarray(K2, dtype=np.float64))
+        self.D = (np.asarray(D1, dtype=np.float64).ravel(), np.asarray(D2, dtype=np.float64).ravel())
+        self.R = np.asarray(R, dtype=np.float64)
+        self.T = np.asarray(T, dtype=np.float64).reshape(3, 1)
+        self.image_size = tuple(int(s) for s in image_size)
+
+        self.parallel = (not self.D[0].any() and not self.D[1].any() and np.allclose(self.R, np.eye(3))
+                         and not self.T[1:].any() and np.allclose(self.K[0], self.K[1]))
+        if self.parallel:
+            # stereoRectify would only add round-off here
+            P1 = np.hstack([self.K[0], np.zeros((3, 1))])
+            P2 = P1.copy()
+            P2[0, 3] = self.K[0][0, 0] * self.T[0, 0]
+            self.rect = (np.eye(3), np.eye(3))
+        else:
+            R1, R2, P1, P2, _, _, _ = cv2.stereoRectify(self.K[0], self.D[0], self.K[1], self.D[1], self.image_size,
+                                                        self.R, self.T, flags=cv2.CALIB_ZERO_DISPARITY, alpha=alpha)
+            self.rect = (R1, R2)
+        self.P = (P1, P2)
+        self.focal_length = P1[0, 0]
+        self.baseline = -P2[0, 3] / P2[0, 0]
+        self.cx = P1[0, 2]
+        self.cy = P1[1, 2]
+
+        # Rectified camera k -> original camera k, for projecting tracks back into the raw images
+        self._rvec = tuple(cv2.Rodrigues(np.ascontiguousarray(r.T))[0] for r in self.rect)
+        self._tvec = tuple(r.T @ np.linalg.solve(p[:, :3], p[:, 3]) for r, p in zip(self.rect, self.P))
+        self._maps = [None, None]
+
+    @classmethod
+    def ideal(cls, f=FOCAL_LENGTH_PX, B=BASELINE_M, cx=CX, cy=CY, image_size=IMAGE_SIZE):
+        """Parallel, distortion-free cameras with identical intrinsics."""
+        K = np.array([[f, 0.0, cx], [0.0, f, cy], [0.0, 0.0, 1.0]])
+        return cls(K, np.zeros(5), K, np.zeros(5), np.eye(3), [-B, 0.0, 0.0], image_size)
+
+    def rectify_points(self, uv, camera=0):
+        """(N, 2) raw pixel coordinates -> (N, 2) rectified pixel coordinates."""
+        uv = np.asarray(uv, dtype=np.float64)
+        if self.parallel or len(uv) == 0:
+            return uv
+        pts = cv2.undistortPoints(np.ascontiguousarray(uv[:, :2]).reshape(-1, 1, 2), self.K[camera], self.D[camera],
+                                  R=self.rect[camera], P=self.P[camera])
+        return pts.reshape(-1, 2)
+
+    def project(self, points, camera=0):
+        """(N, 3) points in the rectified left camera frame -> (N, 2) raw pixels of the camera.
+
+        Points must be in front of the rig (Z > 0).
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if self.parallel or len(points) == 0:
+            P = self.P[camera]
+            uvw = points @ P[:, :3].T + P[:, 3]
+            return uvw[:, :2] / uvw[:, 2:]
+        uv, _ = cv2.projectPoints(points, self._rvec[camera], self._tvec[camera], self.K[camera], self.D[camera])
+        return uv.reshape(-1, 2)
+
+    def remap_tables(self, camera=0):
+        """(map1, map2) for cv2.remap, built on the first call and reused after."""
+        if self._maps[camera] is None:
+            self._maps[camera] = cv2.initUndistortRectifyMap(self.K[camera], self.D[camera], self.rect[camera],
+                                                             self.P[camera], self.image_size, MAP_TYPE)
+        return self._maps[camera]
+
+    def rectify_image(self, image, camera=0, interpolation=cv2.INTER_LINEAR):
+        """Whole rectified frame; prefer rectify_points when only detections are needed."""
+        if self.parallel:
+            return image
+        map1, map2 = self.remap_tables(camera)
+        return cv2.remap(image, map1, map2, interpolation)
+
+    def save(self, path):
+        fs = cv2.FileStorage(path, cv2.FILE_STORAGE_WRITE)
+        fs.write('image_width', self.image_size[0])
+        fs.write('image_height', self.image_size[1])
+        for name, value in (('K1', self.K[0]), ('D1', self.D[0][None]), ('K2', self.K[1]), ('D2', self.D[1][None]),
+                            ('R', self.R), ('T', self.T)):
+            fs.write(name, value)
+        fs.release()
+
+
+def load_calibration(path, alpha=RECTIFY_ALPHA):
+    """Reads a StereoCalibration from a cv2.FileStorage file (see StereoCalibration.save)."""
+    fs = cv2.FileStorage(path, cv2.FILE_STORAGE_READ)
+    if not fs.isOpened():
+        raise FileNotFoundError(f"Cannot open calibration file {path}")
+    try:
+        values = {}
+        for name in ('K1', 'D1', 'K2', 'D2', 'R', 'T'):
+            node = fs.getNode(name)
+            if node.empty():
+                raise ValueError(f"Calibration file {path} has no {name}")
+            values[name] = node.mat()
+        image_size = (int(fs.getNode('image_width').real()), int(fs.getNode('image_height').real()))
+    finally:
+        fs.release()
+    if 0 in image_size:
+        raise ValueError(f"Calibration file {path} has no image_width/image_height")
+    return StereoCalibration(image_size=image_size, alpha=alpha, **values)
@@ -0,0 +1,313 @@
+import hashlib
+import os
+import shutil
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import yaml
+
+from generate_synthetic_data import bird_types, distances, weather_conditions
+
+# Label indexing and train/val splitting for the YOLO dataset.
+# Every label file is parsed once into a columnar box table
+#   file_id (int32), cls (int16), xywh (float32, normalized YOLO centre/size)
+# stored next to per-file arrays (stem, mtime, is_voc). The table is cached as
+# an .npz under INDEX_CACHE_DIR (never inside the source label folder) and on
+# the next run only files whose mtime changed are re-parsed.
+# Pascal VOC <annotation> files (even when saved as .txt) become YOLO boxes.
+
+INDEX_CACHE_DIR = os.environ.get('EAGLE_EYE_INDEX_CACHE', 'index_cache')
+PARALLEL_MIN_FILES = 2000 # Below this, a process pool costs more than it saves
+CHUNK_SIZE = 500
+NON_LABEL_FILES = {'classes.txt'}
+
+
+def load_class_names(data_yaml='data.yaml'):
+    with open(data_yaml) as f:
+        return list(yaml.safe_load(f)['names'])
+
+
+#  PARSING ---
+
+def parse_voc(text, class_names):
+    """Pascal VOC XML -> list of (cls, cx, cy, w, h) normalized by the image size."""
+    root = ET.fromstring(text)
+    width = float(root.findtext('size/width', '0'))
+    height = float(root.findtext('size/height', '0'))
+    if width <= 0 or height <= 0:
+        raise ValueError("VOC annotation has no image size")
+    boxes = []
+    for obj in root.iter('object'):
+        name = obj.findtext('name', '').strip()
+        if name not in class_names:
+            continue
+        bb = obj.find('bndbox')
+        x1, y1, x2, y2 = (float(bb.findtext(k)) for k in ('xmin', 'ymin', 'xmax', 'ymax'))
+        boxes.append((class_names.index(name), (x1 + x2) / 2.0 / width, (y1 + y2) / 2.0 / height,
+                      (x2 - x1) / width, (y2 - y1) / height))
+    return boxes
+
+
+def parse_yolo(text):
+    """YOLO txt -> list of (cls, cx, cy, w, h); lines that are not 5 numbers are skipped."""
+    boxes = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) != 5:
+            continue
+        try:
+            boxes.append((int(parts[0]),) + tuple(float(p) for p in parts[1:]))
+        except ValueError:
+            continue
+    return boxes
+
+
+def parse_label_file(path, class_names):
+    """Returns (boxes, is_voc) for one label file."""
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith('<'):
+        return parse_voc(text, class_names), True
+    return parse_yolo(text), False
+
+
+def _parse_chunk(args):
+    paths, class_names = args
+    out = []
+    for path in paths:
+        try:
+            out.append(parse_label_file(path, class_names))
+        except (ET.ParseError, ValueError) as e:
+            print(f"Warning: could not parse {path}: {e}")
+            out.append(([], False))
+    return out
+
+
+def parse_files(paths, class_names, workers=None):
+    """Parses label files, over a process pool when there are many of them."""
+    if len(paths) < PARALLEL_MIN_FILES:
+        return _parse_chunk((paths, class_names))
+    chunks = [(paths[i:i + CHUNK_SIZE], class_names) for i in range(0, len(paths), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [item for chunk in pool.map(_parse_chunk, chunks) for item in chunk]
+
+
+#  INDEX ---
+
+class LabelIndex:
+    """Columnar box table for a folder of label files."""
+
+    def __init__(self, stems, mtimes, is_voc, box_file, box_cls, box_xywh):
+        self.stems = stems
+        self.mtimes = mtimes
+        self.is_voc = is_voc
+        self.box_file = box_file
+        self.box_cls = box_cls
+        self.box_xywh = box_xywh
+        self._row = {stem: i for i, stem in enumerate(stems.tolist())}
+
+    def __len__(self):
+        return len(self.stems)
+
+    def file_id(self, stem):
+        return self._row.get(stem, -1)
+
+    def boxes(self, file_id):
+        """(cls, xywh) arrays for one file."""
+        lo, hi = np.searchsorted(self.box_file, [file_id, file_id + 1])
+        return self.box_cls[lo:hi], self.box_xywh[lo:hi]
+
+    def box_counts(self):
+        return np.bincount(self.box_file, minlength=len(self.stems))
+
+    def save(self, path):
+        np.savez(path, stems=self.stems, mtimes=self.mtimes, is_voc=self.is_voc,
+                 box_file=self.box_file, box_cls=self.box_cls, box_xywh=self.box_xywh)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(*(data[k] for k in ('stems', 'mtimes', 'is_voc', 'box_file', 'box_cls', 'box_xywh')))
+
+
+def _scan_labels(label_folder):
+    entries = {}
+    with os.scandir(label_folder) as it:
+        for entry in it:
+            if entry.name.endswith('.txt') and entry.name not in NON_LABEL_FILES and entry.is_file():
+                entries[entry.name[:-4]] = entry.stat().st_mtime
+    return entries
+
+
+def index_cache_path(label_folder, cache_dir=INDEX_CACHE_DIR):
+    """One cache file per label folder, named after the folder and a hash of its absolute path."""
+    folder = os.path.abspath(label_folder)
+    digest = hashlib.blake2b(folder.encode(), digest_size=6).hexdigest()
+    return os.path.join(cache_dir, f"{os.path.basename(folder)}_{digest}.npz")
+
+
+def build_index(label_folder, class_names, cache_path=None, workers=None, cache_dir=INDEX_CACHE_DIR):
+    """Loads the cached index and re-parses only new or modified label files."""
+    cache_path = cache_path or index_cache_path(label_folder, cache_dir)
+    on_disk = _scan_labels(label_folder)
+    stems = sorted(on_disk)
+    mtimes = np.array([on_disk[s] for s in stems], dtype=np.float64)
+
+    cached = LabelIndex.load(cache_path) if os.path.exists(cache_path) else None
+    reuse = np.zeros(len(stems), dtype=bool)
+    if cached is not None:
+        old_ids = np.array([cached.file_id(s) for s in stems], dtype=np.int64)
+        reuse = old_ids >= 0
+        reuse[reuse] = cached.mtimes[old_ids[reuse]] == mtimes[reuse]
+
+    stale = np.nonzero(~reuse)[0]
+    parsed = parse_files([os.path.join(label_folder, stems[i] + '.txt') for i in stale], class_names, workers)
+
+    # Assemble per-file box lists: reused rows straight from the cached columns
+    is_voc = np.zeros(len(stems), dtype=bool)
+    file_parts, cls_parts, xywh_parts = [], [], []
+    if reuse.any():
+        new_ids = np.nonzero(reuse)[0]
+        remap = np.full(len(cached), -1, dtype=np.int64)
+        remap[old_ids[reuse]] = new_ids
+        keep = remap[cached.box_file] >= 0
+        file_parts.append(remap[cached.box_file[keep]])
+        cls_parts.append(cached.box_cls[keep])
+        xywh_parts.append(cached.box_xywh[keep])
+        is_voc[new_ids] = cached.is_voc[old_ids[reuse]]
+    for i, (boxes, voc) in zip(stale, parsed):
+        is_voc[i] = voc
+        if boxes:
+            arr = np.asarray(boxes, dtype=np.float64)
+            file_parts.append(np.full(len(arr), i, dtype=np.int64))
+            cls_parts.append(arr[:, 0])
+            xywh_parts.append(arr[:, 1:])
+
+    box_file = np.concatenate(file_parts) if file_parts else np.zeros(0, dtype=np.int64)
+    order = np.argsort(box_file, kind='stable')
+    index = LabelIndex(
+        np.array(stems, dtype=str), mtimes, is_voc,
+        box_file[order].astype(np.int32),
+        (np.concatenate(cls_parts) if cls_parts else np.zeros(0))[order].astype(np.int16),
+        (np.concatenate(xywh_parts) if xywh_parts else np.zeros((0, 4)))[order].astype(np.float32),
+    )
+    if cached is None or len(stale) or len(cached) != len(index):
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        index.save(cache_path)
+    print(f"Label index: {len(index)} files, {len(index.box_file)} boxes ({len(stale)} parsed, "
+          f"{int(reuse.sum())} from cache, {int(is_voc.sum())} VOC)")
+    return index
+
+
+def write_yolo_label(path, cls, xywh):
+    with open(path, 'w') as f:
+        f.writelines(f"{c} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n" for c, (x, y, w, h) in zip(cls.tolist(), xywh.tolist()))
+
+
+#  SPLITTING ---
+
+def _token(value):
+    return value.replace(" ", "_")
+
+
+def stratum_of(stem):
+    """'bird|weather|distance' parsed from a synthetic image name ('other' if it does not match)."""
+    bird = next((b for b in bird_types if stem.startswith(_token(b) + "_")), None)
+    weather = next((w for w in weather_conditions if f"_{_token(w)}_" in stem), None)
+    dist = next((d for d in distances if f"_{_token(d)}_" in stem), None)
+    if bird is None or weather is None or dist is None:
+        return 'other'
+    return f"{bird}|{weather}|{dist}"
+
+
+def _stable_rank(stem, seed):
+    digest = hashlib.blake2b(f"{seed}:{stem}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def split_files(stems, train_ratio=0.8, seed=0):
+    """Deterministic stratified split; returns (train_stems, val_stems).
+
+    Within each stratum files are ordered by a seeded hash of their name, so a
+    file keeps its side of the split as the dataset grows.
+    """
+    strata = {}
+    for stem in stems:
+        strata.setdefault(stratum_of(stem), []).append(stem)
+    train, val = [], []
+    for members in strata.values():
+        members.sort(key=lambda s: _stable_rank(s, seed))
+        n_train = int(round(len(members) * train_ratio))
+        if len(members) > 1:
+            n_train = min(max(n_train, 1), len(members) - 1) # Every stratum on both sides
+        train.extend(members[:n_train])
+        val.extend(members[n_train:])
+    return sorted(train), sorted(val)
+
+
+#  MATERIALIZING ---
+
+def link_file(src, dst, mode='hardlink'):
+    """Hardlinks (or symlinks) src to dst; falls back to symlink then copy across filesystems."""
+    if os.path.lexists(dst):
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return
+        os.remove(dst)
+    if mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            mode = 'symlink'
+    if mode == 'symlink':
+        try:
+            os.symlink(os.path.abspath(src), dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def _prune(folder, keep):
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.name not in keep:
+                os.remove(entry.path)
+
+
+def materialize_split(split_stems, image_names, index, label_folder, output_base_folder, mode='hardlink'):
+    """Links images and labels into output/{images,labels}/{split}/.
+
+    VOC labels are written out as YOLO txt. Files left over from a previous
+    split are removed, so reruns converge on the current split.
+    """
+    missing = 0
+    for split, stems in split_stems.items():
+        img_dir = os.path.join(output_base_folder, "images", split)
+        lbl_dir = os.path.join(output_base_folder, "labels", split)
+        os.makedirs(img_dir, exist_ok=True)
+        os.makedirs(lbl_dir, exist_ok=True)
+
+        kept_images, kept_labels = set(), set()
+        for stem in stems:
+            image_path = image_names[stem]
+            link_file(image_path, os.path.join(img_dir, os.path.basename(image_path)), mode)
+            kept_images.add(os.path.basename(image_path))
+
+            file_id = index.file_id(stem)
+            if file_id < 0:
+                missing += 1
+                continue
+            label_name = stem + ".txt"
+            if index.is_voc[file_id]:
+                label_path = os.path.join(lbl_dir, label_name)
+                if os.path.lexists(label_path):
+                    os.remove(label_path) # Never write through an old link into the source
+                write_yolo_label(label_path, *index.boxes(file_id))
+            else:
+                link_file(os.path.join(label_folder, label_name), os.path.join(lbl_dir, label_name), mode)
+            kept_labels.add(label_name)
+        _prune(img_dir, kept_images)
+        _prune(lbl_dir, kept_labels)
+    return missing
@@ -1,10 +1,14 @@
 import cv2
-from ultralytics import YOLO
 import os
 
+from async_pipeline import BLOCK, PipelineRunner
+from detections import detections_from_results, draw_detections
+from frame_source import FrameSource
+from model_registry import get_yolo
 
-# Load a pre-trained YOLOv8n model
-model = YOLO('yolov8n.pt')
+
+# Pre-trained YOLOv8n model (loaded once the video is open)
+model_path = 'yolov8n.pt'
 
 video_path = 'vidio1.mp4' 
 
@@ -18,61 +22,52 @@ print(f"Opening video file: {video_path}")
 if not os.path.exists(video_path):
     print(f"Error: Video file not found at {video_path}")
 else:
-    # Open the video file using OpenCV
-    cap = cv2.VideoCapture(video_path)
+    # Open the video file (decoded on a background thread into reused buffers)
+    source = FrameSource(video_path, hold=12)
 
     # Check if video opened successfully
-    if not cap.isOpened():
+    if not source.isOpened():
         print(f"Error: Could not open video file {video_path}")
     else:
+        model = get_yolo(model_path)
         print("Video opened successfully. Starting detection...")
         print("Press 'q' on the display window to quit.")
 
-        # Loop through the video frames
-        while True:
-            ret, frame = cap.read()
-
-            if not ret:
+        # --- Stage functions (capture and inference run on background threads) ---
+        def capture():
+            item = source.read()
+            if item is None:
                 print("End of video reached or error reading frame.")
-                break
+                return None
+            return item[0]
 
+        def infer(frame):
             # Run YOLOv8 inference on the frame
             results = model.predict(source=frame, conf=conf_threshold, verbose=False) 
+            # All boxes as one structured array (single device-to-host copy)
+            return detections_from_results(results[0])
 
-            result = results[0]
-
-            # Iterate through detected boxes
-            for box in result.boxes:
-                # Get coordinates (xyxy format: top-left x, top-left y, bottom-right x, bottom-right y)
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                # Get confidence score
-                conf = float(box.conf[0])
-                # Get class ID
-                cls_id = int(box.cls[0])
-                # Get class name from model's names dictionary
-                class_name = model.names[cls_id]
-
-                # Draw the bounding box rectangle on the frame
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color=(0, 255, 0), thickness=2) # Green box
-
-                # Create the label text (Class Name + Confidence)
-                label = f"{class_name} {conf:.2f}"
-
-                # Put the label text above the bounding box
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-            
+        def show(frame_idx, frame, dets):
+            # Draw every bounding box with its "class confidence" label
+            draw_detections(frame, dets, model.names)
 
             # Display the resulting frame in a window
             cv2.imshow('YOLOv8 Live Detection', frame)
 
             # Wait for 1 millisecond and check if the 'q' key is pressed
-            # If 'q' is pressed, break the loop
+            # If 'q' is pressed, stop the pipeline
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 print("'q' pressed, stopping detection.")
-                break
+                return False
+            return True
+
+        # Decode, inference and display overlap; backpressure keeps every frame
+        runner = PipelineRunner(capture, infer, show, policy=BLOCK)
+        runner.run()
+        runner.print_report()
 
         # Release the video capture object and close display windows
-        cap.release()
+        source.release()
         cv2.destroyAllWindows()
         print("Video closed and resources released.")
 
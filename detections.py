@@ -0,0 +1,53 @@
+import numpy as np
+import cv2
+
+# One contiguous structured array per frame instead of per-box tensor access.
+# All fields are float32, so the same memory is also available as a plain
+# (N, 10) matrix through as_matrix() for vectorized math (no copies).
+
+DETECTION_FIELDS = ('x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'w', 'h', 'conf', 'cls')
+DETECTION_DTYPE = np.dtype([(name, np.float32) for name in DETECTION_FIELDS])
+
+# Column slices into as_matrix()
+XYXY = slice(0, 4)
+XYWH = slice(4, 8)
+CENTER = slice(4, 6)
+
+
+def empty_detections(n=0):
+    return np.zeros(n, dtype=DETECTION_DTYPE)
+
+
+def as_matrix(dets):
+    """Returns an (N, 10) float32 view of a detections array."""
+    return dets.view(np.float32).reshape(len(dets), len(DETECTION_FIELDS))
+
+
+def detections_from_array(data):
+    """Builds detections from an (N, 6+) [x1, y1, x2, y2, ..., conf, cls] array."""
+    data = np.asarray(data, dtype=np.float32)
+    dets = empty_detections(len(data))
+    m = as_matrix(dets)
+    m[:, XYXY] = data[:, :4]
+    m[:, 4:6] = (data[:, 0:2] + data[:, 2:4]) * 0.5
+    m[:, 6:8] = data[:, 2:4] - data[:, 0:2]
+    m[:, 8] = data[:, -2] # conf (data may carry a track id column before it)
+    m[:, 9] = data[:, -1] # cls
+    return dets
+
+
+def detections_from_results(result):
+    """Converts an ultralytics Results object with ONE device-to-host transfer."""
+    if result.boxes is None:
+        return empty_detections()
+    return detections_from_array(result.boxes.data.cpu().numpy())
+
+
+def draw_detections(frame, dets, names, color=(0, 255, 0)):
+    """Draws boxes and 'class conf' labels for every detection."""
+    boxes = as_matrix(dets)[:, XYXY].astype(np.int32)
+    for (x1, y1, x2, y2), conf, cls in zip(boxes.tolist(), dets['conf'].tolist(), dets['cls'].tolist()):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color=color, thickness=2)
+        label = f"{names[int(cls)]} {conf:.2f}"
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+    return frame
@@ -0,0 +1,266 @@
+import ast
+import numpy as np
+import cv2
+import time
+from abc import ABC, abstractmethod
+
+from detections import detections_from_array, detections_from_results
+from model_registry import get_yolo
+
+try:
+    import onnxruntime as ort
+except ImportError: # ONNX Runtime is optional, only needed for the 'onnx' backend
+    ort = None
+
+# Pluggable detector backends. Every backend returns detections for a frame as
+# a detections.DETECTION_DTYPE array in original pixel coordinates, so the
+# rest of the pipeline does not care which one is used.
+
+IMGSZ = 640
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.45
+MAX_NMS = 1000 # Highest-scoring candidates that enter the (N, N) IoU matrix
+MAX_DET = 300  # Detections kept per image after NMS
+PAD_VALUE = 114
+
+
+#  PRE/POST-PROCESSING ---
+
+def letterbox(frame, out, pad_value=PAD_VALUE):
+    """Resizes frame into the preallocated (S, S, 3) buffer keeping aspect ratio.
+
+    Returns (ratio, pad_x, pad_y) needed to map boxes back to the frame.
+    """
+    h, w = frame.shape[:2]
+    size = out.shape[0]
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x = (size - new_w) // 2
+    pad_y = (size - new_h) // 2
+
+    out[...] = pad_value
+    out[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return ratio, pad_x, pad_y
+
+
+def box_intersections(boxes):
+    """(N, N) pairwise intersection areas and (N,) areas of x1, y1, x2, y2 boxes."""
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    x1 = np.maximum(boxes[:, None, 0], boxes[None, :, 0])
+    y1 = np.maximum(boxes[:, None, 1], boxes[None, :, 1])
+    x2 = np.minimum(boxes[:, None, 2], boxes[None, :, 2])
+    y2 = np.minimum(boxes[:, None, 3], boxes[None, :, 3])
+    return np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None), areas
+
+
+def nms(boxes, scores, iou_threshold=IOU_THRESHOLD, class_ids=None, max_nms=MAX_NMS, max_det=MAX_DET):
+    """Greedy NMS with vectorized IoU; returns at most max_det kept indices sorted by score.
+
+    With class_ids, boxes are offset per class so classes never suppress each other.
+    Only the max_nms highest-scoring boxes are considered (a low confidence
+    threshold can pass thousands of anchors, and the IoU matrix is quadratic).
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.intp)
+    boxes = np.asarray(boxes, dtype=np.float32)
+    if class_ids is not None:
+        boxes = boxes + (np.asarray(class_ids, dtype=np.float32) * (boxes.max() + 1.0))[:, None]
+
+    order = np.argsort(-np.asarray(scores), kind='stable')[:max_nms]
+    boxes = boxes[order]
+
+    # Pairwise IoU of all candidates at once
+    inter, areas = box_intersections(boxes)
+    iou = inter / (areas[:, None] + areas[None, :] - inter + 1e-9)
+
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if suppressed[i]:
+            continue
+        suppressed[i + 1:] |= iou[i, i + 1:] > iou_threshold
+    return order[~suppressed][:max_det]
+
+
+def decode_yolov8(output, conf_threshold=CONF_THRESHOLD, iou_threshold=IOU_THRESHOLD):
+    """Decodes a raw (1, 4 + nc, A) YOLOv8 head into (N, 6) letterbox-space detections."""
+    pred = output[0].T                          # (A, 4 + nc)
+    class_scores = pred[:, 4:]
+    cls = np.argmax(class_scores, axis=1)
+    conf = class_scores[np.arange(len(cls)), cls]
+    keep = conf > conf_threshold
+    pred, cls, conf = pred[keep], cls[keep], conf[keep]
+
+    xyxy = np.empty((len(pred), 4), dtype=np.float32)
+    xyxy[:, :2] = pred[:, :2] - pred[:, 2:4] / 2.0
+    xyxy[:, 2:] = pred[:, :2] + pred[:, 2:4] / 2.0
+
+    kept = nms(xyxy, conf, iou_threshold, cls)
+    dets = np.empty((len(kept), 6), dtype=np.float32)
+    dets[:, :4] = xyxy[kept]
+    dets[:, 4] = conf[kept]
+    dets[:, 5] = cls[kept]
+    return dets
+
+
+#  BACKENDS ---
+
+class DetectorBackend(ABC):
+    """Common interface: load(), warmup(), detect(frame), detect_batch(frames).
+
+    Subclasses implement load (returning self) and detect; detect_batch and
+    warmup default to per-frame detect calls.
+    """
+
+    name = 'base'
+    resizable = False # detect_batch honours its imgsz (smaller inputs cost less)
+
+    def __init__(self, model_path, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD):
+        self.model_path = model_path
+        self.conf = conf
+        self.iou = iou
+        self.names = {0: 'bird'}
+
+    @abstractmethod
+    def load(self):
+        """Creates the model or session; returns self."""
+
+    @abstractmethod
+    def detect(self, frame):
+        """Detections for one BGR frame, in its pixel coordinates."""
+
+    def detect_batch(self, frames, imgsz=None):
+        """imgsz is a hint for resizable backends (e.g. small ROI crops); fixed-size graphs ignore it."""
+        return [self.detect(frame) for frame in frames]
+
+    def warmup(self, runs=3, shape=(720, 1280, 3)):
+        dummy = np.zeros(shape, dtype=np.uint8)
+        for _ in range(runs):
+            self.detect(dummy)
+
+
+class UltralyticsBackend(DetectorBackend):
+    """Current eager PyTorch path through ultralytics.YOLO."""
+
+    name = 'ultralytics'
+    resizable = True
+
+    def load(self):
+        self.model = get_yolo(self.model_path) # Shared with any other user of this weights file
+        self.names = self.model.names
+        return self
+
+    def detect_batch(self, frames, imgsz=None):
+        size = {} if imgsz is None else {'imgsz': imgsz}
+        results = self.model.predict(source=list(frames), conf=self.conf, iou=self.iou, verbose=False, **size)
+        return [detections_from_results(r) for r in results]
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+
+class OnnxBackend(DetectorBackend):
+    """Exported graph on ONNX Runtime (CPU).
+
+    A dynamic-shape graph (export_onnx's default) runs at the imgsz asked for,
+    so the light tier and small crops are cheaper; a fixed-shape graph always
+    runs at its own size and reports resizable = False.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_path, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD, imgsz=IMGSZ, names=None):
+        super().__init__(model_path, conf, iou)
+        self.imgsz = imgsz
+        if names is not None:
+            self.names = names
+        self._buffers = {} # Input side -> reused letterboxed BGR image and NCHW float blob
+
+    def load(self):
+        if ort is None:
+            raise ImportError("onnxruntime is required for the ONNX backend (pip install onnxruntime)")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        graph_input = self.session.get_inputs()[0]
+        self.input_name = graph_input.name
+        # Symbolic (str) or unknown (None) spatial dims mean the graph takes any size
+        height, width = graph_input.shape[2:]
+        self.resizable = not (isinstance(height, int) and isinstance(width, int))
+        if not self.resizable:
+            self.imgsz = height
+        # ultralytics exports store the class names in the graph metadata
+        meta = self.session.get_modelmeta().custom_metadata_map
+        if 'names' in meta:
+            self.names = ast.literal_eval(meta['names'])
+        return self
+
+    def _buffers_for(self, size):
+        if size not in self._buffers:
+            self._buffers[size] = (np.empty((size, size, 3), dtype=np.uint8),
+                                   np.empty((1, 3, size, size), dtype=np.float32))
+        return self._buffers[size]
+
+    def detect_batch(self, frames, imgsz=None):
+        return [self.detect(frame, imgsz) for frame in frames]
+
+    def detect(self, frame, imgsz=None):
+        canvas, blob = self._buffers_for(imgsz if imgsz and self.resizable else self.imgsz)
+        ratio, pad_x, pad_y = letterbox(frame, canvas)
+        # HWC BGR uint8 -> NCHW RGB float32 in [0, 1], written into the reused blob
+        np.multiply(canvas.transpose(2, 0, 1)[::-1], 1.0 / 255.0, out=blob[0], casting='unsafe')
+        output = self.session.run(None, {self.input_name: blob})[0]
+
+        dets = decode_yolov8(output, self.conf, self.iou)
+        # Undo the letterbox
+        dets[:, [0, 2]] = (dets[:, [0, 2]] - pad_x) / ratio
+        dets[:, [1, 3]] = (dets[:, [1, 3]] - pad_y) / ratio
+        h, w = frame.shape[:2]
+        dets[:, [0, 2]] = np.clip(dets[:, [0, 2]], 0, w)
+        dets[:, [1, 3]] = np.clip(dets[:, [1, 3]], 0, h)
+        return detections_from_array(dets)
+
+
+BACKENDS = {'ultralytics': UltralyticsBackend, 'onnx': OnnxBackend}
+
+
+def create_backend(kind, model_path, **kwargs):
+    """Builds and loads a backend by name ('ultralytics' or 'onnx')."""
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown detector backend: {kind} (choose from {list(BACKENDS)})")
+    return BACKENDS[kind](model_path, **kwargs).load()
+
+
+def export_onnx(model_path, imgsz=IMGSZ, dynamic=True):
+    """Exports a .pt model to ONNX; returns the .onnx path.
+
+    dynamic=True keeps the input size symbolic, so OnnxBackend can run the
+    light tier and ROI crops at their own (smaller) sizes.
+    """
+    from ultralytics import YOLO
+    return YOLO(model_path).export(format='onnx', imgsz=imgsz, dynamic=dynamic, simplify=True)
+
+
+def measure_backend(kind, model_path, frames, warmup_runs=3, **kwargs):
+    """Times model load, warm-up and steady-state per-frame latency for a backend."""
+    start = time.perf_counter()
+    backend = create_backend(kind, model_path, **kwargs)
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backend.warmup(warmup_runs, frames[0].shape)
+    warmup_s = time.perf_counter() - start
+
+    latencies = np.empty(len(frames))
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        backend.detect(frame)
+        latencies[i] = time.perf_counter() - start
+
+    return {
+        'backend': kind,
+        'load_s': load_s,
+        'warmup_s': warmup_s,
+        'mean_ms': float(latencies.mean() * 1000.0),
+        'p50_ms': float(np.percentile(latencies, 50) * 1000.0),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000.0),
+    }
@@ -0,0 +1,403 @@
+import contextlib
+import json
+import multiprocessing as mp
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from async_pipeline import HISTOGRAM_EDGES_MS
+
+# Offline end-to-end evaluation.
+# Replays every video in EVAL_DIR through final_pipeline (detection ->
+# triangulation -> tracking -> CPA), one video per worker process, scores the
+# output against ground truth and writes one JSON report: per-stage latency
+# histograms, FPS, detection mAP, alert precision/recall and TTI error.
+#
+# Ground truth sits next to each video as <stem>.json:
+#   {"right_video": "clip01_right.mp4",               (optional, enables stereo)
+#    "tracks": [{"id": 0, "cls": 0,
+#                "boxes": {"12": [x1, y1, x2, y2], ...}, (frame index -> pixel box)
+#                "impact_time_s": 8.4}]}                (optional, this bird collides then)
+# Videos without a .json are still timed, just not scored.
+
+EVAL_DIR = 'eval_videos'
+REPORT_PATH = 'eval_report.json'
+MODEL_PATH = 'weights/best.pt'
+NUM_WORKERS = 2
+FRAME_LIMIT = None # None = whole video
+PIPELINE_OVERRIDES = {} # final_pipeline constants set in every worker, e.g. {'ADAPTIVE_RATE': False}
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv')
+IOU_THRESHOLDS = np.round(np.arange(0.5, 0.96, 0.05), 2) # mAP50 uses the first, mAP50-95 all of them
+ALERT_HORIZON_S = 10.0 # Same look-ahead as the pipeline's CPA: an alert this early is still correct
+
+
+#  TASKS ---
+
+def find_videos(eval_dir):
+    """(video, right_video or None, ground truth path or None) for every left/mono video in eval_dir."""
+    names = sorted(n for n in os.listdir(eval_dir) if n.lower().endswith(VIDEO_EXTENSIONS))
+    truths = {}
+    for name in names:
+        gt_path = os.path.join(eval_dir, os.path.splitext(name)[0] + '.json')
+        if os.path.exists(gt_path):
+            try:
+                with open(gt_path) as f:
+                    truths[name] = (gt_path, json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"WARNING: unreadable ground truth {gt_path} ({e}); {name} is timed but not scored")
+    right_videos = {gt.get('right_video') for _, gt in truths.values()}
+    tasks = []
+    for name in names:
+        if name in right_videos:
+            continue
+        gt_path, gt = truths.get(name, (None, {}))
+        right = gt.get('right_video')
+        tasks.append((os.path.join(eval_dir, name), os.path.join(eval_dir, right) if right else None, gt_path))
+    return tasks
+
+
+#  DETECTION SCORING ---
+
+def box_iou(a, b):
+    """(N, M) IoU between xyxy boxes."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def gt_boxes_by_frame(gt):
+    """frame index -> (G, 5) [x1, y1, x2, y2, cls]."""
+    frames = {}
+    for track in gt.get('tracks', []):
+        for frame, box in track.get('boxes', {}).items():
+            frames.setdefault(int(frame), []).append(list(box) + [track.get('cls', 0)])
+    return {f: np.array(rows, dtype=np.float32) for f, rows in frames.items()}
+
+
+def match_detections(detection_log, gt_frames):
+    """Greedy per-frame matching at every IoU threshold.
+
+    Only frames where detection actually ran are scored (frames skipped by the
+    adaptive scheduler carry no detector output). Returns
+    {cls: {'scores': (D,), 'tp': (D, T) bool, 'num_gt': int}}.
+    """
+    per_class = {}
+
+    def entry(cls):
+        return per_class.setdefault(int(cls), {'scores': [], 'tp': [], 'num_gt': 0})
+
+    for frame_idx, _, rows in detection_log:
+        gt = gt_frames.get(frame_idx, np.zeros((0, 5), dtype=np.float32))
+        for cls in np.unique(gt[:, 4]):
+            entry(cls)['num_gt'] += int((gt[:, 4] == cls).sum())
+        for cls in np.unique(rows[:, 5]):
+            dets = rows[rows[:, 5] == cls]
+            dets = dets[np.argsort(-dets[:, 4], kind='stable')]
+            boxes = gt[gt[:, 4] == cls, :4]
+            tp = np.zeros((len(dets), len(IOU_THRESHOLDS)), dtype=bool)
+            if len(boxes):
+                iou = box_iou(dets[:, :4], boxes)
+                for t, threshold in enumerate(IOU_THRESHOLDS):
+                    taken = np.zeros(len(boxes), dtype=bool)
+                    for d in range(len(dets)):
+                        candidates = np.where(taken, -1.0, iou[d])
+                        best = int(np.argmax(candidates))
+                        if candidates[best] >= threshold:
+                            taken[best] = True
+                            tp[d, t] = True
+            e = entry(cls)
+            e['scores'].append(dets[:, 4])
+            e['tp'].append(tp)
+    for e in per_class.values():
+        e['scores'] = np.concatenate(e['scores']) if e['scores'] else np.zeros(0, dtype=np.float32)
+        e['tp'] = np.concatenate(e['tp']) if e['tp'] else np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool)
+    return per_class
+
+
+def merge_matches(matches):
+    """Pools the per-class match lists of several videos."""
+    merged = {}
+    for per_class in matches:
+        for cls, e in per_class.items():
+            m = merged.setdefault(cls, {'scores': [], 'tp': [], 'num_gt': 0})
+            m['scores'].append(e['scores'])
+            m['tp'].append(e['tp'])
+            m['num_gt'] += e['num_gt']
+    for m in merged.values():
+        m['scores'] = np.concatenate(m['scores'])
+        m['tp'] = np.concatenate(m['tp'])
+    return merged
+
+
+def average_precision(scores, tp, num_gt):
+    """All-point interpolated AP for each IoU threshold column of tp."""
+    if num_gt == 0:
+        return np.full(tp.shape[1], np.nan)
+    if len(scores) == 0:
+        return np.zeros(tp.shape[1])
+    order = np.argsort(-scores, kind='stable')
+    tp_cum = np.cumsum(tp[order], axis=0)
+    recall = tp_cum / num_gt
+    precision = tp_cum / np.arange(1, len(scores) + 1)[:, None]
+    aps = []
+    for t in range(tp.shape[1]):
+        r = np.concatenate([[0.0], recall[:, t], [1.0]])
+        p = np.concatenate([[1.0], precision[:, t], [0.0]])
+        p = np.maximum.accumulate(p[::-1])[::-1] # Precision envelope
+        aps.append(float(np.sum((r[1:] - r[:-1]) * p[1:])))
+    return np.array(aps)
+
+
+def detection_metrics(per_class, names=None):
+    aps = {cls: average_precision(e['scores'], e['tp'], e['num_gt']) for cls, e in sorted(per_class.items())}
+    scored = [ap for ap in aps.values() if not np.isnan(ap[0])]
+    report = {
+        'map50': float(np.mean([ap[0] for ap in scored])) if scored else None,
+        'map50_95': float(np.mean([ap.mean() for ap in scored])) if scored else None,
+        'per_class': {},
+    }
+    for cls, ap in aps.items():
+        name = str(names.get(cls, cls)) if isinstance(names, dict) else str(cls)
+        report['per_class'][name] = {'ap50': None if np.isnan(ap[0]) else float(ap[0]),
+                                     'num_gt': per_class[cls]['num_gt'],
+                                     'num_detections': int(len(per_class[cls]['scores']))}
+    return report
+
+
+#  ALERT SCORING ---
+
+def match_alerts(alerts, gt, t_end):
+    """Scores alerts against labelled impact times.
+
+    An alert at time t is a true positive if a labelled collision happens in
+    [t, t + ALERT_HORIZON_S]; its TTI error is predicted TTI minus the true
+    remaining time. A collision counts as caught if any alert fell inside its
+    horizon. Collisions whose horizon starts after the replay ended are ignored.
+    """
+    impacts = np.array([t['impact_time_s'] for t in gt.get('tracks', []) if t.get('impact_time_s') is not None])
+    impacts = impacts[impacts - ALERT_HORIZON_S <= t_end]
+    times = np.array([a['timestamp'] for a in alerts])
+    tti = np.array([a['tti'] for a in alerts])
+    tp = tti_errors = np.zeros(0)
+    first_alert = np.full(len(impacts), np.nan)
+    if len(times) and len(impacts):
+        remaining = impacts[None, :] - times[:, None] # (A, E) true time left to each impact
+        inside = (remaining >= 0.0) & (remaining <= ALERT_HORIZON_S)
+        tp = inside.any(axis=1)
+        nearest = np.argmin(np.where(inside, remaining, np.inf), axis=1)
+        tti_errors = tti[tp] - remaining[tp, nearest[tp]]
+        for e in range(len(impacts)):
+            if inside[:, e].any():
+                first_alert[e] = times[inside[:, e]].min()
+    elif len(times):
+        tp = np.zeros(len(times), dtype=bool)
+    return {'num_alerts': int(len(times)), 'true_alerts': int(np.sum(tp)),
+            'events': int(len(impacts)), 'caught': int(np.sum(~np.isnan(first_alert))),
+            'warning_s': (impacts - first_alert)[~np.isnan(first_alert)].tolist(),
+            'tti_errors': np.asarray(tti_errors, dtype=float).tolist()}
+
+
+def alert_metrics(counts):
+    errors = np.array(counts['tti_errors'])
+    warning = np.array(counts['warning_s'])
+    return {
+        'num_alerts': counts['num_alerts'],
+        'precision': counts['true_alerts'] / counts['num_alerts'] if counts['num_alerts'] else None,
+        'events': counts['events'],
+        'recall': counts['caught'] / counts['events'] if counts['events'] else None,
+        'mean_warning_s': float(warning.mean()) if len(warning) else None,
+        'tti_bias_s': float(errors.mean()) if len(errors) else None,
+        'tti_mae_s': float(np.abs(errors).mean()) if len(errors) else None,
+        'tti_p95_abs_error_s': float(np.percentile(np.abs(errors), 95)) if len(errors) else None,
+    }
+
+
+#  LATENCY ---
+
+def histogram_percentile(histogram, q):
+    """Approximate percentile (ms) from binned counts: the upper edge of the bin holding it."""
+    histogram = np.asarray(histogram)
+    total = histogram.sum()
+    if total == 0:
+        return None
+    b = int(np.searchsorted(np.cumsum(histogram), q / 100.0 * total))
+    return float(HISTOGRAM_EDGES_MS[b + 1]) if b + 1 < len(HISTOGRAM_EDGES_MS) else float('inf')
+
+
+def merge_stages(stage_reports):
+    """Sums per-stage histograms over videos; mean latency is count-weighted."""
+    merged = {}
+    for stages in stage_reports:
+        for name, s in stages.items():
+            if name == 'queues' or not s.get('count'):
+                continue
+            m = merged.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                         'histogram': np.zeros(len(HISTOGRAM_EDGES_MS), dtype=np.int64)})
+            m['count'] += s['count']
+            m['total_ms'] += s['mean_ms'] * s['count']
+            m['max_ms'] = max(m['max_ms'], s['max_ms'])
+            m['histogram'] += np.asarray(s['histogram'])
+    return {name: {'count': m['count'], 'mean_ms': m['total_ms'] / m['count'],
+                   'p50_ms': histogram_percentile(m['histogram'], 50),
+                   'p95_ms': histogram_percentile(m['histogram'], 95),
+                   'p99_ms': histogram_percentile(m['histogram'], 99),
+                   'max_ms': m['max_ms'], 'histogram': m['histogram'].tolist()}
+            for name, m in merged.items()}
+
+
+#  WORKERS ---
+
+def evaluate_video(task):
+    """Runs one video through the pipeline in this process and scores it.
+
+    Any failure is returned as the video's 'error' (with its traceback) so one
+    bad video never takes the rest of the evaluation down with it.
+    """
+    video_path, right_path = task[:2]
+    result = {'video': os.path.basename(video_path), 'right_video': right_path and os.path.basename(right_path)}
+    try:
+        return _evaluate_video(task, result)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['traceback'] = traceback.format_exc()
+        return result, None
+
+
+def _evaluate_video(task, result):
+    video_path, right_path, gt_path, model_path, frame_limit, overrides, threads = task
+    import cv2
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    import final_pipeline
+    for name, value in overrides.items():
+        setattr(final_pipeline, name, value)
+
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        summary = final_pipeline.run_detection_pipeline(video_path, model_path, frame_limit, right_path,
+                                                        verbose=False, collect=True)
+    if summary is None:
+        result['error'] = 'cannot open video'
+        return result, None
+
+    result.update(frames=summary['frames'], elapsed_s=summary['elapsed_s'], fps=summary['fps'],
+                  stages=summary['stages'], names=summary['names'])
+    if 'scheduler' in summary:
+        result['scheduler'] = summary['scheduler']
+    matches = None
+    if gt_path is not None:
+        with open(gt_path) as f:
+            gt = json.load(f)
+        matches = match_detections(summary['detections'], gt_boxes_by_frame(gt))
+        t_end = summary['frames'] * summary['frame_dt']
+        result['alert_counts'] = match_alerts(summary['alerts'], gt, t_end)
+    return result, matches
+
+
+def run_evaluation(eval_dir=EVAL_DIR, model_path=MODEL_PATH, num_workers=NUM_WORKERS, frame_limit=FRAME_LIMIT,
+                   overrides=None, report_path=REPORT_PATH):
+    """Evaluates every video in eval_dir, writes the JSON report and returns it.
+
+    Videos that fail are listed with their error in the report; None if there is nothing to evaluate.
+    """
+    if not os.path.isdir(eval_dir):
+        print(f"ERROR: Evaluation directory {eval_dir} not found. Put the videos (and their <stem>.json "
+              f"ground truth) there or pass eval_dir.")
+        return None
+    tasks = find_videos(eval_dir)
+    if not tasks:
+        print(f"No videos found in {eval_dir}.")
+        return None
+    num_workers = max(1, min(num_workers, len(tasks)))
+    threads = max(1, (os.cpu_count() or 1) // num_workers)
+    jobs = [(video, right, gt, model_path, frame_limit, overrides or PIPELINE_OVERRIDES, threads)
+            for video, right, gt in tasks]
+    print(f"Evaluating {len(jobs)} videos on {num_workers} workers ({threads} threads each)...")
+
+    start = time.perf_counter()
+    outputs = []
+    with ProcessPoolExecutor(num_workers, mp_context=mp.get_context("spawn")) as pool:
+        futures = [pool.submit(evaluate_video, job) for job in jobs]
+        for job, future in zip(jobs, futures):
+            try:
+                outputs.append(future.result())
+            except Exception as e: # The worker itself died (e.g. a crash in native code)
+                outputs.append(({'video': os.path.basename(job[0]), 'right_video': job[1] and os.path.basename(job[1]),
+                                 'error': f"{type(e).__name__}: {e}"}, None))
+    wall_s = time.perf_counter() - start
+
+    videos = [r for r, _ in outputs]
+    ok = [r for r in videos if 'error' not in r]
+    for r in videos:
+        if 'error' in r:
+            print(f"WARNING: {r['video']} failed: {r['error']}")
+    names = next((r['names'] for r in ok), None)
+    for r in ok:
+        r.pop('names')
+        if 'alert_counts' in r:
+            r['alerts'] = alert_metrics(r['alert_counts'])
+    for r, matches in outputs:
+        if matches is not None:
+            r['detection'] = detection_metrics(matches, names)
+    all_matches = [m for _, m in outputs if m is not None]
+
+    alert_totals = {'num_alerts': 0, 'true_alerts': 0, 'events': 0, 'caught': 0, 'warning_s': [], 'tti_errors': []}
+    for r in ok:
+        for key, value in r.pop('alert_counts', {}).items():
+            alert_totals[key] += value
+    frames = sum(r['frames'] for r in ok)
+    busy_s = sum(r['elapsed_s'] for r in ok)
+
+    report = {
+        'config': {'model_path': model_path, 'frame_limit': frame_limit, 'num_workers': num_workers,
+                   'overrides': overrides or PIPELINE_OVERRIDES, 'iou_thresholds': IOU_THRESHOLDS.tolist(),
+                   'alert_horizon_s': ALERT_HORIZON_S},
+        'aggregate': {
+            'videos': len(ok), 'failed': len(videos) - len(ok), 'frames': frames,
+            'fps_per_worker': frames / busy_s if busy_s > 0 else 0.0, # What one pipeline instance sustains
+            'throughput_fps': frames / wall_s if wall_s > 0 else 0.0, # All workers together
+            'wall_s': wall_s,
+            'latency_edges_ms': HISTOGRAM_EDGES_MS.tolist(),
+            'stages': merge_stages([r['stages'] for r in ok]),
+            'detection': detection_metrics(merge_matches(all_matches), names) if all_matches else None,
+            'alerts': alert_metrics(alert_totals) if alert_totals['events'] or alert_totals['num_alerts'] else None,
+        },
+        'videos': videos,
+    }
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {report_path}")
+    return report
+
+
+def print_summary(report):
+    agg = report['aggregate']
+    print(f"\n{agg['videos']} videos, {agg['frames']} frames, {agg['fps_per_worker']:.1f} FPS per worker, "
+          f"{agg['throughput_fps']:.1f} FPS total")
+    for name, s in agg['stages'].items():
+        print(f"  {name:15s} mean={s['mean_ms']:7.2f} ms  p50<={s['p50_ms']:7.2f} ms  p95<={s['p95_ms']:7.2f} ms")
+    if agg['detection']:
+        d = agg['detection']
+        print(f"  mAP50={d['map50']}  mAP50-95={d['map50_95']}")
+    if agg['alerts']:
+        a = agg['alerts']
+        print(f"  alerts: precision={a['precision']}  recall={a['recall']}  TTI MAE={a['tti_mae_s']} s  "
+              f"bias={a['tti_bias_s']} s")
+
+
+if __name__ == "__main__":
+    report = run_evaluation()
+    if report is not None:
+        print_summary(report)
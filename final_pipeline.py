@@ -1,25 +1,60 @@
 import numpy as np
-import cv2
-from ultralytics import YOLO
-from spatialmath import SE3 
 import os
 import time
 
+from adaptive_scheduler import IDLE, MONITOR, ThreatScheduler, classify_threat
+from assessment_service import TrackPublisher
+from async_pipeline import BLOCK, PipelineRunner
+from batched_inference import BatchedDetector
+from calibration import StereoCalibration, load_calibration
+from collision_risk import collision_probability
+from cpa import solve_cpa
+from detections import CENTER, XYWH, XYXY, as_matrix
+from frame_source import PREFETCH, FrameSource
+from model_registry import get_backend
+from roi_gating import RoiGate, detect_gated
+from spatial_index import UniformGrid, corridor_candidates, segment_distance
+from stereo_matching import match_stereo
+from telemetry import TELEMETRY_DIR, Telemetry
+from tiled_inference import detect_sliced, detect_sliced_batch
+from tracker import TrackManager
+from trajectory import MotionPredictor, TurnEstimator, coordinated_turn, sample_times
+from transforms import PoseBuffer, compose, invert, transform_covariances, transform_points
+from triangulation import triangulate_batch, triangulation_covariance
+
 
 MODEL_PATH = 'weights/best.pt' 
 VIDEO_PATH = 'vidio1.mp4' 
+RIGHT_VIDEO_PATH = None # Set to the right camera video to enable real stereo matching
 
 COLLISION_THRESHOLD_M = 100.0 # Safety margin in meters
 CONF_THRESHOLD = 0.10         
+DETECTOR_BACKEND = 'ultralytics' # 'ultralytics' (PyTorch eager) or 'onnx' (exported graph, see export_onnx)
+ROI_GATING = True # Only detect on moving/anomalous sky regions and predicted tracks (see roi_gating.py)
+SLICED_INFERENCE = False # Full-frame passes as overlapping native-resolution tiles (small, far birds)
+TILE_SIZE = 640
+TILE_OVERLAP = 0.2
+ADAPTIVE_RATE = True # Detection cadence and model tier follow the threat level (see adaptive_scheduler.py)
+LIGHT_MODEL_PATH = None # Lighter weights for low-threat frames; None = main model at LIGHT_IMGSZ
+LIGHT_IMGSZ = 320
+PROBABILISTIC_RISK = True # Alert on Monte-Carlo collision probability from the track covariance (see collision_risk.py)
+ALERT_PROBABILITY = 0.3
+PIXEL_STD_PX = 1.0 # Box-center noise fed through triangulation into the measurement covariance
+SPATIAL_CULLING = True # Full CPA only for tracks inside the aircraft's reachable corridor (see spatial_index.py)
+CPA_HORIZON_S = 10.0
+OWNSHIP_TURN_RATE_DPS = 0.0 # Ownship coordinated turn over the horizon; 0 = straight line (see trajectory.py)
+BIRD_MOTION_MODEL = 'cv' # 'cv' or 'turn': bank/climb estimated from successive tracked velocities (only significant turns)
+WORLD_UP_W = np.array([0.0, -1.0, 0.0]) # World frame = camera frame here, whose Y axis points down
+ASSESSMENT_SERVICE = None # (host, port) of a running assessment_service.py to publish world tracks to
+SERVICE_AIRCRAFT_ID = 'OWNSHIP' # This aircraft's id there; also prefixes the published track ids
 
-# Simplified Camera Parameters 
-FOCAL_LENGTH_PX = 700.0
-BASELINE_M = 0.5   
-CX = 640.0        
-CY = 360.0        
-FPS = 30.0         
-TIME_STEP = 1.0 / FPS
+# Camera rig: intrinsics, distortion and stereo extrinsics (see calibration.py / stereo_calibration.yaml).
+# None = ideal parallel rig with calibration.FOCAL_LENGTH_PX, BASELINE_M, CX, CY
+CALIBRATION_PATH = None
+FPS = 30.0 # Fallback when the container has no frame rate
 FRAME_LIMIT = 100 
+QUEUE_SIZE = 4      # Frames buffered between pipeline stages
+QUEUE_POLICY = BLOCK # Backpressure for recorded video; use DROP_OLDEST for live cameras
 
 #  CORE SPATIAL MATH FUNCTIONS ---
 
@@ -34,112 +69,358 @@ def triangulate_pos(u_l, v_l, u_r, v_r, f, B, cx, cy):
     Y = ((v_l - cy) * Z) / f
     return np.array([X, Y, Z])
 
-def predict_collision(aircraft_pos, aircraft_vel, bird_pos, bird_vel, max_time, step, threshold):
-    """Projects paths forward to check for collision."""
-    time_to_impact = np.inf
-    min_distance = np.inf
-
-    for t in np.arange(0, max_time, step):
-        future_aircraft_pos = aircraft_pos + aircraft_vel * t
-        future_bird_pos = bird_pos + bird_vel * t
-        distance = np.linalg.norm(future_aircraft_pos - future_bird_pos)
-        
-        if distance < min_distance:
-            min_distance = distance
-            
-        if distance < threshold:
-            time_to_impact = t
-            return True, time_to_impact, min_distance
-
-    return False, time_to_impact, min_distance
-
 #  MAIN INTEGRATION PIPELINE ---
 
-def run_detection_pipeline(video_path, model_path, frame_limit):
-    
-    print(f"Loading custom model from: {model_path}...")
-    model = YOLO(model_path)
+def run_detection_pipeline(video_path, model_path, frame_limit, right_video_path=None, verbose=True, collect=False,
+                           telemetry_path=None):
+    """Runs the pipeline over a video and returns a summary dict (None if a video cannot be opened).
+
+    Detections, tracks, CPA results, alerts and stage timings go to a telemetry
+    log (telemetry_path, default TELEMETRY_DIR/flight_<time>_<pid>.tlm).
+    verbose=False silences the alert echo and reports (e.g. in evaluate.py workers).
+    collect=True also returns every frame's raw detections and every alert for scoring.
+    """
+    print(f"Loading custom model from: {model_path} ({DETECTOR_BACKEND} backend)...")
+    model = get_backend(DETECTOR_BACKEND, model_path, conf=CONF_THRESHOLD) # Loaded once per process
+    light_model = get_backend(DETECTOR_BACKEND, LIGHT_MODEL_PATH, conf=CONF_THRESHOLD) if LIGHT_MODEL_PATH else model
+    if not model.resizable:
+        print(f"WARNING: {model_path} has a fixed input size: ROI crops cost a full inference"
+              + ("" if LIGHT_MODEL_PATH else " and there is no light tier") + " (export it with dynamic shapes)")
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
+    # Background decode; frames stay valid while they are queued between the stages.
+    # With scheduler skips, decode only one frame ahead so the skipped ones are grabbed, never decoded
+    hold = 2 * QUEUE_SIZE + 4
+    prefetch = 1 if ADAPTIVE_RATE else PREFETCH
+    source = FrameSource(video_path, max_frames=frame_limit, hold=hold, prefetch=prefetch, fps=FPS)
+    if not source.isOpened():
         print(f"ERROR: Cannot open video file {video_path} using OpenCV. Check path/codec.")
         return
+    frame_dt = 1.0 / source.fps
+
+    # Two-stream mode: detect in both cameras and match boxes across views
+    source_right = None
+    if right_video_path is not None:
+        source_right = FrameSource(right_video_path, max_frames=frame_limit, hold=hold, prefetch=prefetch, fps=FPS)
+        if not source_right.isOpened():
+            print(f"ERROR: Cannot open right video file {right_video_path} using OpenCV. Check path/codec.")
+            source.release()
+            return
+
+    # Two-stream mode: full-frame passes of both cameras go out as one batched call per pair
+    pair_detectors = None
+    if source_right is not None:
+        pair_detectors = {'full': BatchedDetector(model, batch_size=2),
+                          'light': BatchedDetector(light_model, batch_size=2, imgsz=LIGHT_IMGSZ)}
 
-    positions_history = []
+    # Detections are rectified point-wise; "camera frame" below is the rectified left camera
+    rig = load_calibration(CALIBRATION_PATH) if CALIBRATION_PATH else StereoCalibration.ideal()
+
+    tracker = TrackManager()
+    track_grid = UniformGrid() # World-frame hash grid over track positions, rebuilt each assessment
+    turn_estimator = TurnEstimator(WORLD_UP_W)
     
     # --- SIMULATED AIRCRAFT STATE (World Frame) ---
     AIRCRAFT_POS_W = np.array([0.0, 0.0, 0.0])
     AIRCRAFT_VEL_W = np.array([70.0, 0.0, 0.0])
-    T_WC = SE3() # Camera Frame = World Frame for simplicity
+    BIRD_VEL_W_COLLIDE = np.array([-50.0, 1.0, -1.0]) 
+    # --- FRAME TRANSFORMS (plain 4x4 arrays) ---
+    T_BC = np.eye(4) # Camera-to-body extrinsic (camera frame = body frame for simplicity)
+    body_poses = PoseBuffer() # Time-stamped body-to-world poses, e.g. from the IMU
+    body_poses.append(0.0, np.eye(4)) # Static aircraft: body frame = world frame for simplicity
 
-    frame_count = 0
-    print("\nStarting frame processing...")
+    last_timestamp = None
+    last_index = -1 # Source index of the previous assessed frame
+    # One background model per camera; with a fixed-size graph every crop costs a full inference
+    max_tiles = None if model.resizable else 1
+    gates = (RoiGate(max_tiles=max_tiles), RoiGate(max_tiles=max_tiles))
+    track_rois = (None, None) # Predicted (u, v) of every track in each camera, set by assess
+    scheduler = ThreatScheduler(light_tier=light_model is not model or model.resizable)
+    if telemetry_path is None:
+        telemetry_path = os.path.join(TELEMETRY_DIR, time.strftime('flight_%Y%m%d_%H%M%S') + f'_{os.getpid()}.tlm')
+    telemetry = Telemetry(telemetry_path, echo_alerts=verbose, meta={
+        'video': video_path, 'right_video': right_video_path, 'model': model_path,
+        'names': {str(k): v for k, v in model.names.items()}, 'collision_threshold_m': COLLISION_THRESHOLD_M})
+    publisher = None
+    if ASSESSMENT_SERVICE is not None:
+        try:
+            publisher = TrackPublisher(*ASSESSMENT_SERVICE, source=SERVICE_AIRCRAFT_ID)
+        except OSError as e:
+            print(f"WARNING: assessment service at {ASSESSMENT_SERVICE} unreachable ({e}); not publishing tracks")
+    frame_dets = {} # frame index -> (N, 6) [x1, y1, x2, y2, conf, cls], handed from infer to assess
+    detection_log = [] # (frame_idx, timestamp, rows) for frames where detection ran
+    alert_log = []
+
+    def detect_full(frame, tier='full'):
+        if tier == 'light':
+            return light_model.detect_batch([frame], imgsz=LIGHT_IMGSZ)[0]
+        if SLICED_INFERENCE:
+            return detect_sliced(model, frame, TILE_SIZE, TILE_OVERLAP)
+        return model.detect(frame)
+
+    def detect(gate, frame, track_uv, tier='full'):
+        if ROI_GATING:
+            return detect_gated(model, gate, frame, track_uv, full_detect=lambda f: detect_full(f, tier))
+        return detect_full(frame, tier)
+
+    def detect_pair(index, frames, tier):
+        """Left and right detections; the cameras that need a full-frame pass share one batched call."""
+        dets = [None, None] # None = full frame still to detect
+        if ROI_GATING:
+            dets = [detect_gated(model, gates[cam], frames[cam], track_rois[cam], full_detect=lambda f: None)
+                    for cam in (0, 1)]
+        full = [cam for cam in (0, 1) if dets[cam] is None]
+        if full and tier == 'full' and SLICED_INFERENCE:
+            for cam, cam_dets in zip(full, detect_sliced_batch(model, [frames[cam] for cam in full], TILE_SIZE,
+                                                               TILE_OVERLAP)):
+                dets[cam] = cam_dets
+        elif full:
+            futures = [pair_detectors[tier].submit(cam, index, frames[cam]) for cam in full]
+            pair_detectors[tier].flush()
+            for future in futures:
+                cam, _, dets[cam] = future.result()
+        return dets
+
+    # --- Stage 1: Capture (background thread) ---
+    def capture():
+        item = source.read()
+        if item is None:
+            return None
+        frame, timestamp, index = item
+        if source_right is not None:
+            item_right = source_right.read()
+            if item_right is None:
+                return None
+            frame = (frame, item_right[0])
+        tier = 'full'
+        if ADAPTIVE_RATE:
+            # The frames up to the next detection are grabbed but never decoded; the tracker bridges them.
+            # The skip is committed here, so an escalation decided while assessing this frame only takes
+            # effect after it (at most detect_every - 1 frames of the level the skip was taken at).
+            tier, skip = scheduler.next_detection()
+            source.skip(skip)
+            if source_right is not None:
+                source_right.skip(skip)
+        return index, timestamp, frame, tier # Container timestamp travels with the frame
+
+    # --- Stage 2: Detection + 2D association (inference thread) ---
+    def infer(item):
+        """Returns (uv_left, uv_right, cls_ids) for the frame, or None if no bird."""
+        index, timestamp, frame, tier = item
+
+        if source_right is not None:
+            #  Run YOLO Detection on both cameras
+            dets_left, dets_right = detect_pair(index, frame, tier)
+            telemetry.detections(index, timestamp, dets_left)
+            if collect:
+                frame_dets[index] = np.column_stack([as_matrix(dets_left)[:, XYXY], dets_left['conf'], dets_left['cls']])
+            
+            if len(dets_left) and len(dets_right):
+                xywh_left = as_matrix(dets_left)[:, XYWH]
+                xywh_right = as_matrix(dets_right)[:, XYWH]
+                # Box centers onto rectified rows, so the epipolar band and disparity hold for real lenses
+                xywh_left[:, :2] = rig.rectify_points(xywh_left[:, :2], 0)
+                xywh_right[:, :2] = rig.rectify_points(xywh_right[:, :2], 1)
+                
+                # --- Stereo Correspondence (epipolar band + disparity range) ---
+                left_idx, right_idx = match_stereo(xywh_left, xywh_right)
+                if len(left_idx):
+                    cls_ids = dets_left['cls'][left_idx].astype(int)
+                    return xywh_left[left_idx, :2], xywh_right[right_idx, :2], cls_ids
+            return None
 
-    while True:
-        ret, frame = cap.read()
-        if not ret or frame_count >= frame_limit:
-            break
-        
-        frame_count += 1
-        
         #  Run YOLO Detection
-        results = model.predict(source=frame, conf=CONF_THRESHOLD, verbose=False)
+        dets = detect(gates[0], frame, track_rois[0], tier)
+        telemetry.detections(index, timestamp, dets)
+        if collect:
+            frame_dets[index] = np.column_stack([as_matrix(dets)[:, XYXY], dets['conf'], dets['cls']])
         
-        # Check if ANY object was detected in the frame
-        if results and results[0].boxes:
-            box = results[0].boxes[0]
-            class_found = model.names[int(box.cls[0].item())] 
-            
-            # --- Get 2D Pixel Coordinates (Left Camera) ---
-            u_left, v_left = box.xywh[0][0].item(), box.xywh[0][1].item()
+        if len(dets):
+            # --- Get 2D Pixel Coordinates of ALL birds (Left Camera) ---
+            uv_left = rig.rectify_points(as_matrix(dets)[:, CENTER], 0)
+            cls_ids = dets['cls'].astype(int)
             
             # --- Simulate Right Camera Detection (Creates Disparity) ---
             # Assume a fixed bird 100m away (Disparity is calculated from Z=100m)
-            simulated_disparity = (FOCAL_LENGTH_PX * BASELINE_M) / 100.0 
-            u_right = u_left - simulated_disparity
-            v_right = v_left 
+            simulated_disparity = (rig.focal_length * rig.baseline) / 100.0 
+            uv_right = uv_left.copy()
+            uv_right[:, 0] -= simulated_disparity
+            return uv_left, uv_right, cls_ids
+        return None
+
+    # --- Stage 3: Triangulation, tracking and collision assessment (main thread) ---
+    def assess(_, item, detections):
+        nonlocal last_timestamp, last_index, track_rois
+        frame_idx, timestamp, _, _ = item # Source index: frames skipped at the source never get here
+        frame_count = frame_idx + 1
+        gap = frame_idx - last_index # Source frames since the previous assessed one
+        last_index = frame_idx
+        
+        # Propagate every track to this frame (tracks coast through missed/dropped frames)
+        tracker.predict(frame_dt if last_timestamp is None else timestamp - last_timestamp)
+        last_timestamp = timestamp
+        if frame_idx in frame_dets:
+            detection_log.append((frame_idx, timestamp, frame_dets.pop(frame_idx)))
+        P_W = np.empty((0, 3))
+        R_W = np.empty((0, 3, 3))
+        cls_ids = None
+        T_WC = compose(body_poses.interpolate(timestamp)[0], T_BC)
+        
+        # Check if ANY bird was detected (and matched) in the frame
+        if detections is not None:
+            uv_left, uv_right, cls_ids = detections
             
-            #  Triangulation (3D Position in Camera Frame) ---
-            P_C = triangulate_pos(u_left, v_left, u_right, v_right, FOCAL_LENGTH_PX, BASELINE_M, CX, CY)
+            #  Triangulation (3D Positions in Camera Frame, one vectorized pass) ---
+            P_C, valid = triangulate_batch(uv_left, uv_right, rig.focal_length, rig.baseline, rig.cx, rig.cy)
+            P_C = P_C[valid]
+            cls_ids = cls_ids[valid]
+            # Pixel noise -> (N, 3, 3) position covariance (depth std grows as Z^2 / (f * B))
+            R_C = triangulation_covariance(uv_left[valid], uv_right[valid], rig.focal_length, rig.baseline,
+                                           rig.cx, rig.cy, PIXEL_STD_PX)
+
+            #  Coordinate Transform (3D Positions in World Frame, one matmul) ---
+            if len(P_C):
+                P_W = transform_points(T_WC, P_C) # (N, 3) world positions of every bird
+                R_W = transform_covariances(T_WC, R_C)
+        
+        #  Tracking (gated association + Kalman update, births and deaths) ---
+        # Skipped frames never reach here: tracks coast over them instead of collecting misses
+        tracker.update(P_W, cls_ids if len(P_W) else None, R_W)
+        if ADAPTIVE_RATE:
+            scheduler.confirming(len(tracker.tentative())) # New birds get their confirming hits at full tier
+
+        # Velocity and Prediction (every 5 frames, or at the threat-driven cadence) ---
+        track_ids, track_labels, track_pos, track_vel = tracker.tracks()
+        num_tracks = len(track_ids)
+        telemetry.tracks(frame_idx, timestamp, track_ids, track_labels, track_pos, track_vel)
+        if publisher is not None:
+            # Stamped with the service clock: video timestamps are not on the fleet's clock
+            publisher.aircraft(SERVICE_AIRCRAFT_ID, AIRCRAFT_POS_W, AIRCRAFT_VEL_W)
+            if num_tracks:
+                publisher.birds(track_ids, track_pos, track_vel)
+
+        # Where every track should appear next frame, so the ROI gate always checks there (raw, distorted pixels)
+        P_next = transform_points(invert(T_WC), track_pos + track_vel * frame_dt)
+        P_next = P_next[P_next[:, 2] > 0.0]
+        track_rois = (rig.project(P_next, 0), rig.project(P_next, 1))
+
+        run_cpa = scheduler.should_assess(gap) if ADAPTIVE_RATE else frame_count % 5 == 0
+        if ADAPTIVE_RATE and not len(track_ids):
+            scheduler.update(IDLE, frame_idx)
+        if len(track_ids) and run_cpa:
             
-            if np.any(np.isnan(P_C)): continue
+            if source_right is not None:
+                # Real stereo depth: use the Kalman-tracked velocity of every bird
+                bird_vel = track_vel
+            else:
+                # --- FORCED COLLISION SIMULATION (Override Tracking) ---
+                # Simulated disparity pins every bird at 100m, so tracked velocity is meaningless.
+                # Aggressive velocity towards the plane (-50.0 m/s along X)
+                bird_vel = BIRD_VEL_W_COLLIDE
+            bird_vel = np.broadcast_to(bird_vel, track_pos.shape)
+
+            # Non-linear motion: ownship turn and per-bird bank/climb over the horizon
+            motion = None
+            margin = 0.0
+            if OWNSHIP_TURN_RATE_DPS or BIRD_MOTION_MODEL == 'turn':
+                times = sample_times(CPA_HORIZON_S)
+                ownship = coordinated_turn(AIRCRAFT_POS_W, AIRCRAFT_VEL_W, np.radians(OWNSHIP_TURN_RATE_DPS), times,
+                                           WORLD_UP_W)[0]
+                # Rates are tested against the tracked velocity noise (the forced velocity is exact)
+                vel_cov = tracker.covariances()[:, 3:, 3:] if source_right is not None else None
+                turn_rate, axial_acc = (turn_estimator.update(track_ids, bird_vel, timestamp, vel_cov)
+                                        if BIRD_MOTION_MODEL == 'turn' else (None, None))
+                motion = MotionPredictor(times, ownship, WORLD_UP_W, turn_rate, axial_acc)
+                # The turning ownship strays from the straight culling corridor; widen it by that much
+                margin = segment_distance(ownship, AIRCRAFT_POS_W, AIRCRAFT_POS_W + AIRCRAFT_VEL_W * CPA_HORIZON_S).max()
+
+            # Ownship-relative culling: birds that cannot reach the swept corridor keep no CPA
+            if SPATIAL_CULLING:
+                near = corridor_candidates(track_grid.rebuild(track_pos), AIRCRAFT_POS_W, AIRCRAFT_VEL_W, bird_vel,
+                                           CPA_HORIZON_S, COLLISION_THRESHOLD_M, margin=margin)
+                track_ids, track_labels = track_ids[near], track_labels[near]
+                track_pos, bird_vel = track_pos[near], bird_vel[near]
+                if motion is not None:
+                    motion = motion.subset(near)
+            else:
+                near = slice(None)
 
-            #  Coordinate Transform (3D Position in World Frame) ---
-            P_W = T_WC * P_C # P_W is the bird's world position
+            # Collision Prediction for every candidate bird at once
+            if motion is None:
+                is_collision, t_impact, min_dist, t_cpa = solve_cpa(
+                    AIRCRAFT_POS_W, AIRCRAFT_VEL_W, track_pos, bird_vel,
+                    max_time=CPA_HORIZON_S, threshold=COLLISION_THRESHOLD_M
+                )
+            else:
+                is_collision, t_impact, min_dist, t_cpa = motion.cpa(track_pos, bird_vel, COLLISION_THRESHOLD_M)
+            is_collision, t_impact, min_dist, t_cpa = is_collision[:, 0], t_impact[:, 0], min_dist[:, 0], t_cpa[:, 0]
+            p_collision = is_collision.astype(np.float64)
+
+            # Collision probability under the tracks' position/velocity uncertainty
+            if PROBABILISTIC_RISK:
+                track_cov = tracker.covariances()[near]
+                if source_right is None:
+                    track_cov[:, 3:, :] = track_cov[:, :, 3:] = 0.0 # The forced velocity is exact
+                p_collision, risk_tti, _ = collision_probability(
+                    AIRCRAFT_POS_W, AIRCRAFT_VEL_W, track_pos, bird_vel,
+                    track_cov, max_time=CPA_HORIZON_S, threshold=COLLISION_THRESHOLD_M, motion=motion
+                )
+                is_collision = p_collision >= ALERT_PROBABILITY
+                t_impact = np.where(is_collision, risk_tti, np.inf)
+            telemetry.cpa(frame_idx, timestamp, track_ids, is_collision, t_impact, min_dist, t_cpa, p_collision)
+            if ADAPTIVE_RATE:
+                # Tracks exist but none can reach the corridor: nothing closer than MONITOR
+                level = classify_threat(is_collision, t_impact, min_dist, COLLISION_THRESHOLD_M) if len(track_ids) else MONITOR
+                scheduler.update(level, frame_idx)
             
-            positions_history.append((P_W, frame_count * TIME_STEP))
+            # Alerts are logged, and echoed to the console by the telemetry writer thread
+            hit = np.flatnonzero(is_collision)
+            if len(hit):
+                telemetry.alerts(frame_idx, timestamp, track_ids[hit], track_labels[hit], t_impact[hit],
+                                 min_dist[hit], p_collision[hit])
+            if collect:
+                for i in hit:
+                    alert_log.append({'frame': frame_idx, 'timestamp': timestamp, 'track_id': int(track_ids[i]),
+                                      'cls': int(track_labels[i]), 'tti': float(t_impact[i]),
+                                      'min_dist': float(min_dist[i]), 'p_collision': float(p_collision[i])})
+        # skipped = frames grabbed undecoded since the previous assessed one
+        telemetry.frame(frame_idx, timestamp, len(P_W), num_tracks, gap - 1, scheduler.level)
+        return True
 
-            # Tracking, Velocity, and Prediction (Run every 5 frames) ---
-            if len(positions_history) >= 5 and frame_count % 5 == 0:
-                
-                # Use the last two points in history for instantaneous velocity
-                pos_t1, time_t1 = positions_history[-2]
-                pos_t2, time_t2 = positions_history[-1]
-                
-                delta_time = time_t2 - time_t1
-                
-                if delta_time > 0:
-                    # BIRD_VEL_TRACKED = (pos_t2 - pos_t1) / delta_time # Actual tracked velocity
-                    
-                    # --- FORCED COLLISION SIMULATION (Override Tracking) ---
-                    # Aggressive velocity towards the plane (-50.0 m/s along X)
-                    BIRD_VEL_W_COLLIDE = np.array([-50.0, 1.0, -1.0]) 
-                    
-                    # Collision Prediction using the FORCED velocity
-                    is_collision, t_impact, min_dist = predict_collision(
-                        AIRCRAFT_POS_W, AIRCRAFT_VEL_W, pos_t2, BIRD_VEL_W_COLLIDE, 
-                        max_time=10.0, step=TIME_STEP, threshold=COLLISION_THRESHOLD_M
-                    )
-                    
-                    if is_collision:
-                        print(f"\n*** FRAME {frame_count}: COLLISION ALERT (TTI) ***")
-                        print(f"  DETECTED CLASS: {class_found}")
-                        print(f"  Time to Impact: {t_impact:.2f} seconds")
-                        print(f"  Min Predicted Distance: {min_dist:.2f} m")
-                    
-        else:
-            positions_history = []
+    print("\nStarting frame processing...")
+    runner = PipelineRunner(capture, infer, assess, queue_size=QUEUE_SIZE, policy=QUEUE_POLICY, telemetry=telemetry)
+    start = time.perf_counter()
+    try:
+        runner.run() # A capture or inference failure is re-raised here, after the sources are released
+        elapsed = time.perf_counter() - start
+    finally:
+        source.release()
+        if source_right is not None:
+            source_right.release()
+        telemetry.close()
+        if publisher is not None:
+            publisher.close()
+        if pair_detectors is not None:
+            for detector in pair_detectors.values():
+                detector.close()
+    if verbose:
+        runner.print_report()
+        if ROI_GATING:
+            s = gates[0].stats
+            print(f"ROI gating (left): {s['skipped']} frames skipped, {s['roi']} tiled ({s['tiles']} tiles), {s['full']} full")
+        if ADAPTIVE_RATE:
+            scheduler.print_report()
             
-    cap.release()
-    print("\nPipeline finished processing video frames.")
+    print(f"\nPipeline finished processing video frames. Telemetry: {telemetry_path}")
+    if telemetry.dropped():
+        print(f"WARNING: telemetry ring overflowed, rows dropped: {telemetry.dropped()}")
+
+    frames = last_index + 1 # Source frames covered, skipped ones included
+    summary = {'frames': frames, 'elapsed_s': elapsed, 'fps': frames / elapsed if elapsed > 0 else 0.0,
+               'frame_dt': frame_dt, 'stages': runner.report(), 'names': model.names, 'telemetry_path': telemetry_path}
+    if ADAPTIVE_RATE:
+        summary['scheduler'] = dict(scheduler.stats, compute_fraction=scheduler.compute_fraction())
+    if collect:
+        summary['detections'] = detection_log
+        summary['alerts'] = alert_log
+    return summary
 
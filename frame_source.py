@@ -0,0 +1,228 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import cv2
+
+# One frame source for video files, webcams and image directories.
+# Decoding runs on a background thread into a ring of preallocated BGR
+# buffers (VideoCapture.retrieve writes straight into them), a few frames
+# ahead of the consumer. Skipped frames are grabbed without being retrieved,
+# seeks jump through the container index, and every frame carries its
+# container timestamp instead of frame_index * TIME_STEP.
+#
+# Buffer lifetime: a frame returned by read() stays valid for the next `hold`
+# reads; consumers that keep frames longer (e.g. for display history) copy them.
+
+PREFETCH = 4
+HOLD = 8
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+
+def open_capture(source, hw_accel=True, threads=0):
+    """VideoCapture with hardware decoding and multi-threaded FFmpeg where OpenCV supports them."""
+    params = []
+    if hw_accel and hasattr(cv2, 'CAP_PROP_HW_ACCELERATION'):
+        params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+    if threads and hasattr(cv2, 'CAP_PROP_N_THREADS'):
+        params += [cv2.CAP_PROP_N_THREADS, threads]
+    if isinstance(source, str) and params:
+        cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+        if cap.isOpened():
+            return cap
+    return cv2.VideoCapture(source)
+
+
+class FrameSource:
+    """Threaded, seekable frame reader.
+
+    source: video path, webcam index (int) or a directory of images.
+    read() returns (frame, timestamp_s, index), or None at the end.
+    stride > 1 decodes every stride-th frame and only grabs the rest.
+    """
+
+    def __init__(self, source, max_frames=None, stride=1, prefetch=PREFETCH, hold=HOLD,
+                 hw_accel=True, threads=0, fps=30.0):
+        self.source = source
+        self.max_frames = max_frames
+        self.stride = max(1, int(stride))
+        self.prefetch = prefetch
+        self.pool_size = hold + prefetch + 2
+        self.kind = 'camera' if isinstance(source, int) else 'images' if os.path.isdir(source) else 'video'
+        self.cap = None
+        self.images = None
+        self.fps = fps
+        self.frame_count = None
+
+        if self.kind == 'images':
+            self.images = sorted(os.path.join(source, name) for name in os.listdir(source)
+                                 if name.lower().endswith(IMAGE_EXTENSIONS))
+            self.frame_count = len(self.images)
+        else:
+            self.cap = open_capture(source, hw_accel and self.kind == 'video', threads)
+            if self.cap.isOpened():
+                self.fps = self.cap.get(cv2.CAP_PROP_FPS) or fps
+                count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                self.frame_count = count if count > 0 and self.kind == 'video' else None
+
+        self._pool = None
+        self._slot = 0
+        self._next_index = 0 # Index of the next frame the decoder will produce
+        self._fresh = True # No stride gap before the first frame (or after a seek)
+        self._lock = threading.Lock()
+        self._skip_to = 0 # Frames below this index are never returned (grabbed only, if not decoded yet)
+        self._read_next = 0 # Index after the last frame returned by read()
+        self._frames = queue.Queue(maxsize=prefetch)
+        self._space = threading.Semaphore(prefetch) # Free queue slots; taken before a frame is decoded
+        self._stop = threading.Event()
+        self._thread = None
+        self._t0 = None
+
+    def isOpened(self):
+        if self.kind == 'images':
+            return len(self.images) > 0
+        return self.cap is not None and self.cap.isOpened()
+
+    #  DECODING ---
+
+    def _timestamp(self, index):
+        if self.kind == 'video':
+            return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if self.kind == 'images':
+            return index / self.fps
+        now = time.perf_counter() # Webcams have no useful container clock
+        if self._t0 is None:
+            self._t0 = now
+        return now - self._t0
+
+    def _grab(self):
+        if self.kind == 'images':
+            return self._next_index < len(self.images)
+        return self.cap.grab()
+
+    def _retrieve(self):
+        if self.kind == 'images':
+            return cv2.imread(self.images[self._next_index])
+        if self._pool is None:
+            ok, frame = self.cap.retrieve()
+            if not ok:
+                return None
+            self._pool = np.empty((self.pool_size,) + frame.shape, dtype=frame.dtype)
+            self._pool[0] = frame
+            self._slot = 1 % self.pool_size
+            return self._pool[0]
+        buf = self._pool[self._slot]
+        ok, frame = self.cap.retrieve(buf)
+        if not ok:
+            return None
+        if frame is not buf: # Resolution changed mid-stream
+            self._pool = None
+            return frame
+        self._slot = (self._slot + 1) % self.pool_size
+        return buf
+
+    def _decode_one(self):
+        """Grabs skipped/strided frames, then decodes one; returns the item or None at the end."""
+        gap = 0 if self._fresh else self.stride - 1
+        self._fresh = False
+        with self._lock:
+            target = max(self._skip_to, self._next_index + gap)
+        while self._next_index < target:
+            if not self._grab():
+                return None
+            self._next_index += 1
+        if self.max_frames is not None and self._next_index >= self.max_frames:
+            return None
+        if not self._grab():
+            return None
+        index = self._next_index
+        timestamp = self._timestamp(index)
+        frame = self._retrieve()
+        self._next_index += 1
+        if frame is None:
+            return None
+        return frame, timestamp, index
+
+    def _skipped(self, item):
+        with self._lock:
+            return item is not None and item[2] < self._skip_to
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Decode only into a free slot, so a skip() can still spare every frame after the queued ones
+            if not self._space.acquire(timeout=0.1):
+                continue
+            item = self._decode_one()
+            if self._skipped(item): # skip() overtook the frame while it was being decoded
+                self._space.release()
+                continue
+            self._frames.put(item)
+            if item is None:
+                return
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='frame-source', daemon=True)
+            self._thread.start()
+        return self
+
+    def _halt(self):
+        if self._thread is not None:
+            self._stop.set()
+            while self._thread.is_alive():
+                try:
+                    self._frames.get_nowait()
+                except queue.Empty:
+                    self._thread.join(0.01)
+            self._thread = None
+        while not self._frames.empty():
+            self._frames.get_nowait()
+        self._space = threading.Semaphore(self.prefetch)
+
+    #  CONSUMER API ---
+
+    def read(self):
+        """Next (frame, timestamp_s, index), or None when the source is exhausted."""
+        self.start()
+        while True:
+            item = self._frames.get()
+            if item is None:
+                self._frames.put(None) # Keep returning None
+                return None
+            self._space.release()
+            with self._lock:
+                if item[2] < self._skip_to: # Decoded before skip() was called
+                    continue
+                self._read_next = item[2] + 1
+            return item
+
+    def skip(self, n):
+        """Drops the next n frames (after earlier skips): prefetched ones are never returned,
+        the rest are grabbed but never decoded."""
+        with self._lock:
+            self._skip_to = max(self._skip_to, self._read_next) + n
+
+    def seek(self, index=None, time_s=None):
+        """Jumps to a frame index or timestamp (video files and image directories only)."""
+        if self.kind == 'camera':
+            raise ValueError("Cannot seek a live camera")
+        self._halt()
+        if self.kind == 'video':
+            if time_s is not None:
+                self.cap.set(cv2.CAP_PROP_POS_MSEC, time_s * 1000.0)
+            else:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            self._next_index = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+        else:
+            self._next_index = int(round(time_s * self.fps)) if time_s is not None else int(index)
+        self._fresh = True
+        with self._lock:
+            self._skip_to = self._read_next = self._next_index
+
+    def release(self):
+        self._halt()
+        if self.cap is not None:
+            self.cap.release()
@@ -0,0 +1,132 @@
+import itertools
+import multiprocessing as mp
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from model_registry import get_diffusion_pipeline
+
+# Parallel, resumable Stable Diffusion job engine for the synthetic dataset.
+# The prompt grid is enumerated once in a fixed order so every image keeps the
+# same ordinal filename across runs. Finished filenames are appended to a
+# manifest; a rerun only generates what is missing. Pending jobs are sharded
+# across worker processes, each worker sends several prompts through ONE pipe
+# call and hands the images to a saver thread while the next batch denoises.
+
+MANIFEST_NAME = "manifest.txt"
+BATCH_SIZE = 4
+NUM_WORKERS = 1
+BASE_SEED = 0
+
+
+#  PROMPT GRID ---
+
+def build_prompt_grid(bird_types, weather_conditions, viewpoints, distances, times_of_day):
+    """Returns one job dict per combination, in the original nested-loop order."""
+    jobs = []
+    combos = itertools.product(bird_types, weather_conditions, viewpoints, distances, times_of_day)
+    for index, (bird, weather, view, dist, tod) in enumerate(combos):
+        prompt = f"Photorealistic, {view}, single {bird} flying against {weather}, {dist}, {tod}"
+        # Example: Black_Kite_clear_blue_sky_seen_from_slightly_below_far_distance_midday_sun_000.png
+        parts = [s.replace(" ", "_") for s in (bird, weather, view, dist, tod)]
+        filename = "_".join(parts) + f"_{index:03d}.png"
+        jobs.append({'index': index, 'prompt': prompt, 'filename': filename})
+    return jobs
+
+
+#  MANIFEST ---
+
+def read_manifest(output_folder):
+    """Set of filenames already generated (listed in the manifest and present on disk)."""
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        names = {line.strip() for line in f if line.strip()}
+    return {name for name in names if os.path.exists(os.path.join(output_folder, name))}
+
+
+def append_manifest(output_folder, filenames):
+    # One short write per batch in append mode, safe with several worker processes
+    with open(os.path.join(output_folder, MANIFEST_NAME), 'a') as f:
+        f.write("".join(name + "\n" for name in filenames))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def pending_jobs(jobs, output_folder):
+    done = read_manifest(output_folder)
+    return [job for job in jobs if job['filename'] not in done]
+
+
+#  WORKER ---
+
+def save_images(images, jobs, output_folder):
+    """Writes each image to a temp file and renames it, then records the batch."""
+    for image, job in zip(images, jobs):
+        path = os.path.join(output_folder, job['filename'])
+        tmp_path = path + ".tmp"
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+    append_manifest(output_folder, [job['filename'] for job in jobs])
+    return len(jobs)
+
+
+def run_worker(worker_id, jobs, model_id, output_folder, batch_size=BATCH_SIZE,
+               num_inference_steps=30, torch_threads=None):
+    """Generates a shard of jobs; returns the number of images saved."""
+    import torch
+
+    if torch_threads:
+        torch.set_num_threads(torch_threads)
+    pipe = get_diffusion_pipeline(model_id) # Resident for later jobs in the same process
+    print(f"[worker {worker_id}] Model on {pipe.device}, {len(jobs)} images to generate.")
+
+    saved = 0
+    pending_save = None
+    with ThreadPoolExecutor(max_workers=1) as saver:
+        for start in range(0, len(jobs), batch_size):
+            batch = jobs[start:start + batch_size]
+            # Seed per grid index so a batched run reproduces single-prompt output
+            generators = [torch.Generator().manual_seed(BASE_SEED + job['index']) for job in batch]
+            try:
+                images = pipe([job['prompt'] for job in batch], num_inference_steps=num_inference_steps,
+                              generator=generators).images
+            except Exception as e:
+                print(f"[worker {worker_id}] ERROR generating batch starting at {batch[0]['filename']}: {e}")
+                continue
+
+            # Keep at most one save in flight; it runs while the next batch denoises
+            if pending_save is not None:
+                saved += pending_save.result()
+            pending_save = saver.submit(save_images, images, batch, output_folder)
+            print(f"[worker {worker_id}] Generated {start + len(batch)}/{len(jobs)}")
+        if pending_save is not None:
+            saved += pending_save.result()
+    return saved
+
+
+def _worker_entry(args):
+    return run_worker(*args)
+
+
+#  JOB RUNNER ---
+
+def run_generation(jobs, model_id, output_folder, num_workers=NUM_WORKERS, batch_size=BATCH_SIZE,
+                   num_inference_steps=30):
+    """Skips finished jobs, shards the rest over num_workers processes and returns images saved."""
+    os.makedirs(output_folder, exist_ok=True)
+    todo = pending_jobs(jobs, output_folder)
+    print(f"{len(jobs) - len(todo)}/{len(jobs)} images already done, {len(todo)} to generate.")
+    if not todo:
+        return 0
+
+    num_workers = max(1, min(num_workers, len(todo)))
+    if num_workers == 1:
+        return run_worker(0, todo, model_id, output_folder, batch_size, num_inference_steps)
+
+    # Round-robin shards keep every worker busy across bird types; split CPU threads between them
+    torch_threads = max(1, (os.cpu_count() or 1) // num_workers)
+    shards = [(w, todo[w::num_workers], model_id, output_folder, batch_size, num_inference_steps, torch_threads)
+              for w in range(num_workers)]
+    with mp.get_context("spawn").Pool(num_workers) as pool:
+        return sum(pool.map(_worker_entry, shards))
@@ -0,0 +1,188 @@
+import numpy as np
+
+from cpa import solve_cpa
+
+# Vectorized WGS84 / ECEF / NED / FRD conversions and mission validation.
+# All functions take (N, 3) arrays (or a single (3,) vector) so whole missions
+# and bird populations convert in one call.
+#   LLA: [latitude_deg, longitude_deg, altitude_m] on the WGS84 ellipsoid
+#   ECEF: Earth-centred Earth-fixed metres
+#   NED: local North-East-Down metres about a reference origin
+#   FRD: body Forward-Right-Down metres from the aircraft attitude
+
+WGS84_A = 6378137.0
+WGS84_F = 1.0 / 298.257223563
+WGS84_B = WGS84_A * (1.0 - WGS84_F)
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+WGS84_EP2 = WGS84_E2 / (1.0 - WGS84_E2)
+
+
+#  WGS84 <-> ECEF ---
+
+def lla_to_ecef(lla):
+    lla = np.asarray(lla, dtype=np.float64)
+    lat = np.radians(lla[..., 0])
+    lon = np.radians(lla[..., 1])
+    alt = lla[..., 2]
+    sin_lat = np.sin(lat)
+    cos_lat = np.cos(lat)
+    N = WGS84_A / np.sqrt(1.0 - WGS84_E2 * sin_lat * sin_lat)
+    return np.stack([(N + alt) * cos_lat * np.cos(lon),
+                     (N + alt) * cos_lat * np.sin(lon),
+                     (N * (1.0 - WGS84_E2) + alt) * sin_lat], axis=-1)
+
+
+def ecef_to_lla(ecef):
+    """Closed-form (Bowring) inverse, sub-millimetre for aviation altitudes."""
+    ecef = np.asarray(ecef, dtype=np.float64)
+    x, y, z = ecef[..., 0], ecef[..., 1], ecef[..., 2]
+    p = np.hypot(x, y)
+    theta = np.arctan2(z * WGS84_A, p * WGS84_B)
+    lat = np.arctan2(z + WGS84_EP2 * WGS84_B * np.sin(theta) ** 3,
+                     p - WGS84_E2 * WGS84_A * np.cos(theta) ** 3)
+    lon = np.arctan2(y, x)
+    sin_lat = np.sin(lat)
+    N = WGS84_A / np.sqrt(1.0 - WGS84_E2 * sin_lat * sin_lat)
+    # Near the poles cos(lat) -> 0, so use the z-based height formula there
+    cos_lat = np.cos(lat)
+    polar = np.abs(cos_lat) < 1e-10
+    alt = np.where(polar, np.abs(z) / np.where(polar, np.abs(sin_lat), 1.0) - N * (1.0 - WGS84_E2),
+                   p / np.where(polar, 1.0, cos_lat) - N)
+    return np.stack([np.degrees(lat), np.degrees(lon), alt], axis=-1)
+
+
+#  ECEF <-> local NED ---
+
+def ecef_to_ned_rotation(lat_deg, lon_deg):
+    """Rotation matrix taking ECEF vectors into the NED frame at (lat, lon)."""
+    lat = np.radians(lat_deg)
+    lon = np.radians(lon_deg)
+    sl, cl = np.sin(lat), np.cos(lat)
+    so, co = np.sin(lon), np.cos(lon)
+    return np.array([[-sl * co, -sl * so, cl],
+                     [-so, co, 0.0],
+                     [-cl * co, -cl * so, -sl]])
+
+
+class LocalNED:
+    """Local NED frame about a fixed origin; the origin rotation is computed once."""
+
+    def __init__(self, origin_lla):
+        self.origin_lla = np.asarray(origin_lla, dtype=np.float64)
+        self.origin_ecef = lla_to_ecef(self.origin_lla)
+        self.R_ne = ecef_to_ned_rotation(self.origin_lla[0], self.origin_lla[1])
+
+    def ecef_to_ned(self, ecef):
+        return (np.asarray(ecef, dtype=np.float64) - self.origin_ecef) @ self.R_ne.T
+
+    def ned_to_ecef(self, ned):
+        return np.asarray(ned, dtype=np.float64) @ self.R_ne + self.origin_ecef
+
+    def lla_to_ned(self, lla):
+        return self.ecef_to_ned(lla_to_ecef(lla))
+
+    def ned_to_lla(self, ned):
+        return ecef_to_lla(self.ned_to_ecef(ned))
+
+    def vel_ecef_to_ned(self, vel):
+        return np.asarray(vel, dtype=np.float64) @ self.R_ne.T
+
+
+#  NED <-> FRD ---
+
+def attitude_rotation(roll, pitch, yaw):
+    """(..., 3, 3) body-to-NED rotation from ZYX Euler angles in radians."""
+    roll, pitch, yaw = np.broadcast_arrays(np.asarray(roll, dtype=np.float64),
+                                           np.asarray(pitch, dtype=np.float64),
+                                           np.asarray(yaw, dtype=np.float64))
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    R = np.empty(roll.shape + (3, 3))
+    R[..., 0, 0] = cy * cp
+    R[..., 0, 1] = cy * sp * sr - sy * cr
+    R[..., 0, 2] = cy * sp * cr + sy * sr
+    R[..., 1, 0] = sy * cp
+    R[..., 1, 1] = sy * sp * sr + cy * cr
+    R[..., 1, 2] = sy * sp * cr - cy * sr
+    R[..., 2, 0] = -sp
+    R[..., 2, 1] = cp * sr
+    R[..., 2, 2] = cp * cr
+    return R
+
+
+def ned_to_frd(ned, roll, pitch, yaw, origin_ned=None):
+    """Expresses NED points in the aircraft FRD frame (relative to origin_ned if given).
+
+    roll/pitch/yaw are scalars for one attitude, or (N,) arrays for one per point.
+    """
+    ned = np.asarray(ned, dtype=np.float64)
+    if origin_ned is not None:
+        ned = ned - origin_ned
+    R = attitude_rotation(roll, pitch, yaw)
+    if R.ndim == 2:
+        return ned @ R # R^T applied to every row
+    return np.einsum('nji,nj->ni', R, ned)
+
+
+def frd_to_ned(frd, roll, pitch, yaw, origin_ned=None):
+    frd = np.asarray(frd, dtype=np.float64)
+    R = attitude_rotation(roll, pitch, yaw)
+    ned = frd @ R.T if R.ndim == 2 else np.einsum('nij,nj->ni', R, frd)
+    if origin_ned is not None:
+        ned = ned + origin_ned
+    return ned
+
+
+#  MISSION VALIDATION ---
+
+def mission_legs(waypoints_ned, speed_mps, start_time=0.0):
+    """Returns (leg_start, leg_vel, t_begin, t_end) arrays for a waypoint list flown at speed."""
+    waypoints_ned = np.asarray(waypoints_ned, dtype=np.float64)
+    delta = np.diff(waypoints_ned, axis=0)
+    length = np.linalg.norm(delta, axis=1)
+    speed = np.broadcast_to(np.asarray(speed_mps, dtype=np.float64), length.shape)
+    duration = length / speed
+    t_end = start_time + np.cumsum(duration)
+    t_begin = t_end - duration
+    leg_vel = delta / np.where(duration > 0, duration, 1.0)[:, None]
+    return waypoints_ned[:-1], leg_vel, t_begin, t_end
+
+
+def validate_mission(waypoints_lla, speed_mps, bird_pos_ned, bird_vel_ned, ned_frame, threshold_m, start_time=0.0):
+    """Checks every waypoint leg against every tracked bird with one batched CPA.
+
+    Birds are extrapolated at constant velocity from start_time. Returns a dict
+    with per-leg 'conflict' flags, the earliest 'time_to_impact', the closest
+    'min_distance', the offending 'bird_index' (-1 if none) and overall 'valid'.
+    """
+    waypoints_ned = ned_frame.lla_to_ned(waypoints_lla)
+    leg_start, leg_vel, t_begin, t_end = mission_legs(waypoints_ned, speed_mps, start_time)
+
+    # Aircraft on leg m at mission time t: leg_start + leg_vel * (t - t_begin),
+    # expressed as a straight line through mission time zero for solve_cpa.
+    virtual_start = leg_start - leg_vel * t_begin[:, None]
+    bird_start = np.asarray(bird_pos_ned, dtype=np.float64) - np.asarray(bird_vel_ned, dtype=np.float64) * start_time
+
+    is_collision, t_impact, min_dist, _ = solve_cpa(virtual_start, leg_vel, bird_start, bird_vel_ned,
+                                                    max_time=t_end, threshold=threshold_m, start_time=t_begin)
+
+    n_legs = len(leg_start)
+    if is_collision.shape[0] == 0:
+        return {'valid': True, 'conflict': np.zeros(n_legs, dtype=bool),
+                'time_to_impact': np.full(n_legs, np.inf), 'min_distance': np.full(n_legs, np.inf),
+                'bird_index': np.full(n_legs, -1), 't_begin': t_begin, 't_end': t_end}
+
+    conflict = is_collision.any(axis=0)
+    first_bird = np.argmin(t_impact, axis=0)
+    closest_bird = np.argmin(min_dist, axis=0)
+    legs = np.arange(n_legs)
+    return {
+        'valid': not conflict.any(),
+        'conflict': conflict,
+        'time_to_impact': t_impact[first_bird, legs],
+        'min_distance': min_dist[closest_bird, legs],
+        'bird_index': np.where(conflict, first_bird, -1),
+        't_begin': t_begin,
+        't_end': t_end,
+    }
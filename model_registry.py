@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+# Process-wide registry of heavyweight models (YOLO detectors, diffusion
+# pipelines, detector backends). Each model is loaded lazily on first use,
+# kept resident and handed back on every later call, so scripts, pipeline
+# runs and generation jobs in the same process never load it twice.
+# Diffusion weights are cached under MODEL_CACHE_DIR and read as safetensors,
+# which are memory-mapped instead of unpickled into fresh buffers.
+
+MODEL_CACHE_DIR = os.environ.get('EAGLE_EYE_MODEL_CACHE', 'model_cache')
+
+_models = {}
+_load_times = {}
+_lock = threading.RLock() # Re-entrant: a backend load fetches its YOLO model through the registry
+
+
+def get_model(key, loader):
+    """Returns the resident model for key, calling loader() on first use only."""
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _lock:
+        if key not in _models:
+            start = time.perf_counter()
+            _models[key] = loader()
+            _load_times[key] = time.perf_counter() - start
+            print(f"[model_registry] Loaded {key[0]} '{key[1]}' in {_load_times[key]:.2f} s")
+        return _models[key]
+
+
+def load_report():
+    """{(kind, name, ...): load seconds} for every model loaded in this process."""
+    return dict(_load_times)
+
+
+def clear():
+    with _lock:
+        _models.clear()
+        _load_times.clear()
+
+
+#  DETECTORS ---
+
+def get_yolo(model_path='yolov8n.pt'):
+    def load():
+        from ultralytics import YOLO
+        return YOLO(model_path)
+    return get_model(('yolo', model_path), load)
+
+
+def get_backend(kind, model_path, **kwargs):
+    """Loaded detector_backends backend, shared per (kind, path, options)."""
+    from detector_backends import create_backend
+    key = ('backend', model_path, kind) + tuple(sorted(kwargs.items()))
+    return get_model(key, lambda: create_backend(kind, model_path, **kwargs))
+
+
+#  DIFFUSION ---
+
+def get_diffusion_pipeline(model_id, cache_dir=MODEL_CACHE_DIR):
+    """Stable Diffusion pipeline on the best device, loaded from the local cache when present."""
+    def load():
+        import torch
+        from diffusers import StableDiffusionPipeline
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        dtype = torch.float32 if device == "cpu" else torch.float16
+        kwargs = dict(torch_dtype=dtype, cache_dir=cache_dir, use_safetensors=True, low_cpu_mem_usage=True)
+        try:
+            # Skip the hub round-trip when the weights are already cached (offline reboots)
+            pipe = StableDiffusionPipeline.from_pretrained(model_id, local_files_only=True, **kwargs)
+        except (OSError, ValueError):
+            print(f"[model_registry] {model_id} not in {cache_dir}, downloading...")
+            pipe = StableDiffusionPipeline.from_pretrained(model_id, **kwargs)
+        return pipe.to(device) if device != "cpu" else pipe
+    return get_model(('diffusion', model_id, cache_dir), load)
@@ -0,0 +1,133 @@
+import numpy as np
+import cv2
+
+from detections import empty_detections
+from tiled_inference import detect_tiles
+
+# Cheap pre-detection gate: decide per frame whether YOLO needs to run at all,
+# and on which regions. Works on a downscaled grayscale copy of the frame:
+#   motion  - difference against a running-average background
+#   sky     - smooth (low-gradient) regions, closed so bird-sized holes are filled
+#   anomaly - textured pixels inside the closed sky mask (a bird even if it hovers)
+# Candidate blobs in the sky, plus track-predicted positions, become fixed-size
+# square tiles that are detected as one batch. Every refresh_interval frames
+# (or when the tiles would cover most of the frame) the full frame is used.
+
+SCALE = 0.25 # Downscale factor for the gating masks
+DIFF_THRESHOLD = 18 # Grey levels above the background that count as motion
+BG_ALPHA = 0.05 # Running-average background update rate
+SKY_GRAD_THRESHOLD = 24 # |dx| + |dy| below this is smooth sky
+SKY_CLOSE_PX = 9 # Closing kernel (small-frame px), larger than a bird blob
+MIN_BLOB_PX = 2 # Smallest candidate blob area (small-frame px)
+TILE_SIZE = 320 # Crop side in full-resolution px (multiple of 32)
+REFRESH_INTERVAL = 30 # Full-frame detection at least this often
+MAX_COVERAGE = 0.5 # Above this tile/frame area ratio, run the full frame instead
+
+
+class RoiGate:
+    """Per-camera gating state (background model and counters)."""
+
+    def __init__(self, scale=SCALE, tile_size=TILE_SIZE, refresh_interval=REFRESH_INTERVAL,
+                 diff_threshold=DIFF_THRESHOLD, max_coverage=MAX_COVERAGE, max_tiles=None):
+        self.scale = scale
+        self.tile_size = tile_size
+        self.refresh_interval = refresh_interval
+        self.diff_threshold = diff_threshold
+        self.max_coverage = max_coverage
+        self.max_tiles = max_tiles # More tiles than this run the full frame (fixed-size graphs: 1)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (SKY_CLOSE_PX, SKY_CLOSE_PX))
+        self.background = None
+        self._small = None
+        self.frame_idx = 0
+        self.stats = {'full': 0, 'roi': 0, 'skipped': 0, 'tiles': 0}
+
+    def candidate_mask(self, frame):
+        """Returns the downscaled uint8 mask of pixels worth checking."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        h, w = gray.shape
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        if self._small is None or self._small.shape != (size[1], size[0]):
+            self._small = np.empty((size[1], size[0]), dtype=np.uint8)
+            self.background = None
+        small = cv2.resize(gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+
+        # --- Motion against the running background ---
+        if self.background is None:
+            self.background = small.astype(np.float32)
+            motion = np.zeros_like(small, dtype=bool)
+        else:
+            motion = cv2.absdiff(small, cv2.convertScaleAbs(self.background)) > self.diff_threshold
+            cv2.accumulateWeighted(small, self.background, BG_ALPHA)
+
+        # --- Sky mask: smooth regions with bird-sized holes closed ---
+        grad = cv2.add(cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 1, 0)),
+                       cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 0, 1)))
+        smooth = (grad < SKY_GRAD_THRESHOLD).astype(np.uint8)
+        sky = cv2.morphologyEx(smooth, cv2.MORPH_CLOSE, self.kernel).astype(bool)
+
+        anomaly = sky & (smooth == 0)
+        return ((motion | anomaly) & sky).astype(np.uint8)
+
+    def _tiles_for(self, boxes, frame_shape):
+        """Covers (N, 4) full-res boxes with square tiles; a box inside an existing tile adds nothing."""
+        h, w = frame_shape[:2]
+        tiles = []
+        for x1, y1, x2, y2 in boxes[np.argsort(-(boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]))].tolist():
+            if any(t[0] <= x1 and t[1] <= y1 and x2 <= t[2] and y2 <= t[3] for t in tiles):
+                continue
+            side_x = min(max(self.tile_size, x2 - x1), w)
+            side_y = min(max(self.tile_size, y2 - y1), h)
+            tx = int(np.clip((x1 + x2 - side_x) / 2.0, 0, w - side_x))
+            ty = int(np.clip((y1 + y2 - side_y) / 2.0, 0, h - side_y))
+            tiles.append((tx, ty, tx + int(side_x), ty + int(side_y)))
+        return np.array(tiles, dtype=np.int32).reshape(-1, 4)
+
+    def propose(self, frame, track_uv=None):
+        """Returns (T, 4) tiles to detect on, an empty array to skip, or None for the full frame."""
+        mask = self.candidate_mask(frame)
+        refresh = self.frame_idx % self.refresh_interval == 0
+        self.frame_idx += 1
+
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        blobs = stats[1:][stats[1:, cv2.CC_STAT_AREA] >= MIN_BLOB_PX]
+        boxes = np.empty((len(blobs), 4))
+        boxes[:, 0] = blobs[:, cv2.CC_STAT_LEFT]
+        boxes[:, 1] = blobs[:, cv2.CC_STAT_TOP]
+        boxes[:, 2] = blobs[:, cv2.CC_STAT_LEFT] + blobs[:, cv2.CC_STAT_WIDTH]
+        boxes[:, 3] = blobs[:, cv2.CC_STAT_TOP] + blobs[:, cv2.CC_STAT_HEIGHT]
+        boxes /= self.scale
+
+        # Where the tracker expects birds this frame (point boxes)
+        if track_uv is not None and len(track_uv):
+            track_uv = np.asarray(track_uv, dtype=np.float64)
+            boxes = np.vstack([boxes, np.hstack([track_uv, track_uv])])
+
+        if refresh:
+            self.stats['full'] += 1
+            return None
+        if len(boxes) == 0:
+            self.stats['skipped'] += 1
+            return np.empty((0, 4), dtype=np.int32)
+
+        tiles = self._tiles_for(boxes, frame.shape)
+        area = np.prod(tiles[:, 2:] - tiles[:, :2], axis=1).sum()
+        too_many = self.max_tiles is not None and len(tiles) > self.max_tiles
+        if too_many or area > self.max_coverage * frame.shape[0] * frame.shape[1]:
+            self.stats['full'] += 1
+            return None
+        self.stats['roi'] += 1
+        self.stats['tiles'] += len(tiles)
+        return tiles
+
+
+def detect_gated(backend, gate, frame, track_uv=None, full_detect=None):
+    """Gate, then detect on the full frame, on tiles, or not at all.
+
+    full_detect(frame) replaces backend.detect for full-frame passes (e.g. sliced inference).
+    """
+    tiles = gate.propose(frame, track_uv)
+    if tiles is None:
+        return full_detect(frame) if full_detect is not None else backend.detect(frame)
+    if len(tiles) == 0:
+        return empty_detections()
+    return detect_tiles(backend, frame, tiles, gate.tile_size)
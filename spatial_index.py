@@ -0,0 +1,137 @@
+import numpy as np
+
+# Ownship-relative threat culling.
+# Tracked birds are binned into a uniform world-frame grid (cell keys sorted
+# once per frame). A bird flying at most MAX_BIRD_SPEED_MPS can only get within
+# the collision threshold during the horizon if it is already inside the
+# capsule swept by the aircraft: the segment from its position to its position
+# after `horizon` seconds, inflated by threshold + MAX_BIRD_SPEED_MPS * horizon.
+# Only the grid cells along that capsule are visited, and only the birds in
+# them (plus any track faster than the bound) go on to a full CPA solve.
+
+MAX_BIRD_SPEED_MPS = 40.0 # Level flight of fast birds; dives are faster but not toward the corridor for long
+CELL_SIZE_M = 500.0 # About the corridor radius at the default 100 m threshold and 10 s horizon
+_BITS = 21 # Per-axis cell coordinate bits in the packed int64 key
+_OFFSET = 1 << (_BITS - 1)
+
+
+def cell_keys(cells):
+    """Packs (N, 3) integer cell coordinates into sortable int64 keys."""
+    c = (np.asarray(cells, dtype=np.int64) + _OFFSET) & ((1 << _BITS) - 1)
+    return (c[:, 0] << (2 * _BITS)) | (c[:, 1] << _BITS) | c[:, 2]
+
+
+def expand_ranges(lo, counts):
+    """Concatenation of the index ranges [lo, lo + count) without a Python loop."""
+    starts = np.repeat(lo - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts)
+    return starts + np.arange(counts.sum())
+
+
+def capsule_cells(start, end, radius, cell_size=CELL_SIZE_M):
+    """Sorted keys of every cell that intersects the capsule of the given radius around start-end."""
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    # Sample the segment at most one cell apart; every point of the capsule is
+    # then within radius + cell / 2 of a sample, i.e. within `reach` cells of it
+    steps = max(1, int(np.ceil(np.linalg.norm(end - start) / cell_size)))
+    samples = start + np.linspace(0.0, 1.0, steps + 1)[:, None] * (end - start)
+    reach = int(np.ceil((radius + 0.5 * cell_size) / cell_size))
+    r = np.arange(-reach, reach + 1)
+    offsets = np.stack(np.meshgrid(r, r, r, indexing='ij'), axis=-1).reshape(-1, 3)
+    base = np.floor(samples / cell_size).astype(np.int64)
+    return np.unique(cell_keys((base[:, None, :] + offsets[None]).reshape(-1, 3)))
+
+
+def segment_distance(points, start, end):
+    """Distance from (N, 3) points to the segment start-end."""
+    d = end - start
+    length_sq = float(d @ d)
+    if length_sq == 0.0:
+        return np.linalg.norm(points - start, axis=1)
+    s = np.clip((points - start) @ d / length_sq, 0.0, 1.0)
+    return np.linalg.norm(points - (start + s[:, None] * d), axis=1)
+
+
+class UniformGrid:
+    """Uniform hash grid over N world positions, rebuilt every frame.
+
+    rebuild() sorts the points by cell key; when the point set is the same
+    size as last frame the previous order is the starting permutation, so the
+    (stable, adaptive) sort is near linear when few birds changed cell.
+    """
+
+    def __init__(self, cell_size=CELL_SIZE_M):
+        self.cell_size = cell_size
+        self.positions = np.zeros((0, 3))
+        self.order = np.zeros(0, dtype=np.intp)
+        self.sorted_keys = np.zeros(0, dtype=np.int64)
+
+    def rebuild(self, positions):
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        keys = cell_keys(np.floor(positions / self.cell_size))
+        order = self.order if len(self.order) == len(positions) else np.arange(len(positions))
+        order = order[np.argsort(keys[order], kind='stable')]
+        self.positions = positions
+        self.order = order
+        self.sorted_keys = keys[order]
+        return self
+
+    def points_in_cells(self, keys):
+        """Indices of the points stored in any of the given (unique) cell keys."""
+        lo = np.searchsorted(self.sorted_keys, keys, side='left')
+        hi = np.searchsorted(self.sorted_keys, keys, side='right')
+        return self.order[expand_ranges(lo, hi - lo)]
+
+    def query_capsule(self, start, end, radius):
+        """Indices of points within radius of the segment start-end."""
+        if len(self.positions) == 0:
+            return np.zeros(0, dtype=np.intp)
+        start = np.asarray(start, dtype=np.float64)
+        end = np.asarray(end, dtype=np.float64)
+        candidates = self.points_in_cells(capsule_cells(start, end, radius, self.cell_size))
+        inside = segment_distance(self.positions[candidates], start, end) <= radius
+        return np.sort(candidates[inside])
+
+
+def corridor_candidates(grid, aircraft_pos, aircraft_vel, bird_vel, horizon, threshold,
+                        max_bird_speed=MAX_BIRD_SPEED_MPS, margin=0.0):
+    """Tracks (indices into the grid's positions) that need a full CPA against one aircraft state.
+
+    bird_vel is (N, 3) or one (3,) velocity for every track; tracks faster than
+    max_bird_speed are always kept so the culling never hides a fast mover.
+    margin widens the corridor, e.g. by how far a turning ownship strays from the straight line.
+    """
+    return _corridor(grid, aircraft_pos, aircraft_vel, _fast_tracks(grid, bird_vel, max_bird_speed), horizon,
+                     threshold + margin, max_bird_speed)
+
+
+def _fast_tracks(grid, bird_vel, max_bird_speed):
+    """Tracks whose velocity exceeds the speed bound the corridor radius assumes."""
+    v = np.broadcast_to(bird_vel, grid.positions.shape)
+    speed_sq = np.einsum('ij,ij->i', v, v)
+    return np.flatnonzero(speed_sq > max_bird_speed ** 2)
+
+
+def _corridor(grid, aircraft_pos, aircraft_vel, fast, horizon, threshold, max_bird_speed):
+    aircraft_pos = np.asarray(aircraft_pos, dtype=np.float64)
+    end = aircraft_pos + np.asarray(aircraft_vel, dtype=np.float64) * horizon
+    inside = grid.query_capsule(aircraft_pos, end, threshold + max_bird_speed * horizon)
+    return np.union1d(inside, fast) if len(fast) else inside
+
+
+def corridor_candidates_multi(grid, aircraft_pos, aircraft_vel, bird_vel, horizon, threshold,
+                              max_bird_speed=MAX_BIRD_SPEED_MPS):
+    """(bird_idx, aircraft_idx) candidate pairs for M aircraft states, e.g. ownship hypotheses or mission legs.
+
+    Returns two aligned index arrays; horizon may be a scalar or (M,).
+    """
+    aircraft_pos = np.atleast_2d(aircraft_pos)
+    aircraft_vel = np.atleast_2d(aircraft_vel)
+    horizon = np.broadcast_to(horizon, len(aircraft_pos))
+    fast = _fast_tracks(grid, bird_vel, max_bird_speed)
+    birds, aircraft = [], []
+    for m in range(len(aircraft_pos)):
+        c = _corridor(grid, aircraft_pos[m], aircraft_vel[m], fast, horizon[m], threshold, max_bird_speed)
+        birds.append(c)
+        aircraft.append(np.full(len(c), m, dtype=np.intp))
+    return np.concatenate(birds), np.concatenate(aircraft)
@@ -1,71 +1,39 @@
 import os
-import random
-import shutil
-from tqdm import tqdm 
+
+from dataset_index import build_index, load_class_names, materialize_split, split_files
 
 # Path to the folder containing  original images
 source_image_folder = "eagle_eye_dataset"
-# Path to the folder containing original .txt labels
+# Path to the folder containing original .txt labels (YOLO txt or Pascal VOC XML)
 source_label_folder = "labels"
 # Path to the base output folder where train/val will be created
 output_base_folder = "dataset"
 # Desired split ratio (e.g., 0.8 means 80% train, 20% validation)
 train_split_ratio = 0.8
+# Same seed -> same split every run (stratified by bird type, weather and distance)
+split_seed = 0
+# 'hardlink' (falls back to symlink/copy across filesystems) or 'symlink'
+link_mode = 'hardlink'
 
-train_img_dir = os.path.join(output_base_folder, "images", "train")
-val_img_dir = os.path.join(output_base_folder, "images", "val")
-train_lbl_dir = os.path.join(output_base_folder, "labels", "train")
-val_lbl_dir = os.path.join(output_base_folder, "labels", "val")
-
-os.makedirs(train_img_dir, exist_ok=True)
-os.makedirs(val_img_dir, exist_ok=True)
-os.makedirs(train_lbl_dir, exist_ok=True)
-os.makedirs(val_lbl_dir, exist_ok=True)
-print("Created output directories.")
+# --- Index labels (parsed once, cached and re-parsed only when modified) ---
+class_names = load_class_names('data.yaml')
+index = build_index(source_label_folder, class_names)
 
 # Assume image files are .png and labels are .txt
 # List all image files
-all_images = [f for f in os.listdir(source_image_folder) if f.lower().endswith('.png')]
-# Shuffle the list randomly
-random.shuffle(all_images)
-print(f"Found {len(all_images)} images.")
-
-# Calculate split index
-split_index = int(len(all_images) * train_split_ratio)
+with os.scandir(source_image_folder) as it:
+    image_names = {os.path.splitext(e.name)[0]: e.path for e in it if e.name.lower().endswith('.png')}
+print(f"Found {len(image_names)} images.")
 
-# Split into training and validation lists
-train_files = all_images[:split_index]
-val_files = all_images[split_index:]
+# --- Deterministic stratified split ---
+train_files, val_files = split_files(list(image_names), train_split_ratio, split_seed)
 print(f"Splitting into {len(train_files)} training files and {len(val_files)} validation files.")
 
-# --- Copy Files ---
-print("\nCopying training files...")
-for filename in tqdm(train_files, desc="Training Set"):
-    base_name = os.path.splitext(filename)[0]
-    # Copy image
-    shutil.copy(os.path.join(source_image_folder, filename),
-                os.path.join(train_img_dir, filename))
-    # Copy corresponding label
-    label_filename = base_name + ".txt"
-    label_src_path = os.path.join(source_label_folder, label_filename)
-    if os.path.exists(label_src_path):
-         shutil.copy(label_src_path, os.path.join(train_lbl_dir, label_filename))
-    else:
-         print(f"Warning: Label file not found for training image {filename}")
-
-
-print("\nCopying validation files...")
-for filename in tqdm(val_files, desc="Validation Set"):
-    base_name = os.path.splitext(filename)[0]
-    # Copy image
-    shutil.copy(os.path.join(source_image_folder, filename),
-                os.path.join(val_img_dir, filename))
-    # Copy corresponding label
-    label_filename = base_name + ".txt"
-    label_src_path = os.path.join(source_label_folder, label_filename)
-    if os.path.exists(label_src_path):
-         shutil.copy(label_src_path, os.path.join(val_lbl_dir, label_filename))
-    else:
-         print(f"Warning: Label file not found for validation image {filename}")
+# --- Link Files ---
+print(f"\nLinking files into {output_base_folder} ({link_mode})...")
+missing = materialize_split({'train': train_files, 'val': val_files}, image_names, index,
+                            source_label_folder, output_base_folder, link_mode)
+if missing:
+    print(f"Warning: {missing} images have no label file")
 
-print("\nDataset splitting complete.")
\ No newline at end of file
+print("\nDataset splitting complete.")
@@ -0,0 +1,58 @@
+import numpy as np
+
+from assignment import assign_pairs
+
+# Stereo correspondence between left/right detections of rectified cameras.
+# A true pair lies on (nearly) the same image row and has a positive disparity
+# u_left - u_right within [min_disparity, max_disparity].
+
+ROW_TOL_PX = 4.0          # Epipolar band half-height in pixels
+MIN_DISPARITY_PX = 0.5
+MAX_DISPARITY_PX = 70.0   # f * B / Z_min  (700 * 0.5 / 5 m)
+SIZE_WEIGHT = 0.5         # Weight of the box-size mismatch term in the cost
+
+
+def candidate_pairs(left_xywh, right_xywh, row_tol=ROW_TOL_PX,
+                    min_disparity=MIN_DISPARITY_PX, max_disparity=MAX_DISPARITY_PX):
+    """Returns (left_idx, right_idx, cost) for all pairs inside the epipolar band.
+
+    Right boxes are sorted by row once so each left box only looks at the
+    slice of right boxes within +-row_tol (no all-pairs comparison).
+    """
+    left_xywh = np.asarray(left_xywh, dtype=np.float64)
+    right_xywh = np.asarray(right_xywh, dtype=np.float64)
+    if len(left_xywh) == 0 or len(right_xywh) == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0)
+
+    # --- Spatial pre-filter: row band via sorted right rows ---
+    order = np.argsort(right_xywh[:, 1], kind='stable')
+    right_rows = right_xywh[order, 1]
+    lo = np.searchsorted(right_rows, left_xywh[:, 1] - row_tol, side='left')
+    hi = np.searchsorted(right_rows, left_xywh[:, 1] + row_tol, side='right')
+    counts = hi - lo
+
+    # Expand the [lo, hi) windows into flat candidate index arrays
+    left_idx = np.repeat(np.arange(len(left_xywh)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    right_idx = order[np.repeat(lo, counts) + offsets]
+
+    # --- Disparity range gate ---
+    L = left_xywh[left_idx]
+    R = right_xywh[right_idx]
+    disparity = L[:, 0] - R[:, 0]
+    keep = (disparity >= min_disparity) & (disparity <= max_disparity)
+    left_idx, right_idx, L, R = left_idx[keep], right_idx[keep], L[keep], R[keep]
+
+    # --- Cost: row offset (in bands) plus log size ratio ---
+    cost = np.abs(L[:, 1] - R[:, 1]) / max(row_tol, 1e-6)
+    cost += SIZE_WEIGHT * (np.abs(np.log(L[:, 2] / R[:, 2])) + np.abs(np.log(L[:, 3] / R[:, 3])))
+    return left_idx, right_idx, cost
+
+
+def match_stereo(left_xywh, right_xywh, row_tol=ROW_TOL_PX, min_disparity=MIN_DISPARITY_PX,
+                 max_disparity=MAX_DISPARITY_PX, method='hungarian'):
+    """Associates left/right boxes; returns matched (left_idx, right_idx) arrays."""
+    left_idx, right_idx, cost = candidate_pairs(left_xywh, right_xywh, row_tol,
+                                                min_disparity, max_disparity)
+    return assign_pairs(left_idx, right_idx, cost, method)
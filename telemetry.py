@@ -0,0 +1,282 @@
+import json
+import os
+import struct
+import threading
+
+import numpy as np
+
+# Low-overhead flight telemetry.
+# The processing loop appends fixed-dtype NumPy records (detections, tracks,
+# CPA results, alerts, stage timings) to preallocated per-stream ring buffers;
+# a background writer drains them to one binary log file. Nothing in the hot
+# path touches stdout or the disk, and a full ring drops its oldest unflushed
+# rows (counted in `dropped`) rather than blocking.
+#
+# File layout: MAGIC, u32 header length, JSON header (stream dtypes + run
+# metadata), then chunks of [u32 stream id, u32 rows, raw little-endian rows].
+
+MAGIC = b'EETLM1\n'
+TELEMETRY_DIR = os.environ.get('EAGLE_EYE_TELEMETRY_DIR', 'telemetry') # Where the scripts put their logs
+RING_CAPACITY = 1 << 16 # Rows per stream
+FLUSH_INTERVAL_S = 0.5
+STAGE_NAMES = ('capture', 'inference', 'assessment', 'frame_to_alert')
+
+STREAMS = {
+    'frame': np.dtype([('frame', '<i4'), ('timestamp', '<f8'), ('detections', '<i4'), ('tracks', '<i4'),
+                       ('skipped', 'u1'), ('level', 'u1')]),
+    'detection': np.dtype([('frame', '<i4'), ('timestamp', '<f8'), ('x1', '<f4'), ('y1', '<f4'),
+                           ('x2', '<f4'), ('y2', '<f4'), ('conf', '<f4'), ('cls', '<i2')]),
+    'track': np.dtype([('frame', '<i4'), ('timestamp', '<f8'), ('track_id', '<i8'), ('cls', '<i2'),
+                       ('px', '<f4'), ('py', '<f4'), ('pz', '<f4'), ('vx', '<f4'), ('vy', '<f4'), ('vz', '<f4')]),
+    'cpa': np.dtype([('frame', '<i4'), ('timestamp', '<f8'), ('track_id', '<i8'), ('collision', 'u1'),
+                     ('tti', '<f4'), ('min_dist', '<f4'), ('t_cpa', '<f4'), ('p_collision', '<f4')]),
+    'alert': np.dtype([('frame', '<i4'), ('timestamp', '<f8'), ('track_id', '<i8'), ('cls', '<i2'),
+                       ('tti', '<f4'), ('min_dist', '<f4'), ('p_collision', '<f4')]),
+    'stage': np.dtype([('frame', '<i4'), ('stage', 'u1'), ('ms', '<f4')]),
+}
+STREAM_IDS = {name: i for i, name in enumerate(STREAMS)}
+
+
+class Ring:
+    """Preallocated record ring; rows beyond capacity overwrite the oldest unflushed ones."""
+
+    def __init__(self, dtype, capacity=RING_CAPACITY):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        self.head = 0 # Rows ever written
+        self.tail = 0 # Rows ever flushed (or dropped)
+        self.dropped = 0
+
+    def push(self, rows):
+        n = len(rows)
+        if n > self.capacity:
+            rows = rows[-self.capacity:]
+            self.head += n - self.capacity # Counted as dropped below
+            n = self.capacity
+        start = self.head % self.capacity
+        first = min(n, self.capacity - start)
+        self.data[start:start + first] = rows[:first]
+        self.data[:n - first] = rows[first:]
+        self.head += n
+        overrun = self.head - self.tail - self.capacity
+        if overrun > 0:
+            self.dropped += overrun
+            self.tail += overrun
+
+    def drain(self):
+        """Copies out every unflushed row in order."""
+        n = self.head - self.tail
+        start = self.tail % self.capacity
+        first = min(n, self.capacity - start)
+        rows = np.concatenate([self.data[start:start + first], self.data[:n - first]])
+        self.tail = self.head
+        return rows
+
+    def pending(self):
+        return self.head - self.tail
+
+
+class Telemetry:
+    """Records per-frame events and streams them to a log file on a background thread.
+
+    meta is any JSON-serialisable dict saved in the file header (e.g. class
+    names and config). echo_alerts prints alerts from the writer thread, so
+    operators still see them without the hot loop waiting on stdout.
+    """
+
+    def __init__(self, path, meta=None, capacity=RING_CAPACITY, flush_interval=FLUSH_INTERVAL_S, echo_alerts=False):
+        self.path = path
+        self.meta = meta or {}
+        self.echo_alerts = echo_alerts
+        self.flush_interval = flush_interval
+        self.rings = {name: Ring(dtype, capacity) for name, dtype in STREAMS.items()}
+        self.rows_written = {name: 0 for name in STREAMS}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = json.dumps({'streams': {name: {'id': STREAM_IDS[name], 'descr': dtype.descr}
+                                         for name, dtype in STREAMS.items()},
+                             'stages': STAGE_NAMES, 'meta': self.meta}).encode()
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + struct.pack('<I', len(header)) + header)
+        self._thread = threading.Thread(target=self._run, name='telemetry-writer', daemon=True)
+        self._thread.start()
+
+    #  RECORDING (hot path) ---
+
+    def log(self, stream, rows):
+        """Appends a structured array of the stream's dtype."""
+        ring = self.rings[stream]
+        with self._lock:
+            ring.push(rows)
+            if ring.pending() > ring.capacity // 2:
+                self._wake.set()
+
+    def frame(self, frame_idx, timestamp, detections, tracks, skipped=False, level=0):
+        rows = np.zeros(1, dtype=STREAMS['frame'])
+        rows[0] = (frame_idx, timestamp, detections, tracks, skipped, level)
+        self.log('frame', rows)
+
+    def detections(self, frame_idx, timestamp, dets):
+        """dets: a detections.py structured array."""
+        rows = np.empty(len(dets), dtype=STREAMS['detection'])
+        rows['frame'] = frame_idx
+        rows['timestamp'] = timestamp
+        for name in ('x1', 'y1', 'x2', 'y2', 'conf', 'cls'):
+            rows[name] = dets[name]
+        self.log('detection', rows)
+
+    def tracks(self, frame_idx, timestamp, track_ids, labels, pos, vel):
+        rows = np.empty(len(track_ids), dtype=STREAMS['track'])
+        rows['frame'] = frame_idx
+        rows['timestamp'] = timestamp
+        rows['track_id'] = track_ids
+        rows['cls'] = labels
+        for k, axis in enumerate('xyz'):
+            rows['p' + axis] = pos[:, k]
+            rows['v' + axis] = vel[:, k]
+        self.log('track', rows)
+
+    def cpa(self, frame_idx, timestamp, track_ids, is_collision, time_to_impact, min_distance, t_cpa,
+            p_collision=None):
+        """p_collision defaults to 0/1 from is_collision (deterministic CPA)."""
+        rows = np.empty(len(track_ids), dtype=STREAMS['cpa'])
+        rows['frame'] = frame_idx
+        rows['timestamp'] = timestamp
+        rows['track_id'] = track_ids
+        rows['collision'] = is_collision
+        rows['tti'] = time_to_impact
+        rows['min_dist'] = min_distance
+        rows['t_cpa'] = t_cpa
+        rows['p_collision'] = is_collision if p_collision is None else p_collision
+        self.log('cpa', rows)
+
+    def alerts(self, frame_idx, timestamp, track_ids, labels, time_to_impact, min_distance, p_collision=1.0):
+        rows = np.empty(len(track_ids), dtype=STREAMS['alert'])
+        rows['frame'] = frame_idx
+        rows['timestamp'] = timestamp
+        rows['track_id'] = track_ids
+        rows['cls'] = labels
+        rows['tti'] = time_to_impact
+        rows['min_dist'] = min_distance
+        rows['p_collision'] = p_collision
+        self.log('alert', rows)
+
+    def stage(self, frame_idx, name, seconds):
+        rows = np.empty(1, dtype=STREAMS['stage'])
+        rows[0] = (frame_idx, STAGE_NAMES.index(name), seconds * 1000.0)
+        self.log('stage', rows)
+
+    #  WRITER ---
+
+    def _print_alerts(self, rows):
+        names = self.meta.get('names', {})
+        for r in rows:
+            print(f"\n*** FRAME {r['frame'] + 1}: COLLISION ALERT (TTI) ***")
+            print(f"  TRACK ID: {r['track_id']}")
+            print(f"  DETECTED CLASS: {names.get(str(r['cls']), r['cls'])}")
+            print(f"  Time to Impact: {r['tti']:.2f} seconds")
+            print(f"  Min Predicted Distance: {r['min_dist']:.2f} m")
+            print(f"  Collision Probability: {r['p_collision']:.0%}")
+
+    def flush(self):
+        """Writes every pending row; called by the writer thread and on close."""
+        with self._lock:
+            chunks = [(name, ring.drain()) for name, ring in self.rings.items() if ring.pending()]
+        for name, rows in chunks:
+            self._file.write(struct.pack('<II', STREAM_IDS[name], len(rows)))
+            self._file.write(rows.tobytes())
+            self.rows_written[name] += len(rows)
+            if name == 'alert' and self.echo_alerts:
+                self._print_alerts(rows)
+        self._file.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+    def dropped(self):
+        return {name: ring.dropped for name, ring in self.rings.items() if ring.dropped}
+
+
+#  READER ---
+
+def read_log(path):
+    """Loads a telemetry file; returns (meta, {stream: structured array}).
+
+    Also works on the file of a run that is still recording or crashed: a
+    truncated last chunk is ignored.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a telemetry log")
+    offset = len(MAGIC)
+    (header_len,) = struct.unpack_from('<I', data, offset)
+    offset += 4
+    header = json.loads(data[offset:offset + header_len])
+    offset += header_len
+
+    dtypes = {}
+    for name, spec in header['streams'].items():
+        dtypes[spec['id']] = (name, np.dtype([tuple(field) for field in spec['descr']]))
+    parts = {name: [] for name, _ in dtypes.values()}
+    while offset + 8 <= len(data):
+        stream_id, n = struct.unpack_from('<II', data, offset)
+        offset += 8
+        name, dtype = dtypes[stream_id]
+        size = n * dtype.itemsize
+        if offset + size > len(data):
+            break
+        parts[name].append(np.frombuffer(data, dtype=dtype, count=n, offset=offset))
+        offset += size
+
+    streams = {}
+    for name, dtype in dtypes.values():
+        streams[name] = np.concatenate(parts[name]) if parts[name] else np.zeros(0, dtype=dtype)
+    meta = dict(header['meta'], stages=header['stages'])
+    return meta, streams
+
+
+def replay(path, streams=None):
+    """Yields (frame_idx, {stream: rows of that frame}) in frame order."""
+    _, data = read_log(path)
+    if streams is not None:
+        data = {name: data[name] for name in streams}
+    by_frame = {}
+    for name, rows in data.items():
+        if not len(rows):
+            continue
+        rows = rows[np.argsort(rows['frame'], kind='stable')]
+        frames, starts = np.unique(rows['frame'], return_index=True)
+        bounds = np.append(starts, len(rows))
+        for k, frame in enumerate(frames.tolist()):
+            by_frame.setdefault(frame, {})[name] = rows[bounds[k]:bounds[k + 1]]
+    for frame in sorted(by_frame):
+        yield frame, by_frame[frame]
+
+
+def stage_summary(stage_rows, stage_names=STAGE_NAMES):
+    """Mean / p50 / p95 / max stage latency (ms) from logged stage rows."""
+    summary = {}
+    for k, name in enumerate(stage_names):
+        ms = stage_rows['ms'][stage_rows['stage'] == k]
+        if len(ms):
+            summary[name] = {'count': int(len(ms)), 'mean_ms': float(ms.mean()),
+                             'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95)),
+                             'max_ms': float(ms.max())}
+    return summary
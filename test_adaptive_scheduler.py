@@ -0,0 +1,55 @@
+# test_adaptive_scheduler.py
+# 1. Cadence and tier of next_detection per threat level, and while tracks await confirmation.
+# 2. The capture thread (next_detection) and the assessment thread (should_assess,
+#    confirming, update) share one scheduler, as in final_pipeline: counters stay consistent.
+
+import threading
+
+from adaptive_scheduler import CRITICAL, IDLE, LEVEL_NAMES, MONITOR, POLICIES, ThreatScheduler
+
+# --- 1. Cadence ---
+scheduler = ThreatScheduler()
+plan = [scheduler.next_detection() for _ in range(6)]
+print(f"IDLE: {plan}")
+assert plan == [('full', 5)] + [('light', 5)] * 4 + [('full', 5)]
+
+scheduler.confirming(True)
+tier, skip = scheduler.next_detection()
+print(f"IDLE with a tentative track: {tier}, skip {skip}")
+assert (tier, skip) == ('full', POLICIES[MONITOR]['detect_every'] - 1)
+scheduler.confirming(False)
+assert scheduler.next_detection()[1] == POLICIES[IDLE]['detect_every'] - 1
+
+scheduler.update(CRITICAL, 100)
+assert scheduler.next_detection() == ('full', 0) and scheduler.should_assess(1)
+scheduler.update(IDLE, 101)
+assert scheduler.level == CRITICAL # Held for DOWNGRADE_HOLD frames
+scheduler.update(IDLE, 101 + scheduler.downgrade_hold)
+assert scheduler.level == IDLE
+
+# --- 2. Threads ---
+scheduler = ThreatScheduler()
+calls = 100000
+
+
+def capture_side():
+    for _ in range(calls):
+        scheduler.next_detection()
+
+
+def assessment_side():
+    for k in range(calls):
+        scheduler.should_assess(3)
+        scheduler.confirming(k % 7 == 0)
+        scheduler.update((k // 500) % len(LEVEL_NAMES), k)
+
+
+threads = [threading.Thread(target=capture_side), threading.Thread(target=assessment_side)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+s = scheduler.stats
+print(f"Threaded: {s['frames']} frames = {s['full']} full + {s['light']} light detections + {s['skipped']} skipped")
+assert s['full'] + s['light'] == calls
+assert s['frames'] == s['full'] + s['light'] + s['skipped'] == sum(s['level_frames'])
@@ -0,0 +1,120 @@
+# test_assessment_service.py
+# 1. Feeds an airfield scenario (thousands of birds, dozens of aircraft, states
+#    refreshed at different rates) through FleetAssessor and checks that the
+#    incremental alerts match recomputing every pair from scratch.
+# 2. Compares the per-tick cost of both.
+# 3. Runs the asyncio service on a local port: a subscriber gets the alert and
+#    the clear for one aircraft, a blocking TrackPublisher feeds the birds.
+
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from assessment_service import AssessmentService, FleetAssessor, TrackPublisher, encode
+
+rng = np.random.default_rng(0)
+num_birds = 5000
+num_aircraft = 40
+tick_s = 0.1
+num_ticks = 50
+
+# --- Airfield: birds within 5 km, aircraft on approach/departure lines through the field ---
+bird_pos = rng.uniform([-5000, -5000, 0], [5000, 5000, 600], (num_birds, 3))
+bird_vel = rng.normal(0.0, 8.0, (num_birds, 3)) * [1, 1, 0.2]
+heading = rng.uniform(0, 2 * np.pi, num_aircraft)
+aircraft_vel = 70.0 * np.column_stack([np.cos(heading), np.sin(heading), np.zeros(num_aircraft)])
+aircraft_pos = -aircraft_vel * rng.uniform(0, 60, num_aircraft)[:, None] + [0, 0, 300]
+aircraft_ids = [f"AC{k:02d}" for k in range(num_aircraft)]
+# A few birds right on aircraft paths so there are alerts to compare
+bird_pos[:num_aircraft] = aircraft_pos + aircraft_vel * rng.uniform(5, 15, num_aircraft)[:, None]
+
+incremental = FleetAssessor()
+scratch = FleetAssessor()
+cost = {'incremental': 0.0, 'scratch': 0.0}
+mismatches = 0
+alerts = 0
+for tick in range(num_ticks):
+    t = tick * tick_s
+    # Birds: a camera pipeline refreshes a fifth of the tracks each tick
+    bird_vel += rng.normal(0.0, 0.5, bird_vel.shape)
+    fresh = np.flatnonzero(rng.random(num_birds) < 0.2) if tick else np.arange(num_birds)
+    # Aircraft: ADS-B at 1 Hz, staggered over the ticks
+    movers = [k for k in range(num_aircraft) if tick == 0 or k % 10 == tick % 10]
+    for assessor in (incremental, scratch):
+        assessor.update_birds(fresh, bird_pos[fresh] + bird_vel[fresh] * t, bird_vel[fresh], t)
+        for k in movers:
+            assessor.update_aircraft(aircraft_ids[k], aircraft_pos[k] + aircraft_vel[k] * t, aircraft_vel[k], t)
+    start = time.perf_counter()
+    incremental.assess()
+    cost['incremental'] += time.perf_counter() - start
+    start = time.perf_counter()
+    scratch.birds.dirty[:] = True
+    scratch.assess(full=True)
+    cost['scratch'] += time.perf_counter() - start
+    mismatches += np.count_nonzero(incremental.alerting != scratch.alerting)
+    alerts += np.count_nonzero(scratch.alerting)
+
+print(f"{num_birds} birds x {num_aircraft} aircraft, {num_ticks} ticks of {tick_s * 1000:.0f} ms")
+print(f"  alerted pairs per tick (mean): {alerts / num_ticks:.1f}, mismatching pairs over all ticks: {mismatches}")
+print(f"  incremental: {cost['incremental'] / num_ticks * 1000:7.2f} ms/tick, "
+      f"{incremental.pairs_computed / num_ticks:9.0f} pairs/tick")
+print(f"  from scratch: {cost['scratch'] / num_ticks * 1000:6.2f} ms/tick, "
+      f"{scratch.pairs_computed / num_ticks:9.0f} pairs/tick (corridor-culled)")
+print(f"  brute force would be {num_birds * num_aircraft} pairs/tick")
+assert mismatches == 0
+
+# --- Aircraft removed before their first assessment (no corridor cached yet) ---
+assessor = FleetAssessor()
+assessor.update_aircraft('A', [0, 0, 300], [70, 0, 0], 100.0)
+assert assessor.remove(aircraft=['A']) == [] and not assessor.corridors
+assessor.update_aircraft('B', [0, 0, 300], [70, 0, 0], 100.0)
+assessor.update_birds([1], [[500, 0, 300]], [[0, 0, 0]], 100.0)
+assessor.assess()
+assessor.update_aircraft('OLD', [0, 0, 300], [70, 0, 0], 100.0 - 10.0) # Already stale on arrival
+assessor.assess()
+assert set(assessor.corridors) == {assessor.aircraft.slots['B']} and set(assessor._index_rows) == set(assessor.corridors)
+print("Removing never-assessed aircraft: ok")
+
+
+# --- 3. Over the socket ---
+async def service_demo():
+    service = AssessmentService(FleetAssessor(), interval=0.02)
+    server = await service.serve(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(encode({'type': 'subscribe', 'aircraft': ['AC1']}))
+    writer.write(encode({'type': 'aircraft', 'id': 'AC1', 'pos': [0, 0, 300], 'vel': [70, 0, 0]}))
+    writer.write(encode({'type': 'aircraft', 'id': 'AC2', 'pos': [0, 2000, 300], 'vel': [0, -70, 0]}))
+    # Stale on arrival: dropped by the next tick, which must keep alerting afterwards
+    writer.write(encode({'type': 'aircraft', 'id': 'AC3', 'pos': [0, 0, 300], 'vel': [70, 0, 0], 't': 0.0}))
+    await writer.drain()
+
+    # Bird 7 heads straight for AC1, then turns away
+    publisher = await asyncio.to_thread(TrackPublisher, '127.0.0.1', port)
+    await asyncio.to_thread(publisher.birds, [7, 8], [[600, 0, 300], [0, -3000, 300]], [[-20, 0, 0], [0, 5, 0]])
+    first = json.loads(await asyncio.wait_for(reader.readline(), 2.0))
+    await asyncio.to_thread(publisher.birds, [7], [[600, 0, 300]], [[0, 0, 40]])
+    while True:
+        event = json.loads(await asyncio.wait_for(reader.readline(), 2.0))
+        if event['type'] == 'clear':
+            break
+    writer.write(encode({'type': 'bogus'}))
+    await writer.drain()
+    error = json.loads(await asyncio.wait_for(reader.readline(), 2.0))
+
+    publisher.close()
+    writer.close()
+    await service.close()
+    return first, event, error, service.stats.summary()
+
+
+first, clear, error, stats = asyncio.run(service_demo())
+print(f"\nSocket: {first['type']} AC1 / bird {first['track_id']} TTI {first['tti']:.2f} s "
+      f"(new={first['new']}), then {clear['type']} for bird {clear['track_id']}")
+print(f"  error reply: {error['message']}")
+print(f"  {stats['count']} assessments, mean {stats['mean_ms']:.3f} ms")
+assert first['type'] == 'alert' and first['aircraft'] == 'AC1' and first['track_id'] == 7 and first['new']
+assert clear['track_id'] == 7
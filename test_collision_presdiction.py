@@ -1,6 +1,8 @@
 import numpy as np
 import time
 
+from cpa import solve_cpa
+
 time_step = 0.1 # Simulate checking every 0.1 seconds
 simulation_duration = 10.0 # Simulate for 10 seconds into the future
 collision_threshold_m = 50.0 # Minimum safe distance in meters
@@ -24,33 +26,20 @@ print(f"Aircraft Position: {aircraft_pos}, Velocity: {aircraft_vel} m/s")
 print(f"Bird Position: {bird_pos}, Velocity: {bird_vel} m/s")
 print(f"Collision Threshold: {collision_threshold_m} m")
 
-# --- Simulation Loop ---
-print("\n--- Simulating Future Positions ---")
-collision_predicted = False
-time_to_collision = np.inf # Initialize to infinity
-
-current_time = 0.0
-while current_time <= simulation_duration:
-    # Predict future positions using: new_pos = initial_pos + velocity * time
-    future_aircraft_pos = aircraft_pos + aircraft_vel * current_time
-    future_bird_pos = bird_pos + bird_vel * current_time
-
-    # Calculate the distance between the two future positions
-    distance = np.linalg.norm(future_aircraft_pos - future_bird_pos)
+# --- Closed-Form CPA (replaces the time-stepping loop) ---
+print("\n--- Solving Closest Point of Approach ---")
+is_collision, t_impact, min_dist, t_cpa = solve_cpa(
+    aircraft_pos, aircraft_vel, bird_pos, bird_vel,
+    max_time=simulation_duration, threshold=collision_threshold_m
+)
+collision_predicted = bool(is_collision[0, 0])
+time_to_collision = float(t_impact[0, 0])
 
-    print(f"Time: {current_time:.1f}s | Distance: {distance:.2f} m")
-
-    # Check if distance is below the collision threshold
-    if distance < collision_threshold_m:
-        print(f"  *** COLLISION PREDICTED at {current_time:.1f} seconds! (Distance: {distance:.2f}m) ***")
-        collision_predicted = True
-        time_to_collision = current_time
-        break # Stop simulation once collision is predicted
-
-    current_time += time_step
+print(f"Time of closest approach: {t_cpa[0, 0]:.2f}s")
 
 if not collision_predicted:
+    print(f"Minimum predicted distance: {min_dist[0, 0]:.2f} m")
     print(f"\nNo collision predicted within {simulation_duration} seconds.")
 else:
-    print(f"\nCollision alert! Predicted impact time: {time_to_collision:.1f} seconds.")
-
+    print(f"  *** COLLISION PREDICTED at {time_to_collision:.2f} seconds! (Distance: {min_dist[0, 0]:.2f}m) ***")
+    print(f"\nCollision alert! Predicted impact time: {time_to_collision:.2f} seconds.")
@@ -0,0 +1,81 @@
+# test_collision_risk.py
+# 1. Checks the triangulation covariance against Monte-Carlo pixel noise, near and far.
+# 2. Compares deterministic CPA with the collision probability for near and far birds.
+# 3. Times collision_probability for 1-1000 tracks.
+
+import numpy as np
+import time
+
+from collision_risk import MC_SAMPLES, collision_probability
+from cpa import solve_cpa
+from triangulation import triangulate_batch, triangulation_covariance
+
+f, B, cx, cy = 700.0, 0.5, 640.0, 360.0
+pixel_std = 1.0
+threshold = 100.0
+horizon = 10.0
+aircraft_pos = np.zeros(3)
+aircraft_vel = np.array([70.0, 0.0, 0.0])
+rng = np.random.default_rng(0)
+
+# --- 1. Covariance vs sampled pixel noise (camera frame, Z = depth) ---
+# Sampled: root mean square error about the true position over the valid pairs
+print("Position error: covariance vs Monte-Carlo (1 px noise on u_left, v_left, u_right)")
+print(f"{'Z (m)':>7s} {'first-order sigma_Z':>20s} {'sigma_Z':>8s} {'sampled':>8s} {'sigma_X':>8s} {'sampled':>8s}")
+for Z in (10.0, 30.0, 60.0, 100.0, 150.0):
+    uv_left = np.array([[700.0, 400.0]])
+    uv_right = uv_left - [f * B / Z, 0.0]
+    truth = triangulate_batch(uv_left, uv_right, f, B, cx, cy)[0][0]
+    cov = triangulation_covariance(uv_left, uv_right, f, B, cx, cy, pixel_std)[0]
+    noisy_left = uv_left + rng.normal(0, pixel_std, (200000, 2))
+    noisy_right = uv_right + np.column_stack([rng.normal(0, pixel_std, 200000), np.zeros(200000)])
+    P, valid = triangulate_batch(noisy_left, noisy_right, f, B, cx, cy)
+    rms = np.sqrt(np.mean((P[valid] - truth) ** 2, axis=0))
+    sigma = np.sqrt(np.diag(cov))
+    print(f"{Z:7.0f} {Z * Z / (f * B) * np.sqrt(2) * pixel_std:20.2f} {sigma[2]:8.2f} {rms[2]:8.2f} "
+          f"{sigma[0]:8.2f} {rms[0]:8.2f}")
+    assert np.allclose(sigma, rms, rtol=0.05)
+
+# Positive definite down to the minimum disparity (the tracker's gating and update rely on it)
+disparity = np.linspace(0.51, 20.0, 200)
+uv_left = np.column_stack([np.full(200, 1200.0), np.full(200, 700.0)])
+cov = triangulation_covariance(uv_left, uv_left - np.column_stack([disparity, np.zeros(200)]), f, B, cx, cy)
+assert np.all(np.linalg.eigvalsh(cov)[:, 0] > 0.0)
+
+# --- 2. Deterministic vs probabilistic on the same tracks ---
+# Tracks aimed to pass 60 m (inside) and 160 m (outside) the 100 m sphere, near and far
+print(f"\nCollision threshold {threshold:.0f} m, horizon {horizon:.0f} s")
+print(f"{'bird':22s} {'sigma_pos':>9s} {'CPA hit':>8s} {'P(hit)':>7s} {'TTI (s)':>8s}")
+for range_m in (150.0, 400.0):
+    for miss in (60.0, 160.0):
+        pos = np.array([[range_m, miss, 0.0]])
+        vel = np.array([[-50.0, 0.0, 0.0]])
+        uv_left = np.array([[cx + f * miss / range_m, cy]])
+        uv_right = uv_left - [f * B / range_m, 0.0]
+        # Camera Z axis = world X here: reorder (X, Y, Z) -> (Z, X, Y)
+        cov_c = triangulation_covariance(uv_left, uv_right, f, B, cx, cy, pixel_std)[0]
+        perm = [2, 0, 1]
+        cov = np.zeros((1, 6, 6))
+        cov[0, :3, :3] = cov_c[np.ix_(perm, perm)]
+        cov[0, 3:, 3:] = np.eye(3) * 5.0 ** 2 # Tracked velocity std 5 m/s
+        hit, tti, _, _ = solve_cpa(aircraft_pos, aircraft_vel, pos, vel, horizon, threshold)
+        p, p_tti, _ = collision_probability(aircraft_pos, aircraft_vel, pos, vel, cov, horizon, threshold)
+        print(f"{f'{range_m:.0f} m ahead, {miss:.0f} m off':22s} {np.sqrt(cov[0, 0, 0]):8.1f}m "
+              f"{str(bool(hit[0, 0])):>8s} {p[0]:7.0%} {p_tti[0]:8.2f}")
+
+# --- 3. Cost per frame ---
+print(f"\ncollision_probability cost ({MC_SAMPLES} samples per track)")
+for n in (1, 10, 100, 1000):
+    pos = np.column_stack([rng.uniform(200, 2000, n), rng.uniform(-500, 500, n), rng.uniform(-50, 50, n)])
+    vel = rng.normal([-40.0, 0.0, 0.0], 5.0, (n, 3))
+    cov = np.zeros((n, 6, 6))
+    cov[:, :3, :3] = np.eye(3) * 20.0 ** 2
+    cov[:, 3:, 3:] = np.eye(3) * 5.0 ** 2
+    for name, cases in (('mixed flock', (pos, vel)), ('all on collision course', (pos * [1, 0, 0], vel * [1, 0, 0]))):
+        collision_probability(aircraft_pos, aircraft_vel, cases[0], cases[1], cov, horizon, threshold)
+        start = time.perf_counter()
+        runs = 5
+        for _ in range(runs):
+            p, _, _ = collision_probability(aircraft_pos, aircraft_vel, cases[0], cases[1], cov, horizon, threshold)
+        elapsed = (time.perf_counter() - start) / runs
+        print(f"  n={n:5d} {name:24s} {elapsed * 1000:8.2f} ms  ({np.count_nonzero(p > 0)} tracks with P > 0)")
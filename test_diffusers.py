@@ -1,7 +1,7 @@
-import torch
-from diffusers import StableDiffusionPipeline
 import os 
 
+from model_registry import MODEL_CACHE_DIR, get_diffusion_pipeline
+
 # --- Configuration ---
 # Use a smaller, faster Stable Diffusion model for this test
 model_id = "CompVis/stable-diffusion-v1-4" 
@@ -17,19 +17,12 @@ os.makedirs(output_folder, exist_ok=True)
 
 # --- Generate Image ---
 print(f"Loading model: {model_id}")
-print("This might take a while the first time it downloads the model...")
+print(f"This might take a while the first time it downloads the model into {MODEL_CACHE_DIR}...")
 
 try:
-    # Check if CUDA (GPU) is available, otherwise use CPU
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    print(f"Using device: {device}")
-
-    # Load the pipeline (the pre-trained model and associated code)
-    if device == "cpu":
-        pipe = StableDiffusionPipeline.from_pretrained(model_id, torch_dtype=torch.float32)
-    else:
-        pipe = StableDiffusionPipeline.from_pretrained(model_id, torch_dtype=torch.float16)
-        pipe = pipe.to(device)
+    # Load the pipeline on GPU if available (cached, memory-mapped safetensors after the first run)
+    pipe = get_diffusion_pipeline(model_id)
+    print(f"Using device: {pipe.device}")
 
     print("Model loaded. Generating image...")
 
@@ -0,0 +1,77 @@
+# test_evaluate.py
+# 1. Detection scoring on a hand-made frame with a known AP at every IoU threshold.
+# 2. Alert scoring against one labelled impact.
+# 3. A missing eval dir and videos that fail in the worker are reported, not raised.
+
+import os
+import tempfile
+
+import numpy as np
+
+from evaluate import (IOU_THRESHOLDS, alert_metrics, average_precision, detection_metrics, match_alerts,
+                      match_detections, run_evaluation)
+
+
+def check_detection_scoring():
+    # Two birds; detections ranked TP, FP, then a looser TP (IoU 100/160 = 0.625 with bird 1).
+    gt_frames = {0: np.array([[0, 0, 10, 10, 0], [20, 20, 30, 30, 0]], dtype=np.float32)}
+    rows = np.array([[0, 0, 10, 10, 0.9, 0],
+                     [50, 50, 60, 60, 0.8, 0],
+                     [20, 20, 30, 36, 0.7, 0]], dtype=np.float32)
+    log = [(0, 0.0, rows), (1, 0.033, np.zeros((0, 6), dtype=np.float32))] # Frame 1 has no birds and no detections
+    per_class = match_detections(log, gt_frames)
+    e = per_class[0]
+    print(f"num_gt={e['num_gt']}  tp@0.5={e['tp'][:, 0].tolist()}  tp@0.95={e['tp'][:, -1].tolist()}")
+    assert e['num_gt'] == 2
+    assert e['tp'][:, 0].tolist() == [True, False, True] and e['tp'][:, -1].tolist() == [True, False, False]
+
+    # Loose TP counts up to IoU 0.6: AP = 0.5 * 1 + 0.5 * 2/3 there, 0.5 above
+    expected = np.where(IOU_THRESHOLDS <= 0.6, 5.0 / 6.0, 0.5)
+    ap = average_precision(e['scores'], e['tp'], e['num_gt'])
+    print(f"AP per threshold: {np.round(ap, 4).tolist()}")
+    assert np.allclose(ap, expected)
+    metrics = detection_metrics(per_class, {0: 'bird'})
+    print(f"mAP50={metrics['map50']:.4f}  mAP50-95={metrics['map50_95']:.4f}")
+    assert np.isclose(metrics['map50'], 5.0 / 6.0) and np.isclose(metrics['map50_95'], 0.6)
+    assert metrics['per_class']['bird'] == {'ap50': metrics['map50'], 'num_gt': 2, 'num_detections': 3}
+
+    assert np.all(average_precision(np.zeros(0), np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool), 2) == 0.0)
+    assert np.all(np.isnan(average_precision(e['scores'], e['tp'], 0)))
+
+
+def check_alert_scoring():
+    # Impact at 8 s. Alerts at 1 s and 3 s fall inside its 10 s horizon, the one at 9 s comes after it.
+    gt = {'tracks': [{'id': 0, 'impact_time_s': 8.0}, {'id': 1}]}
+    alerts = [{'timestamp': 1.0, 'tti': 6.5}, {'timestamp': 3.0, 'tti': 5.5}, {'timestamp': 9.0, 'tti': 2.0}]
+    counts = match_alerts(alerts, gt, t_end=12.0)
+    print(f"alert counts: {counts}")
+    assert counts == {'num_alerts': 3, 'true_alerts': 2, 'events': 1, 'caught': 1,
+                      'warning_s': [7.0], 'tti_errors': [-0.5, 0.5]}
+    a = alert_metrics(counts)
+    assert np.isclose(a['precision'], 2.0 / 3.0) and a['recall'] == 1.0
+    assert a['tti_bias_s'] == 0.0 and a['tti_mae_s'] == 0.5
+
+    # An impact whose horizon starts after the replay ended is not an event
+    assert match_alerts([], {'tracks': [{'impact_time_s': 30.0}]}, t_end=12.0)['events'] == 0
+    assert match_alerts([], gt, t_end=12.0)['caught'] == 0
+
+
+def check_failures():
+    assert run_evaluation(os.path.join(tempfile.mkdtemp(), 'missing'), report_path=None) is None
+    eval_dir = tempfile.mkdtemp()
+    for name in ('a.mp4', 'b.mp4'):
+        with open(os.path.join(eval_dir, name), 'w') as f:
+            f.write('not a video')
+    report = run_evaluation(eval_dir, num_workers=1, overrides={'DETECTOR_BACKEND': 'no-such-backend'},
+                            report_path=None)
+    failed = report['videos']
+    print(f"failed videos: {[(r['video'], r['error']) for r in failed]}")
+    assert report['aggregate']['videos'] == 0 and report['aggregate']['failed'] == 2
+    assert all(r['error'].startswith('ValueError: Unknown detector backend') and 'traceback' in r for r in failed)
+
+
+if __name__ == "__main__": # Evaluation workers are spawned and re-import this file
+    check_detection_scoring()
+    check_alert_scoring()
+    check_failures()
+    print("OK")
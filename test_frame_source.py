@@ -0,0 +1,55 @@
+# test_frame_source.py
+# Writes a short numbered video and checks that FrameSource.skip drops exactly
+# the next n frames (prefetched ones included) and that skipped frames are
+# grabbed without being decoded.
+
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from frame_source import FrameSource
+
+num_frames = 60
+path = os.path.join(tempfile.mkdtemp(), 'numbered.avi')
+writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30.0, (64, 48))
+for k in range(num_frames):
+    writer.write(np.full((48, 64, 3), 4 * k, dtype=np.uint8)) # Frame k is gray level 4k
+writer.release()
+
+
+def level(item):
+    return int(round(item[0].mean() / 4.0))
+
+
+# --- skip(n) after a read, with the decoder already ahead ---
+source = FrameSource(path)
+first = source.read()
+time.sleep(0.2) # Let the decoder fill its prefetch queue
+source.skip(3)
+got = [source.read() for _ in range(4)]
+print(f"read {first[2]}, skip(3), then {[item[2] for item in got]}")
+assert [item[2] for item in got] == [4, 5, 6, 7] and [level(item) for item in got] == [4, 5, 6, 7]
+source.skip(2)
+source.skip(2) # Skips add up
+assert source.read()[2] == 12
+source.seek(index=30)
+source.skip(1)
+assert source.read()[2] == 31
+source.release()
+
+# --- Detect-every-6 cadence: how many frames are actually decoded ---
+for prefetch in (1, 4):
+    source = FrameSource(path, prefetch=prefetch)
+    retrieve = source._retrieve
+    decoded = []
+    source._retrieve = lambda: decoded.append(source._next_index) or retrieve()
+    indices = []
+    while (item := source.read()) is not None:
+        indices.append(item[2])
+        source.skip(5)
+    source.release()
+    print(f"prefetch={prefetch}: returned {len(indices)} of {num_frames} frames, decoded {len(decoded)}")
+    assert indices == list(range(0, num_frames, 6))
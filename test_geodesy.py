@@ -0,0 +1,56 @@
+# test_geodesy.py
+# Round-trips the WGS84 / ECEF / NED / FRD conversions and validates a long
+# waypoint mission against a few birds.
+
+import numpy as np
+import time
+
+from geodesy import LocalNED, ecef_to_lla, frd_to_ned, lla_to_ecef, ned_to_frd, validate_mission
+
+rng = np.random.default_rng(0)
+num_points = 100000
+
+# --- WGS84 <-> ECEF ---
+lla = np.column_stack([rng.uniform(-89.9, 89.9, num_points),
+                       rng.uniform(-180, 180, num_points),
+                       rng.uniform(-100, 12000, num_points)])
+start = time.perf_counter()
+ecef = lla_to_ecef(lla)
+back = ecef_to_lla(ecef)
+elapsed_ms = (time.perf_counter() - start) * 1000.0
+err = np.abs(back - lla).max(axis=0)
+print(f"{num_points} points LLA->ECEF->LLA in {elapsed_ms:.1f} ms | max error lat {err[0]:.1e} deg, "
+      f"lon {err[1]:.1e} deg, alt {err[2]:.1e} m")
+print(f"Equator/prime meridian -> ECEF: {lla_to_ecef([0.0, 0.0, 0.0])}")
+
+# --- Local NED about an airfield origin ---
+ned_frame = LocalNED([12.9716, 77.5946, 900.0])
+ned = rng.uniform(-5000, 5000, (num_points, 3))
+err = np.abs(ned_frame.lla_to_ned(ned_frame.ned_to_lla(ned)) - ned).max()
+print(f"NED->LLA->NED round trip | max error: {err:.2e} m")
+
+# --- NED <-> FRD (aircraft heading east: a point 10 m east is 10 m forward) ---
+print(f"10 m east, yaw 90 deg -> FRD: {np.round(ned_to_frd([[0.0, 10.0, 0.0]], 0.0, 0.0, np.pi / 2), 6)}")
+attitude = rng.uniform(-0.5, 0.5, (3, num_points))
+err = np.abs(frd_to_ned(ned_to_frd(ned, *attitude), *attitude) - ned).max()
+print(f"Per-point attitude NED->FRD->NED | max error: {err:.2e} m")
+
+# --- Mission validation: 5000 waypoints flown north at 50 m/s, 300 m AGL ---
+num_waypoints = 5000
+waypoints_ned = np.column_stack([np.arange(num_waypoints) * 50.0,
+                                 np.zeros(num_waypoints),
+                                 np.full(num_waypoints, -300.0)])
+waypoints_lla = ned_frame.ned_to_lla(waypoints_ned)
+bird_pos = np.array([[1000.0, 5.0, -300.0],    # Sitting on the route
+                     [5000.0, 5000.0, -300.0]])  # Far off to the east
+bird_vel = np.zeros((2, 3))
+
+start = time.perf_counter()
+result = validate_mission(waypoints_lla, 50.0, bird_pos, bird_vel, ned_frame, threshold_m=15.0)
+elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+print(f"\n{num_waypoints} waypoints x {len(bird_pos)} birds validated in {elapsed_ms:.2f} ms")
+print(f"Mission valid: {result['valid']}")
+for leg in np.nonzero(result['conflict'])[0]:
+    print(f"  Leg {leg} -> {leg + 1}: bird {result['bird_index'][leg]} "
+          f"at t = {result['time_to_impact'][leg]:.2f} s, miss distance {result['min_distance'][leg]:.2f} m")
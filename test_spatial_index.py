@@ -0,0 +1,86 @@
+# test_spatial_index.py
+# 1. Checks that corridor culling never drops a bird that the full CPA flags.
+# 2. Times grid rebuild + corridor query against CPA / collision probability on
+#    every track, for 1k-50k birds spread over a 20 km airspace.
+# 3. Times the multi-aircraft query (several ownship hypotheses at once).
+
+import numpy as np
+import time
+
+from collision_risk import collision_probability
+from cpa import solve_cpa
+from spatial_index import MAX_BIRD_SPEED_MPS, UniformGrid, corridor_candidates, corridor_candidates_multi
+
+threshold = 100.0
+horizon = 10.0
+aircraft_pos = np.zeros(3)
+aircraft_vel = np.array([70.0, 0.0, 0.0])
+rng = np.random.default_rng(0)
+
+
+def airspace(n):
+    """n birds in a 20 km x 20 km x 1 km block around the aircraft, flying at up to MAX_BIRD_SPEED_MPS."""
+    pos = rng.uniform([-10000, -10000, -500], [10000, 10000, 500], (n, 3))
+    vel = rng.normal(0.0, 1.0, (n, 3))
+    vel *= rng.uniform(0, MAX_BIRD_SPEED_MPS, n)[:, None] / np.linalg.norm(vel, axis=1, keepdims=True)
+    return pos, vel
+
+
+def timed(fn, runs=5):
+    fn()
+    start = time.perf_counter()
+    for _ in range(runs):
+        out = fn()
+    return (time.perf_counter() - start) / runs * 1000, out
+
+
+# --- 1. Culling is conservative ---
+# Dense flock right on the flight path, so plenty of birds are real hits
+pos = rng.uniform([0, -600, -300], [1500, 600, 300], (20000, 3))
+_, vel = airspace(20000)
+vel[:50] = [60.0, 0.0, 0.0] # Faster than the bound: must be kept regardless of position
+pos[:50] = [5000.0, 0.0, 0.0]
+grid = UniformGrid().rebuild(pos)
+near = corridor_candidates(grid, aircraft_pos, aircraft_vel, vel, horizon, threshold)
+hit, _, _, _ = solve_cpa(aircraft_pos, aircraft_vel, pos, vel, horizon, threshold)
+missed = np.setdiff1d(np.flatnonzero(hit[:, 0]), near)
+print(f"Conservative: {np.count_nonzero(hit)} CPA hits among 20000 birds, {len(near)} candidates, "
+      f"{len(missed)} hits culled")
+assert len(missed) == 0
+
+# --- 2. Cost per assessment ---
+cov = np.zeros((1, 6, 6))
+cov[0, :3, :3] = np.eye(3) * 20.0 ** 2
+cov[0, 3:, 3:] = np.eye(3) * 5.0 ** 2
+print(f"\nPer-assessment cost (ms), corridor radius {threshold + MAX_BIRD_SPEED_MPS * horizon:.0f} m")
+print(f"{'birds':>7s} {'cand':>6s} {'rebuild':>8s} {'query':>7s} {'CPA all':>8s} {'CPA cand':>9s} "
+      f"{'P all':>7s} {'P cand':>7s}")
+grid = UniformGrid()
+for n in (1000, 5000, 20000, 50000):
+    pos, vel = airspace(n)
+    covs = np.broadcast_to(cov, (n, 6, 6))
+    t_build, _ = timed(lambda: grid.rebuild(pos))
+    t_query, near = timed(lambda: corridor_candidates(grid, aircraft_pos, aircraft_vel, vel, horizon, threshold))
+    t_cpa, _ = timed(lambda: solve_cpa(aircraft_pos, aircraft_vel, pos, vel, horizon, threshold))
+    t_cpa_near, _ = timed(lambda: solve_cpa(aircraft_pos, aircraft_vel, pos[near], vel[near], horizon, threshold))
+    t_p, (p, _, _) = timed(lambda: collision_probability(aircraft_pos, aircraft_vel, pos, vel, covs, horizon, threshold), 1)
+    t_p_near, (p_near, _, _) = timed(lambda: collision_probability(aircraft_pos, aircraft_vel, pos[near], vel[near],
+                                                                   covs[near], horizon, threshold), 1)
+    assert np.allclose(p[near], p_near) and not p[np.setdiff1d(np.arange(n), near)].any()
+    print(f"{n:7d} {len(near):6d} {t_build:8.2f} {t_query:7.2f} {t_cpa:8.2f} {t_cpa_near:9.2f} {t_p:7.2f} {t_p_near:7.2f}")
+
+# Frame-to-frame: birds move a little, so the previous order is almost sorted already
+pos, vel = airspace(50000)
+grid.rebuild(pos)
+t_cold, _ = timed(lambda: UniformGrid().rebuild(pos))
+t_warm, _ = timed(lambda: grid.rebuild(pos + vel / 30.0))
+print(f"\nRebuild 50000 birds: {t_cold:.2f} ms from scratch, {t_warm:.2f} ms from last frame's order")
+
+# --- 3. Several aircraft states against one grid ---
+m = 16
+headings = np.linspace(0, 2 * np.pi, m, endpoint=False)
+fleet_vel = 70.0 * np.column_stack([np.cos(headings), np.sin(headings), np.zeros(m)])
+fleet_pos = rng.uniform(-5000, 5000, (m, 3)) * [1, 1, 0]
+t_multi, (birds, aircraft) = timed(lambda: corridor_candidates_multi(grid, fleet_pos, fleet_vel, vel, horizon, threshold))
+print(f"{m} aircraft x 50000 birds: {t_multi:.2f} ms for {len(birds)} candidate pairs "
+      f"(of {m * 50000} brute-force pairs)")
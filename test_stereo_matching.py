@@ -0,0 +1,70 @@
+# test_stereo_matching.py
+# Builds synthetic stereo pairs from the boxes in labels/ and checks that
+# match_stereo recovers the true left/right correspondences.
+
+import numpy as np
+import os
+import time
+
+from stereo_matching import match_stereo
+from triangulation import triangulate_batch
+
+label_folder = 'labels'
+image_w, image_h = 1280, 720
+focal_length_px = 700.0
+baseline_m = 0.5
+num_birds = 300
+num_clutter = 30 # False detections in the right image only
+rng = np.random.default_rng(0)
+
+# --- Load YOLO-format label boxes (skip Pascal VOC XML and classes.txt) ---
+sizes = []
+for filename in sorted(os.listdir(label_folder)):
+    with open(os.path.join(label_folder, filename)) as f:
+        text = f.read().strip()
+    if not text or text.startswith('<'):
+        continue
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) == 5: # class cx cy w h
+            sizes.append((float(fields[3]), float(fields[4])))
+sizes = np.array(sizes)
+print(f"Loaded {len(sizes)} label boxes from {label_folder}/")
+
+# --- Build a synthetic flock (label box shapes scaled down by depth) ---
+depth_m = rng.uniform(10.0, 400.0, num_birds)
+shape = sizes[rng.integers(0, len(sizes), num_birds)] * 512.0 # Dataset images are 512x512
+scale = 20.0 / depth_m[:, None] # Far birds are small
+left = np.empty((num_birds, 4))
+left[:, 0] = rng.uniform(100, image_w - 100, num_birds)
+left[:, 1] = rng.uniform(50, image_h - 50, num_birds)
+left[:, 2:] = np.maximum(shape * scale, 2.0)
+
+disparity = focal_length_px * baseline_m / depth_m
+right = left.copy()
+right[:, 0] -= disparity
+right[:, :2] += rng.normal(0.0, 0.5, (num_birds, 2)) # Detector jitter
+
+clutter = np.column_stack([rng.uniform(0, image_w, num_clutter), rng.uniform(0, image_h, num_clutter),
+                           rng.uniform(2, 20, num_clutter), rng.uniform(2, 20, num_clutter)])
+right = np.vstack([right, clutter])
+perm = rng.permutation(len(right)) # Right detections come in arbitrary order
+right = right[perm]
+true_right = np.argsort(perm)[:num_birds] # true_right[i] = index of bird i in the right list
+
+print(f"Left boxes: {len(left)}, Right boxes: {len(right)} ({num_clutter} clutter)")
+
+# --- Match ---
+for method in ('hungarian', 'greedy'):
+    start = time.perf_counter()
+    left_idx, right_idx = match_stereo(left, right, method=method)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+    correct = np.count_nonzero(true_right[left_idx] == right_idx)
+    print(f"\n--- {method} ---")
+    print(f"Matched pairs: {len(left_idx)} | Correct: {correct} | Time: {elapsed_ms:.2f} ms")
+
+    points, valid = triangulate_batch(left[left_idx], right[right_idx],
+                                      focal_length_px, baseline_m, image_w / 2, image_h / 2)
+    depth_err = np.abs(points[valid, 2] - depth_m[left_idx[valid]]) / depth_m[left_idx[valid]]
+    print(f"Median relative depth error: {np.median(depth_err) * 100:.2f}%")
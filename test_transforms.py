@@ -0,0 +1,64 @@
+# test_transforms.py
+# Checks the vectorized transforms against spatialmath.SE3 and times both.
+
+import numpy as np
+from spatialmath import SE3, UnitQuaternion
+import time
+
+from transforms import PoseBuffer, compose, invert, quat_to_rot, rot_to_quat, transform_points
+
+rng = np.random.default_rng(0)
+num_points = 1000
+
+# --- Same pose as test_spatialmath.py ---
+T_WC_sm = SE3.Tz(1) * SE3.Ty(2) * SE3.Tx(5) * SE3.Rz(-np.pi / 2)
+T_WC = T_WC_sm.A
+P_C = rng.uniform(-200, 200, (num_points, 3))
+
+P_W_sm = (T_WC_sm * P_C.T).T
+P_W = transform_points(T_WC, P_C)
+print(f"Single pose, {num_points} points | max |error| vs SE3: {np.abs(P_W - P_W_sm).max():.2e} m")
+
+P_C_back = transform_points(invert(T_WC), P_W)
+print(f"Inverse round trip | max |error|: {np.abs(P_C_back - P_C).max():.2e} m")
+
+# --- One pose per point (e.g. per-frame camera poses) ---
+poses_sm = [SE3.Rand() for _ in range(num_points)]
+poses = np.stack([p.A for p in poses_sm])
+P_W_sm = np.array([(p * pt).ravel() for p, pt in zip(poses_sm, P_C)])
+P_W = transform_points(poses, P_C)
+print(f"Per-point poses | max |error| vs SE3: {np.abs(P_W - P_W_sm).max():.2e} m")
+
+# --- Composition camera -> body -> world ---
+T_BC_sm = SE3.Rx(0.1) * SE3.Tx(0.3)
+composed_sm = np.stack([(p * T_BC_sm).A for p in poses_sm])
+composed = compose(poses, T_BC_sm.A)
+print(f"Compose T_WB * T_BC | max |error| vs SE3: {np.abs(composed - composed_sm).max():.2e}")
+
+# --- Quaternion round trip ---
+q = rot_to_quat(poses[:, :3, :3])
+q_sm = np.array([UnitQuaternion(p.R).vec for p in poses_sm])
+q_sm *= np.sign(q_sm[:, :1]) # Same w >= 0 convention
+print(f"rot_to_quat | max |error| vs UnitQuaternion: {np.abs(q - q_sm).max():.2e}")
+print(f"quat_to_rot round trip | max |error|: {np.abs(quat_to_rot(q) - poses[:, :3, :3]).max():.2e}")
+
+# --- Interpolation between IMU samples ---
+buffer = PoseBuffer()
+T0 = SE3(0, 0, 0)
+T1 = SE3(10, 0, 0) * SE3.Rz(np.pi / 2)
+buffer.append(0.0, T0.A)
+buffer.append(1.0, T1.A)
+T_half = buffer.interpolate(0.5)[0]
+T_half_sm = T0.interp(T1, 0.5)
+print(f"Pose interpolation at t=0.5 | max |error| vs SE3.interp: {np.abs(T_half - T_half_sm.A).max():.2e}")
+
+# --- Timing: per-point SE3 objects vs one matmul ---
+start = time.perf_counter()
+for pt in P_C:
+    T_WC_sm * pt
+sm_ms = (time.perf_counter() - start) * 1000.0
+
+start = time.perf_counter()
+transform_points(T_WC, P_C)
+np_ms = (time.perf_counter() - start) * 1000.0
+print(f"\n{num_points} points: SE3 per point {sm_ms:.2f} ms | vectorized {np_ms:.3f} ms")
@@ -1,16 +1,18 @@
 import numpy as np
 
+from calibration import BASELINE_M, CX, CY, FOCAL_LENGTH_PX
 
+
+# Same ideal rig as the pipeline (calibration.py; set final_pipeline.CALIBRATION_PATH for a real one)
 # Focal length of the cameras (in pixels) - assume same for both
-focal_length_px = 700.0
+focal_length_px = FOCAL_LENGTH_PX
 
 # Baseline: Distance between the centers of the two cameras (in meters)
-baseline_m = 0.5 
+baseline_m = BASELINE_M
 
 # Principal Point (image center in pixels) - assume same for both
-# Often near the center of the image resolution (e.g., width/2, height/2)
-cx = 960.0 # Example: center of a 1920-width image
-cy = 540.0 # Example: center of a 1080-height image
+cx = CX # Center of the calibration.IMAGE_SIZE (1280x720) image
+cy = CY
 
 # --- Detected Pixel Coordinates  ---
 
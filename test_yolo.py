@@ -2,12 +2,12 @@
 # Simple script to test YOLOv8 installation and basic object detection (inference).
 # Uses a pre-trained model on a sample vidio.
 
-from ultralytics import YOLO
+from model_registry import get_yolo
 import os
 
 # --- Configuration ---
-# Load a pre-trained YOLOv8n model 
-model = YOLO('yolov8n.pt')
+# Pre-trained YOLOv8n model (loaded lazily through the shared registry)
+model_path = 'yolov8n.pt'
 
 # Define the path to your sample vidio
 video_path = 'vidio2.mp4'
@@ -25,6 +25,7 @@ else:
     # save=True will save the results to a 'runs/detect/predict' folder
     # conf=0.25 sets a confidence threshold (only show detections above 25% confidence)
     try:
+        model = get_yolo(model_path)
         results = model.predict(source=video_path, show=True, save=True, conf=0.25, project='.', name='predict')
 
         print("\nDetection complete.")
@@ -0,0 +1,128 @@
+import numpy as np
+
+from detections import as_matrix, detections_from_array, empty_detections
+from detector_backends import IOU_THRESHOLD, box_intersections, nms
+
+# Sliced inference for small, distant birds in high-resolution frames.
+# Each frame is cut into overlapping tiles at the detector's input size, so a
+# far bird keeps its native pixels instead of being downsampled with the whole
+# frame. All tiles of all frames (plus an optional full-frame pass for birds
+# larger than a tile) go through ONE detect_batch call, and the boxes are
+# merged back with a cross-tile NMS.
+
+TILE_SIZE = 640
+TILE_OVERLAP = 0.2 # Fraction of the tile shared with its neighbour
+IOS_THRESHOLD = 0.7 # Intersection over the smaller box: a bird cut by a tile edge
+EDGE_MARGIN_PX = 2 # A box this close to an interior tile edge may be cut by it
+
+_grids = {}
+
+
+def tile_grid(frame_shape, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """(T, 4) x1, y1, x2, y2 tiles covering the frame; the last row/column is flush with the edge."""
+    h, w = frame_shape[:2]
+    key = (h, w, tile_size, overlap)
+    if key not in _grids:
+        stride = max(1, int(tile_size * (1.0 - overlap)))
+
+        def starts(length):
+            if length <= tile_size:
+                return np.zeros(1, dtype=np.int32)
+            return np.append(np.arange(0, length - tile_size, stride), length - tile_size).astype(np.int32)
+
+        gx, gy = np.meshgrid(starts(w), starts(h))
+        gx, gy = gx.ravel(), gy.ravel()
+        _grids[key] = np.stack([gx, gy, np.minimum(gx + tile_size, w), np.minimum(gy + tile_size, h)], axis=1)
+    return _grids[key]
+
+
+def cross_tile_nms(boxes, scores, class_ids, tile_ids=None, cut=None, iou_threshold=IOU_THRESHOLD,
+                   ios_threshold=IOS_THRESHOLD):
+    """Class-aware NMS that prefers whole boxes; returns kept indices sorted by score.
+
+    Boxes cut by an interior tile edge (cut) rank after every uncut one in the
+    IoU pass, so a truncated, off-center box never suppresses the full box
+    from the neighbouring tile. A surviving cut box is then dropped when more
+    than ios_threshold of it lies inside a larger box of the same class from
+    another tile (tile_ids): the partial bird is absorbed by the whole one.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.intp)
+    boxes = np.asarray(boxes, dtype=np.float32)
+    scores = np.asarray(scores, dtype=np.float32)
+    if tile_ids is None or cut is None:
+        return nms(boxes, scores, iou_threshold, class_ids)
+    cut = np.asarray(cut, dtype=bool)
+    keep = nms(boxes, scores - 2.0 * cut, iou_threshold, class_ids) # Scores are in [0, 1]
+
+    inter, areas = box_intersections(boxes[keep])
+    cls, tiles = np.asarray(class_ids)[keep], np.asarray(tile_ids)[keep]
+    absorbed = ((inter > ios_threshold * areas[:, None]) & (areas[:, None] < areas[None, :]) & cut[keep][:, None]
+                & (tiles[:, None] != tiles[None, :]) & (cls[:, None] == cls[None, :]))
+    keep = keep[~absorbed.any(axis=1)]
+    return keep[np.argsort(-scores[keep], kind='stable')]
+
+
+def detect_crops(backend, frame_tiles, imgsz=TILE_SIZE):
+    """One detect_batch over every crop of every frame.
+
+    frame_tiles is a list of (frame, (T, 4) tiles); returns one (rows, tile_ids, cut)
+    per frame: (N, 6) [x1, y1, x2, y2, conf, cls] in frame coordinates, the
+    tile each box came from and whether it touches an edge of that tile that
+    is inside the frame (a bird possibly cut in half).
+    """
+    crops, owners, tile_ids, offsets, inner = [], [], [], [], []
+    for f, (frame, tiles) in enumerate(frame_tiles):
+        h, w = frame.shape[:2]
+        for t, (x1, y1, x2, y2) in enumerate(tiles.tolist()):
+            crops.append(frame[y1:y2, x1:x2])
+            owners.append(f)
+            tile_ids.append(t)
+            offsets.append((x1, y1, x1, y1))
+            inner.append((x1 > 0, y1 > 0, x2 < w, y2 < h))
+    parts = [[] for _ in frame_tiles]
+    if crops:
+        for owner, t, offset, edges, crop, dets in zip(owners, tile_ids, offsets, inner, crops,
+                                                       backend.detect_batch(crops, imgsz=imgsz)):
+            if len(dets):
+                rows = np.empty((len(dets), 6), dtype=np.float32)
+                local = as_matrix(dets)[:, :4]
+                rows[:, :4] = local + np.array(offset, dtype=np.float32)
+                rows[:, 4] = dets['conf']
+                rows[:, 5] = dets['cls']
+                ch, cw = crop.shape[:2]
+                near = np.stack([local[:, 0] <= EDGE_MARGIN_PX, local[:, 1] <= EDGE_MARGIN_PX,
+                                 local[:, 2] >= cw - EDGE_MARGIN_PX, local[:, 3] >= ch - EDGE_MARGIN_PX], axis=1)
+                parts[owner].append((rows, np.full(len(rows), t), (near & np.array(edges)).any(axis=1)))
+    return [tuple(np.concatenate(c) for c in zip(*p)) if p else
+            (np.zeros((0, 6), dtype=np.float32), np.zeros(0, dtype=np.intp), np.zeros(0, dtype=bool)) for p in parts]
+
+
+def merge_detections(rows, tile_ids=None, cut=None, iou_threshold=IOU_THRESHOLD, ios_threshold=IOS_THRESHOLD):
+    if len(rows) == 0:
+        return empty_detections()
+    keep = cross_tile_nms(rows[:, :4], rows[:, 4], rows[:, 5], tile_ids, cut, iou_threshold, ios_threshold)
+    return detections_from_array(rows[keep])
+
+
+def detect_tiles(backend, frame, tiles, tile_size=TILE_SIZE, iou_threshold=IOU_THRESHOLD):
+    """Detects on the given tiles of one frame and merges boxes back into frame coordinates."""
+    return merge_detections(*detect_crops(backend, [(frame, tiles)], tile_size)[0], iou_threshold=iou_threshold)
+
+
+def detect_sliced_batch(backend, frames, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, full_frame=True,
+                        iou_threshold=IOU_THRESHOLD):
+    """Sliced detection for several frames (e.g. a stereo pair) in one batch."""
+    frame_tiles = []
+    for frame in frames:
+        tiles = tile_grid(frame.shape, tile_size, overlap)
+        if full_frame and len(tiles) > 1:
+            h, w = frame.shape[:2]
+            tiles = np.vstack([tiles, [[0, 0, w, h]]])
+        frame_tiles.append((frame, tiles))
+    parts = detect_crops(backend, frame_tiles, tile_size)
+    return [merge_detections(*part, iou_threshold=iou_threshold) for part in parts]
+
+
+def detect_sliced(backend, frame, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, full_frame=True):
+    return detect_sliced_batch(backend, [frame], tile_size, overlap, full_frame)[0]
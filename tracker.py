@@ -0,0 +1,242 @@
+import numpy as np
+
+from assignment import assign_pairs
+from spatial_index import UniformGrid, cell_keys, expand_ranges
+
+# Multi-object 3D tracker with a constant-velocity Kalman filter per track.
+# All track state lives in preallocated struct-of-arrays storage so predict
+# and update run as batched NumPy operations over every live track.
+# State x = [px, py, pz, vx, vy, vz], measurement z = [px, py, pz].
+
+GATE_CHI2 = 16.27        # 99.9% gate for a 3-DoF Mahalanobis distance
+PROCESS_NOISE = 5.0      # Acceleration noise (m/s^2) of the CV model
+MEASUREMENT_NOISE_M = 2.0
+INIT_VEL_STD = 20.0      # Velocity std of a newborn track (m/s)
+MIN_HITS = 3             # Updates before a track is confirmed
+MAX_MISSES = 15          # Frames a track may coast without a detection
+GATE_CELL_QUANTILE = 0.9 # Gate reach quantile that sizes the gating grid; wider tracks/measurements pair with all
+DENSE_GATE_FRACTION = 0.25 # Grid keeping more of the (T, K) pairs than this: bound all pairs along R's axes instead
+GRID_MIN_PAIRS = 40000   # Below this many (T, K) pairs building the grid costs more than it saves
+
+_UPPER = ([0, 1, 2, 0, 0, 1], [0, 1, 2, 1, 2, 2]) # [xx, yy, zz, xy, xz, yz] entries of a symmetric 3x3
+_NEIGHBOURS = np.stack(np.meshgrid(*[np.arange(-1, 2)] * 3, indexing='ij'), axis=-1).reshape(-1, 3)
+
+
+def _sym3_quadratic(S6, y):
+    """(n,) y^T S^-1 y from (6, n) rows [xx, yy, zz, xy, xz, yz] of symmetric S and (3, n) y.
+
+    Closed form (a batched solve costs far more per 3x3), on rows so every term is contiguous.
+    """
+    a, d, f, b, c, e = S6
+    # Adjugate of [[a b c] [b d e] [c e f]]
+    A, B, C = d * f - e * e, c * e - b * f, b * e - c * d
+    D, E, F = a * f - c * c, b * c - a * e, a * d - b * b
+    det = a * A + b * B + c * C
+    x, v, w = y
+    return (A * x * x + D * v * v + F * w * w + 2.0 * (B * x * v + C * x * w + E * v * w)) / det
+
+
+class TrackManager:
+    """Keeps Kalman state for many tracks and associates detections each frame."""
+
+    def __init__(self, capacity=256, process_noise=PROCESS_NOISE, measurement_noise=MEASUREMENT_NOISE_M,
+                 gate=GATE_CHI2, min_hits=MIN_HITS, max_misses=MAX_MISSES):
+        self.process_noise = process_noise
+        self.R = np.eye(3) * measurement_noise ** 2
+        self.gate = gate
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.next_id = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.x = np.zeros((capacity, 6))
+        self.P = np.zeros((capacity, 6, 6))
+        self.ids = np.full(capacity, -1, dtype=np.int64)
+        self.labels = np.zeros(capacity, dtype=np.int64)
+        self.hits = np.zeros(capacity, dtype=np.int32)
+        self.misses = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        """Doubles the storage when every slot is taken."""
+        old = (self.x, self.P, self.ids, self.labels, self.hits, self.misses, self.alive)
+        n = len(self.alive)
+        self._allocate(2 * n)
+        for new, prev in zip((self.x, self.P, self.ids, self.labels, self.hits, self.misses, self.alive), old):
+            new[:n] = prev
+
+    # --- Batched predict ---
+
+    def predict(self, dt):
+        """Propagates every live track dt seconds ahead."""
+        idx = np.flatnonzero(self.alive)
+        if len(idx) == 0:
+            return
+        F = np.eye(6)
+        F[:3, 3:] = np.eye(3) * dt
+        # Discrete white-noise acceleration model
+        q = self.process_noise ** 2
+        Q = np.zeros((6, 6))
+        Q[:3, :3] = np.eye(3) * (dt ** 4 / 4.0) * q
+        Q[:3, 3:] = Q[3:, :3] = np.eye(3) * (dt ** 3 / 2.0) * q
+        Q[3:, 3:] = np.eye(3) * (dt ** 2) * q
+
+        self.x[idx] = self.x[idx] @ F.T
+        self.P[idx] = F @ self.P[idx] @ F.T + Q
+
+    # --- Gated association + batched update ---
+
+    def update(self, measurements, labels=None, noise=None):
+        """Associates (K, 3) world positions to tracks, updates, births and deaths.
+
+        noise is an optional (K, 3, 3) covariance per measurement (e.g. from
+        triangulation_covariance); without it every measurement uses self.R.
+        """
+        measurements = np.asarray(measurements, dtype=np.float64).reshape(-1, 3)
+        if labels is None:
+            labels = np.zeros(len(measurements), dtype=np.int64)
+        labels = np.asarray(labels)
+        R = np.broadcast_to(self.R, (len(measurements), 3, 3)) if noise is None else np.asarray(noise)
+        idx = np.flatnonzero(self.alive)
+
+        matched_t = matched_m = np.empty(0, dtype=np.intp)
+        if len(idx) and len(measurements):
+            # Only the candidate pairs get a per-pair covariance (never (T, K, 3, 3))
+            t_cand, m_cand, cost = self._gate_pairs(idx, measurements, R)
+            rows, cols = assign_pairs(t_cand, m_cand, cost)
+            matched_t, matched_m = idx[rows], cols
+
+            # Kalman update for all matched tracks at once (H = [I 0])
+            S_m = np.linalg.inv(self.P[matched_t, :3, :3] + R[cols])
+            K = self.P[matched_t, :, :3] @ S_m                      # (n, 6, 3)
+            innovation = measurements[cols] - self.x[matched_t, :3]
+            self.x[matched_t] += np.einsum('nij,nj->ni', K, innovation)
+            self.P[matched_t] -= K @ self.P[matched_t, :3, :]
+            self.labels[matched_t] = labels[matched_m]
+            self.hits[matched_t] += 1
+            self.misses[matched_t] = 0
+
+        # --- Coast unmatched tracks, kill the stale ones ---
+        unmatched = np.setdiff1d(idx, matched_t, assume_unique=True)
+        self.misses[unmatched] += 1
+        dead = unmatched[self.misses[unmatched] > self.max_misses]
+        self.alive[dead] = False
+        self.ids[dead] = -1
+
+        # --- Birth new tracks from unmatched measurements ---
+        new_m = np.setdiff1d(np.arange(len(measurements)), matched_m, assume_unique=True)
+        if len(new_m):
+            while np.count_nonzero(~self.alive) < len(new_m):
+                self._grow()
+            slots = np.flatnonzero(~self.alive)[:len(new_m)]
+            self.x[slots, :3] = measurements[new_m]
+            self.x[slots, 3:] = 0.0
+            self.P[slots] = 0.0
+            self.P[slots, :3, :3] = R[new_m]
+            self.P[slots, 3:, 3:] = np.eye(3) * INIT_VEL_STD ** 2
+            self.ids[slots] = np.arange(self.next_id, self.next_id + len(slots))
+            self.next_id += len(slots)
+            self.labels[slots] = labels[new_m]
+            self.hits[slots] = 1
+            self.misses[slots] = 0
+            self.alive[slots] = True
+
+    def _gate_pairs(self, idx, measurements, R):
+        """(t, m, d2) of the track/measurement pairs inside the gate, one covariance R per measurement.
+
+        Candidates come from a grid over the predicted positions when the gates
+        are small next to the scene (_nearby_pairs), else from bounds along the
+        tightest axes of R over all pairs (_axis_bound_pairs). Only candidates
+        get the exact 3D distance.
+        """
+        P = self.P[idx, :3, :3]
+        pos = self.x[idx, :3]
+        r, V = np.linalg.eigh(R)                                    # Ascending eigenvalues
+        pairs = None
+        if len(idx) * len(measurements) >= GRID_MIN_PAIRS:
+            pairs = self._nearby_pairs(pos, np.linalg.eigvalsh(P)[:, 2], measurements, r[:, 2])
+        t_cand, m_cand = pairs if pairs is not None else self._axis_bound_pairs(P, pos, measurements, r, V)
+
+        P6 = np.ascontiguousarray(P[:, _UPPER[0], _UPPER[1]].T)    # (6, T)
+        R6 = np.ascontiguousarray(R[:, _UPPER[0], _UPPER[1]].T)    # (6, K)
+        S6 = np.take(P6, t_cand, axis=1)
+        S6 += np.take(R6, m_cand, axis=1)
+        y = np.take(np.ascontiguousarray(measurements.T), m_cand, axis=1)
+        y -= np.take(np.ascontiguousarray(pos.T), t_cand, axis=1)
+        d2 = _sym3_quadratic(S6, y)
+        keep = d2 < self.gate
+        return t_cand[keep], m_cand[keep], d2[keep]
+
+    def _nearby_pairs(self, pos, track_var, measurements, meas_var):
+        """(t, m) candidates from a UniformGrid over the track positions, or None if it would not prune.
+
+        With S = P + R, d2 >= |y|^2 / (track_var + meas_var) (largest
+        eigenvalues), so a gated pair is closer than track_reach + meas_reach.
+        Tracks and measurements reaching at most half a cell only need the 27
+        cells around the measurement; wider ones (newborn tracks, triangulated
+        points far along the line of sight) are paired with everything.
+        """
+        track_reach = np.sqrt(self.gate * track_var)
+        meas_reach = np.sqrt(self.gate * meas_var)
+        cell = 2.0 * np.quantile(np.concatenate([track_reach, meas_reach]), GATE_CELL_QUANTILE)
+        wide_t = track_reach > 0.5 * cell
+        wide_m = meas_reach > 0.5 * cell
+        narrow_t, wide_t = np.flatnonzero(~wide_t), np.flatnonzero(wide_t)
+        narrow_m, wide_m = np.flatnonzero(~wide_m), np.flatnonzero(wide_m)
+        limit = DENSE_GATE_FRACTION * len(pos) * len(measurements)
+        num_wide = len(wide_t) * len(measurements) + len(narrow_t) * len(wide_m)
+        if num_wide > limit:
+            return None
+
+        grid = UniformGrid(cell).rebuild(pos[narrow_t])
+        cells = np.floor(measurements[narrow_m] / cell).astype(np.int64)
+        keys = cell_keys((cells[:, None, :] + _NEIGHBOURS[None]).reshape(-1, 3))
+        lo = np.searchsorted(grid.sorted_keys, keys, side='left')
+        counts = np.searchsorted(grid.sorted_keys, keys, side='right') - lo
+        if counts.sum() + num_wide > limit:
+            return None
+        t_near = narrow_t[grid.order[expand_ranges(lo, counts)]]
+        m_near = np.repeat(np.repeat(narrow_m, len(_NEIGHBOURS)), counts)
+        t_cand = np.concatenate([t_near, np.repeat(wide_t, len(measurements)), np.tile(narrow_t, len(wide_m))])
+        m_cand = np.concatenate([m_near, np.tile(np.arange(len(measurements)), len(wide_t)),
+                                 np.repeat(wide_m, len(narrow_t))])
+        return t_cand, m_cand
+
+    def _axis_bound_pairs(self, P, pos, measurements, r, V):
+        """(t, m) candidates over all pairs, bounded along the two tightest axes of each R_k.
+
+        Since d2 >= (w . y)^2 / (w^T (P + R_k) w) for any direction w, pairs are
+        bounded along the tightest axes of R_k (across the line of sight for
+        triangulated points): matrix products over all (T, K) pairs, no per-pair
+        3x3 work and no gathers.
+        """
+        # Upper triangle of each track covariance, so w^T P w = P6 . (w_i w_j terms)
+        P6 = P[:, _UPPER[0], _UPPER[1]]                             # (T, 6)
+        W = V[:, :, :2]                                             # (K, 3, 2) tightest axes
+        WW = np.concatenate([W * W, 2.0 * W[:, [0, 0, 1]] * W[:, [1, 2, 2]]], axis=1)  # (K, 6, 2)
+        along = np.einsum('ki,kia->ka', measurements, W)            # Measurement coordinate per axis
+        inside = np.ones((len(pos), len(measurements)), dtype=bool)
+        for a in range(2):
+            gap = along[None, :, a] - pos @ W[:, :, a].T
+            inside &= gap * gap < self.gate * (P6 @ WW[:, :, a].T + r[None, :, a])
+        return np.nonzero(inside)
+
+    # --- Accessors ---
+
+    def confirmed(self):
+        """Returns slot indices of live tracks with at least min_hits updates."""
+        return np.flatnonzero(self.alive & (self.hits >= self.min_hits))
+
+    def tentative(self):
+        """Returns slot indices of live tracks still waiting for min_hits updates."""
+        return np.flatnonzero(self.alive & (self.hits < self.min_hits))
+
+    def tracks(self):
+        """Returns (ids, labels, positions, velocities) of confirmed tracks."""
+        idx = self.confirmed()
+        return self.ids[idx], self.labels[idx], self.x[idx, :3], self.x[idx, 3:]
+
+    def covariances(self):
+        """(N, 6, 6) position/velocity covariances of the confirmed tracks, in tracks() order."""
+        return self.P[self.confirmed()]
@@ -0,0 +1,149 @@
+import numpy as np
+
+# Vectorized rigid-body transforms on plain arrays.
+# Poses are (4, 4) or (N, 4, 4) homogeneous matrices (same convention as
+# spatialmath.SE3: P_W = T_WC * P_C), quaternions are (w, x, y, z).
+
+
+def se3(R=None, t=None):
+    """Builds a (4, 4) pose (or (N, 4, 4) for batched R/t)."""
+    R = np.eye(3) if R is None else np.asarray(R, dtype=np.float64)
+    t = np.zeros(R.shape[:-2] + (3,)) if t is None else np.asarray(t, dtype=np.float64)
+    T = np.zeros(R.shape[:-2] + (4, 4))
+    T[..., :3, :3] = R
+    T[..., :3, 3] = t
+    T[..., 3, 3] = 1.0
+    return T
+
+
+def invert(T):
+    """Inverse of one or many poses without a general matrix inverse."""
+    R = T[..., :3, :3]
+    Rt = np.swapaxes(R, -1, -2)
+    return se3(Rt, -np.einsum('...ij,...j->...i', Rt, T[..., :3, 3]))
+
+
+def compose(A, B):
+    """A * B for single or batched poses (broadcasts like matmul)."""
+    return np.matmul(A, B)
+
+
+def transform_points(T, points):
+    """Applies a pose to (N, 3) points in one matmul.
+
+    T is a single (4, 4) pose for all points, or (N, 4, 4) with one pose per point.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if T.ndim == 2:
+        return points @ T[:3, :3].T + T[:3, 3]
+    return np.einsum('nij,nj->ni', T[:, :3, :3], points) + T[:, :3, 3]
+
+
+def transform_covariances(T, cov):
+    """Rotates (N, 3, 3) point covariances into the frame of a (4, 4) or (N, 4, 4) pose."""
+    R = T[..., :3, :3]
+    return np.matmul(np.matmul(R, cov), np.swapaxes(R, -1, -2))
+
+
+#  QUATERNIONS ---
+
+def quat_to_rot(q):
+    """(..., 4) unit quaternions (w, x, y, z) -> (..., 3, 3) rotation matrices."""
+    q = np.asarray(q, dtype=np.float64)
+    q = q / np.linalg.norm(q, axis=-1, keepdims=True)
+    w, x, y, z = np.moveaxis(q, -1, 0)
+    R = np.empty(q.shape[:-1] + (3, 3))
+    R[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    R[..., 0, 1] = 2 * (x * y - w * z)
+    R[..., 0, 2] = 2 * (x * z + w * y)
+    R[..., 1, 0] = 2 * (x * y + w * z)
+    R[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    R[..., 1, 2] = 2 * (y * z - w * x)
+    R[..., 2, 0] = 2 * (x * z - w * y)
+    R[..., 2, 1] = 2 * (y * z + w * x)
+    R[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return R
+
+
+def rot_to_quat(R):
+    """(..., 3, 3) rotation matrices -> (..., 4) quaternions (w, x, y, z), w >= 0."""
+    R = np.asarray(R, dtype=np.float64)
+    m00, m11, m22 = R[..., 0, 0], R[..., 1, 1], R[..., 2, 2]
+    d21, d02, d10 = R[..., 2, 1] - R[..., 1, 2], R[..., 0, 2] - R[..., 2, 0], R[..., 1, 0] - R[..., 0, 1]
+    s01, s02, s12 = R[..., 0, 1] + R[..., 1, 0], R[..., 0, 2] + R[..., 2, 0], R[..., 1, 2] + R[..., 2, 1]
+
+    # Shepperd's method: divide by the largest component for numerical stability
+    diag = np.stack([1 + m00 + m11 + m22, 1 + m00 - m11 - m22,
+                     1 - m00 + m11 - m22, 1 - m00 - m11 + m22], axis=-1)
+    k = np.argmax(diag, axis=-1)
+    big = np.sqrt(np.maximum(np.take_along_axis(diag, k[..., None], axis=-1)[..., 0], 1e-12)) / 2.0
+    inv = 1.0 / (4.0 * big)
+    candidates = np.stack([
+        np.stack([big, d21 * inv, d02 * inv, d10 * inv], axis=-1),
+        np.stack([d21 * inv, big, s01 * inv, s02 * inv], axis=-1),
+        np.stack([d02 * inv, s01 * inv, big, s12 * inv], axis=-1),
+        np.stack([d10 * inv, s02 * inv, s12 * inv, big], axis=-1),
+    ], axis=-2)
+    q = np.take_along_axis(candidates, k[..., None, None], axis=-2)[..., 0, :]
+    q = np.where(q[..., :1] < 0.0, -q, q)
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def slerp(q0, q1, s):
+    """Batched spherical interpolation between (N, 4) quaternions at fractions s (N,)."""
+    dot = np.sum(q0 * q1, axis=-1)
+    q1 = np.where(dot[:, None] < 0.0, -q1, q1) # Take the short way round
+    dot = np.abs(dot)
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.sin(theta)
+    near = sin_theta < 1e-6
+    safe = np.where(near, 1.0, sin_theta)
+    w0 = np.where(near, 1.0 - s, np.sin((1.0 - s) * theta) / safe)
+    w1 = np.where(near, s, np.sin(s * theta) / safe)
+    q = w0[:, None] * q0 + w1[:, None] * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+#  TIME-STAMPED POSES ---
+
+class PoseBuffer:
+    """Time-stamped poses (e.g. body-to-world from the IMU) with interpolation.
+
+    Stored as growable (N,) time, (N, 4) quaternion and (N, 3) translation arrays.
+    Timestamps must be appended in increasing order.
+    """
+
+    def __init__(self, capacity=1024):
+        self.times = np.empty(capacity)
+        self.quats = np.empty((capacity, 4))
+        self.trans = np.empty((capacity, 3))
+        self.size = 0
+
+    def append(self, t, T):
+        """Adds a (4, 4) pose taken at time t."""
+        if self.size == len(self.times):
+            self.times = np.resize(self.times, 2 * self.size)
+            self.quats = np.resize(self.quats, (2 * self.size, 4))
+            self.trans = np.resize(self.trans, (2 * self.size, 3))
+        self.times[self.size] = t
+        self.quats[self.size] = rot_to_quat(T[:3, :3])
+        self.trans[self.size] = T[:3, 3]
+        self.size += 1
+
+    def interpolate(self, t):
+        """Returns (M, 4, 4) poses at times t (clamped to the buffered range)."""
+        t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        if self.size == 0:
+            raise ValueError("PoseBuffer is empty")
+        times = self.times[:self.size]
+        hi = np.clip(np.searchsorted(times, t, side='right'), 1, max(self.size - 1, 1))
+        lo = hi - 1
+        if self.size == 1:
+            hi = lo = np.zeros_like(hi)
+        span = times[hi] - times[lo]
+        s = np.where(span > 0, (t - times[lo]) / np.where(span > 0, span, 1.0), 0.0)
+        s = np.clip(s, 0.0, 1.0)
+
+        q = slerp(self.quats[lo], self.quats[hi], s)
+        p = self.trans[lo] + s[:, None] * (self.trans[hi] - self.trans[lo])
+        return se3(quat_to_rot(q), p)